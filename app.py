@@ -16,8 +16,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.inventory_optimizer import InventoryOptimizer
-from src.weather_integration import WeatherIntegration, add_weather_to_forecast
-from src.market_factors import MarketFactors, add_market_to_forecast
+from src.weather_integration import WeatherIntegration
+from src.market_factors import MarketFactors
 from src.cost_analyzer import CostAnalyzer
 from src.waste_tracker import WasteTracker
 
@@ -75,7 +75,7 @@ with st.sidebar:
     if use_ml:
         ml_algorithm = st.selectbox(
             "Algorithm",
-            ["xgboost", "sarima", "random_forest", "prophet"],
+            ["xgboost", "xgboost_global", "auto", "sarima", "random_forest", "prophet", "croston"],
             help="Choose forecasting algorithm"
         )
     else:
@@ -156,7 +156,12 @@ with st.sidebar:
         with st.spinner("Initializing system..."):
             try:
                 # Initialize optimizer
-                optimizer = InventoryOptimizer(use_ml=use_ml, ml_algorithm=ml_algorithm)
+                optimizer = InventoryOptimizer(
+                    use_ml=use_ml,
+                    ml_algorithm=ml_algorithm,
+                    model_registry_dir="data/models",
+                    forecast_cache_dir="data/forecast_cache"
+                )
                 
                 # Load data
                 if data_source == "Real Dataset (archive-2)":
@@ -348,16 +353,13 @@ else:
     with col1:
         if st.button("🚀 RUN FULL ANALYSIS", type="primary", use_container_width=True):
             with st.spinner("Running comprehensive analysis..."):
-                # Step 1: Base forecast
-                forecast = optimizer.forecast_demand(days_ahead=days_ahead)
-                
-                # Step 2: Apply weather (using standalone function)
-                if weather_integration:
-                    forecast = add_weather_to_forecast(forecast)
-                
-                # Step 3: Apply market factors (using standalone function)
-                if market_factors:
-                    forecast = add_market_to_forecast(forecast)
+                # Step 1-3: Base forecast with weather and market factors
+                # (cached: repeat runs with unchanged inputs are instant)
+                forecast = optimizer.forecast_demand(
+                    days_ahead=days_ahead,
+                    use_weather=weather_integration is not None,
+                    use_market=market_factors is not None
+                )
                 
                 # Step 4: Calculate materials
                 materials = optimizer.calculate_material_requirements(forecast)
@@ -383,12 +385,11 @@ else:
     with col2:
         if st.button("🔄 Forecast Only", use_container_width=True):
             with st.spinner("Generating forecast..."):
-                forecast = optimizer.forecast_demand(days_ahead=days_ahead)
-                
-                if weather_integration:
-                    forecast = add_weather_to_forecast(forecast)
-                if market_factors:
-                    forecast = add_market_to_forecast(forecast)
+                forecast = optimizer.forecast_demand(
+                    days_ahead=days_ahead,
+                    use_weather=weather_integration is not None,
+                    use_market=market_factors is not None
+                )
                 
                 st.session_state.forecast = forecast
                 st.success(f"✅ Forecast for {days_ahead} days")
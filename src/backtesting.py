@@ -0,0 +1,228 @@
+"""
+Backtesting Module
+Walk-forward (rolling-origin) evaluation of the demand forecasters
+"""
+
+import io
+import contextlib
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from src.ml_forecaster import MLForecaster
+from src.feature_engine import FeatureEngine
+from src.parallel_utils import parallel_map
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Name used for InventoryOptimizer._forecast_statistical in backtest results
+STATISTICAL = 'statistical'
+
+METRICS = ['mae', 'rmse', 'mape', 'wape']
+
+
+class Backtester:
+    """
+    Rolling-origin evaluation of a forecaster over the order history.
+
+    For every origin the forecaster is trained on the orders up to and
+    including the origin date and forecasts the ``horizon`` days after it;
+    the forecasts are compared with the actual daily demand (0 on days a
+    launched dish did not sell).
+
+    Folds are independent and run through ``parallel_map``; statistical
+    folds are all forecast in one vectorized run. Lag features of
+    the tree models are computed once on the full history and sliced per fold
+    (see ``FeatureEngine.fold_copy``); calendar features come from the shared
+    calendar table.
+    """
+
+    def __init__(self, orders: pd.DataFrame, horizon: int = 7, step: int = 7,
+                 n_origins: Optional[int] = None, min_train_days: int = 56,
+                 n_jobs: int = 1, backend: str = 'process', verbose: bool = False):
+        """
+        Initialize Backtester.
+
+        Args:
+            orders: Order history with ['date', 'dish_name', 'quantity_sold']
+            horizon: Days forecast from each origin
+            step: Days between consecutive origins (7 = weekly origins)
+            n_origins: Keep only the latest N origins (default: all)
+            min_train_days: Days of history required before the first origin
+            n_jobs: Number of folds run in parallel (-1 = all cores)
+            backend: Parallel backend, 'process' or 'thread'
+            verbose: Show the forecasters' training output
+        """
+        self.orders = orders.assign(date=pd.to_datetime(orders['date']))
+        self.horizon = horizon
+        self.step = step
+        self.n_origins = n_origins
+        self.min_train_days = min_train_days
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.verbose = verbose
+        self.actuals = FeatureEngine.build_panel(self.orders)
+
+    def origins(self) -> List[pd.Timestamp]:
+        """
+        Forecast origins, oldest first.
+
+        The latest origin leaves a full horizon of actuals after it; earlier
+        origins are spaced ``step`` days apart.
+        """
+        dates = self.actuals.index
+        earliest = dates[0] + pd.Timedelta(days=self.min_train_days - 1)
+        origin = dates[-1] - pd.Timedelta(days=self.horizon)
+
+        origins = []
+        while origin >= earliest:
+            origins.append(origin)
+            origin -= pd.Timedelta(days=self.step)
+        if self.n_origins is not None:
+            origins = origins[:self.n_origins]
+        return origins[::-1]
+
+    def run(self, algorithm: str, model_params: Optional[Dict] = None,
+            feature_engine: Optional[FeatureEngine] = None,
+            origins: Optional[Sequence] = None) -> pd.DataFrame:
+        """
+        Backtest one algorithm over every origin.
+
+        Args:
+            algorithm: Any ``MLForecaster`` algorithm, or 'statistical'
+            model_params: Hyperparameters passed to ``MLForecaster``
+            feature_engine: Lag feature engine passed to ``MLForecaster``
+            origins: Forecast origins to evaluate (default: ``origins()``)
+
+        Returns:
+            DataFrame with ['algorithm', 'origin', 'date', 'horizon', 'dish_name',
+            'predicted_quantity', 'actual']
+        """
+        origins = self.origins() if origins is None else [pd.Timestamp(o) for o in origins]
+        if not origins:
+            raise ValueError("Not enough history for a single backtest origin")
+
+        logger.info(f"Backtesting {algorithm}: {len(origins)} origins x {self.horizon} days")
+        if algorithm == STATISTICAL:
+            return self._attach_actuals(algorithm, self._run_statistical(origins))
+
+        # Validates the algorithm and resolves the default engine of the global model
+        engine = MLForecaster(algorithm=algorithm, model_params=model_params,
+                              feature_engine=feature_engine, quantiles=False).feature_engine
+
+        tasks = []
+        for origin in origins:
+            if engine is not None:
+                fold_engine, fold_orders = engine.fold_copy(self.orders, origin)
+            else:
+                fold_engine, fold_orders = None, self.orders[self.orders['date'] <= origin]
+            tasks.append((algorithm, fold_orders, origin, self.horizon,
+                          model_params, fold_engine, self._quiet()))
+
+        folds = parallel_map(_run_fold, tasks, n_jobs=self.n_jobs, backend=self.backend)
+        return self._attach_actuals(algorithm, pd.concat(folds, ignore_index=True))
+
+    def _run_statistical(self, origins: List[pd.Timestamp]) -> pd.DataFrame:
+        """All statistical folds in one vectorized run (``InventoryOptimizer.forecast_origins``)."""
+        from src.inventory_optimizer import InventoryOptimizer
+        output = contextlib.redirect_stdout(io.StringIO()) if self._quiet() else contextlib.nullcontext()
+        with output:
+            optimizer = InventoryOptimizer(forecast_cache_size=0)
+            optimizer.orders_data = self.orders.copy()
+            optimizer.seasonal_factors = optimizer._create_seasonal_factors()
+            forecast = optimizer.forecast_origins(origins, days_ahead=self.horizon)
+        return forecast[['date', 'dish_name', 'predicted_quantity', 'origin']]
+
+    def evaluate(self, algorithms: Sequence[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Backtest several algorithms and score them.
+
+        Args:
+            algorithms: Algorithm names (see ``run``)
+
+        Returns:
+            Dictionary with 'forecasts' (all fold forecasts), 'per_dish',
+            'per_horizon' and 'overall' metric tables
+        """
+        forecasts = pd.concat([self.run(algorithm) for algorithm in algorithms], ignore_index=True)
+        return {
+            'forecasts': forecasts,
+            'per_dish': score(forecasts, ['algorithm', 'dish_name']),
+            'per_horizon': score(forecasts, ['algorithm', 'horizon']),
+            'overall': score(forecasts, ['algorithm'])
+        }
+
+    def _attach_actuals(self, algorithm: str, forecasts: pd.DataFrame) -> pd.DataFrame:
+        actuals = (self.actuals.rename_axis('date').reset_index()
+                   .melt(id_vars='date', var_name='dish_name', value_name='actual')
+                   .dropna(subset=['actual']))
+
+        forecasts = forecasts.assign(date=pd.to_datetime(forecasts['date']))
+        result = forecasts.merge(actuals, on=['date', 'dish_name'], how='inner')
+        result['horizon'] = (result['date'] - result['origin']).dt.days
+        result['algorithm'] = algorithm
+        return result[['algorithm', 'origin', 'date', 'horizon', 'dish_name',
+                       'predicted_quantity', 'actual']]
+
+    def _quiet(self) -> bool:
+        # Redirecting stdout is process-wide, so it is unsafe across threads
+        return not self.verbose and (self.backend == 'process' or self.n_jobs == 1)
+
+
+def score(forecasts: pd.DataFrame, by: List[str]) -> pd.DataFrame:
+    """
+    Accuracy metrics of backtest forecasts.
+
+    - MAE / RMSE: mean absolute / root mean squared error
+    - MAPE: mean absolute percentage error over days with non-zero demand
+    - WAPE: total absolute error as a percentage of total demand
+
+    Args:
+        forecasts: Output of ``Backtester.run``
+        by: Grouping columns (e.g. ['algorithm', 'dish_name'])
+
+    Returns:
+        DataFrame with the ``by`` columns, 'n' and the ``METRICS`` columns
+    """
+    error = forecasts['predicted_quantity'] - forecasts['actual']
+    actual = forecasts['actual']
+    frame = forecasts[by].assign(
+        abs_error=error.abs(),
+        sq_error=error ** 2,
+        ape=(error.abs() / actual).where(actual > 0),
+        actual=actual
+    )
+
+    grouped = frame.groupby(by, sort=True)
+    sums = grouped[['abs_error', 'actual']].sum()
+    result = pd.DataFrame({
+        'n': grouped.size(),
+        'mae': grouped['abs_error'].mean(),
+        'rmse': np.sqrt(grouped['sq_error'].mean()),
+        'mape': grouped['ape'].mean() * 100,
+        'wape': (sums['abs_error'] / sums['actual'].where(sums['actual'] > 0)) * 100
+    })
+    return result.reset_index()
+
+
+def _run_fold(algorithm: str, fold_orders: pd.DataFrame, origin: pd.Timestamp, horizon: int,
+              model_params: Optional[Dict], feature_engine: Optional[FeatureEngine],
+              quiet: bool) -> pd.DataFrame:
+    """
+    Train on one fold and forecast the horizon after its origin.
+
+    Folds are scored on the point forecast only, so no quantile models are
+    trained.
+    """
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    with output:
+        forecaster = MLForecaster(algorithm=algorithm, model_params=model_params,
+                                  feature_engine=feature_engine, quantiles=False)
+        forecaster.fit(fold_orders.copy())
+        forecast = forecaster.predict(days_ahead=horizon, start_date=origin)
+
+    forecast = forecast[['date', 'dish_name', 'predicted_quantity']].copy()
+    forecast['origin'] = origin
+    return forecast
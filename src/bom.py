@@ -0,0 +1,306 @@
+"""
+Bill of Materials Module
+Recipes compiled into a sparse dish x material matrix for requirement explosion
+"""
+
+import hashlib
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from typing import List, Optional, Sequence
+
+# Usable fraction of a recipe line's ingredient after trim and cooking losses
+YIELD_COLUMN = 'yield_factor'
+
+
+class BillOfMaterials:
+    """
+    Sparse bill of materials of the menu.
+
+    Recipes may be nested: a recipe line whose material is itself a recipe
+    item (a prep item such as a sauce, dough or stock) pulls in that item's
+    own recipe. Every line needs ``quantity_needed / yield_factor`` of its
+    ingredient (``yield_factor`` defaults to 1, e.g. 0.8 for 20% trim loss).
+
+    The recipe graph is flattened once into ``matrix``, the (n_items x
+    n_materials) CSR matrix of raw material per unit of every item, so
+    requirements of a (periods x items) demand matrix ``D`` are the single
+    sparse product ``D @ matrix`` whatever the nesting depth. Items are
+    flattened level by level (raw-only recipes first), and a cycle in the
+    graph raises a ``ValueError``. Materials are the raw (non-recipe)
+    ingredients, sorted by name; duplicate recipe lines are summed.
+    """
+
+    def __init__(self, recipes: pd.DataFrame):
+        """
+        Initialize Bill of Materials.
+
+        Args:
+            recipes: Recipe lines ['dish_name', 'material_name',
+                     'quantity_needed'] and optionally 'yield_factor'
+        """
+        self.recipes = self._clean(recipes)
+        self.dishes = list(pd.unique(self.recipes['dish_name']))
+        self.materials = sorted(set(self.recipes['material_name']) - set(self.dishes))
+        self._dish_codes = pd.Index(self.dishes)
+        self._material_codes = pd.Index(self.materials)
+
+        # Direct lines: raw materials and prep items per item, with 0/1 usage patterns
+        self.raw_lines, self.raw_usage, self.prep_lines, self.prep_usage = self._direct(self.recipes)
+        self.levels = self._levels(self.prep_usage)
+        self.matrix = self.raw_lines.copy()
+        self.usage = self.raw_usage.copy()
+        self._propagate(np.arange(len(self.dishes)))
+
+    @classmethod
+    def from_recipes(cls, recipes: pd.DataFrame) -> 'BillOfMaterials':
+        """Compile recipe lines (see ``__init__``)."""
+        return cls(recipes)
+
+    @staticmethod
+    def fingerprint(recipes: pd.DataFrame) -> str:
+        """Hash of the recipe lines, used to know when to recompile."""
+        columns = ['dish_name', 'material_name', 'quantity_needed']
+        columns += [YIELD_COLUMN] if YIELD_COLUMN in recipes.columns else []
+        row_hashes = pd.util.hash_pandas_object(recipes[columns], index=False).to_numpy()
+        return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+    @staticmethod
+    def _clean(recipes: pd.DataFrame) -> pd.DataFrame:
+        """Recipe lines with the quantity bought per unit made, losses included."""
+        lines = recipes.dropna(subset=['dish_name', 'material_name'])
+        quantities = np.nan_to_num(lines['quantity_needed'].to_numpy(dtype=float))
+        if YIELD_COLUMN in lines.columns:
+            yields = lines[YIELD_COLUMN].fillna(1.0).to_numpy(dtype=float)
+            if (yields <= 0).any() or (yields > 1).any():
+                raise ValueError(f"{YIELD_COLUMN} must be in (0, 1]")
+            quantities = quantities / yields
+        return pd.DataFrame({'dish_name': lines['dish_name'].to_numpy(),
+                             'material_name': lines['material_name'].to_numpy(),
+                             'quantity_needed': quantities})
+
+    def _direct(self, lines: pd.DataFrame):
+        """Direct-line matrices (raw lines, raw usage, prep lines, prep usage) of recipe lines."""
+        rows = self._dish_codes.get_indexer(lines['dish_name'])
+        prep_cols = self._dish_codes.get_indexer(lines['material_name'])
+        raw_cols = self._material_codes.get_indexer(lines['material_name'])
+        quantities = lines['quantity_needed'].to_numpy()
+        matrices = []
+        for mask, cols, n_cols in [(raw_cols >= 0, raw_cols, len(self.materials)),
+                                   (prep_cols >= 0, prep_cols, len(self.dishes))]:
+            shape = (len(self.dishes), n_cols)
+            lines_matrix = sparse.csr_matrix((quantities[mask], (rows[mask], cols[mask])), shape=shape)
+            usage = sparse.csr_matrix((np.ones(mask.sum()), (rows[mask], cols[mask])), shape=shape)
+            usage.data[:] = 1
+            matrices += [lines_matrix, usage]
+        return tuple(matrices)
+
+    def _levels(self, prep_usage: sparse.csr_matrix) -> np.ndarray:
+        """
+        Nesting level of every item (0 = raw materials only).
+
+        Items are peeled off the graph once all their prep items are placed,
+        so whatever remains forms a cycle.
+        """
+        levels = np.full(len(self.dishes), -1)
+        remaining = np.ones(len(self.dishes), dtype=bool)
+        level = 0
+        while remaining.any():
+            ready = remaining & (prep_usage @ remaining.astype(float) == 0)
+            if not ready.any():
+                raise ValueError(f"Recipe cycle: {' -> '.join(self._cycle(prep_usage, remaining))}")
+            levels[ready] = level
+            remaining &= ~ready
+            level += 1
+        return levels
+
+    def _cycle(self, prep_usage: sparse.csr_matrix, remaining: np.ndarray) -> List[str]:
+        """Names along one cycle among the items that could not be levelled."""
+        path = [int(np.flatnonzero(remaining)[0])]
+        while True:
+            components = prep_usage.indices[prep_usage.indptr[path[-1]]:prep_usage.indptr[path[-1] + 1]]
+            following = int(components[remaining[components]][0])
+            if following in path:
+                return [self.dishes[i] for i in path[path.index(following):] + [following]]
+            path.append(following)
+
+    def _propagate(self, items: np.ndarray) -> None:
+        """Recompute the flattened rows of ``items``, lower levels first."""
+        for level in np.unique(self.levels[items]):
+            rows = items[self.levels[items] == level]
+            self.matrix = _replace_rows(self.matrix, rows,
+                                        self.raw_lines[rows] + self.prep_lines[rows] @ self.matrix)
+            usage = sparse.csr_matrix(self.raw_usage[rows] + self.prep_usage[rows] @ self.usage)
+            usage.data[:] = 1
+            self.usage = _replace_rows(self.usage, rows, usage)
+
+    def update_recipe(self, dish_name: str, lines: pd.DataFrame) -> None:
+        """
+        Replace the recipe of one item and recompute only what depends on it.
+
+        The item and every item using it (directly or through prep items) are
+        re-flattened. Recipes that add a new item or raw material, or that
+        change which items are recipes or which materials are used (e.g. an
+        emptied recipe), rebuild the whole BOM. A change that would create a cycle raises a ``ValueError``
+        and leaves the BOM unchanged.
+
+        Args:
+            dish_name: Item whose recipe is replaced
+            lines: New recipe lines ['material_name', 'quantity_needed'] and
+                   optionally 'yield_factor'
+        """
+        new_lines = self._clean(lines.assign(dish_name=dish_name))
+        recipes = pd.concat([self.recipes[self.recipes['dish_name'] != dish_name], new_lines],
+                            ignore_index=True)
+        known = set(self.dishes) | set(self.materials)
+        old_materials = set(self.recipes.loc[self.recipes['dish_name'] == dish_name, 'material_name'])
+        if (dish_name not in self._dish_codes or new_lines.empty
+                or not set(new_lines['material_name']) <= known
+                or not old_materials <= set(recipes['material_name'])):
+            self.__init__(recipes)
+            return
+
+        # Only the item's rows of the direct-line matrices change
+        row = np.array([self._dish_codes.get_loc(dish_name)])
+        raw_lines, raw_usage, prep_lines, prep_usage = (
+            _replace_rows(current, row, new[row]) for current, new in
+            zip([self.raw_lines, self.raw_usage, self.prep_lines, self.prep_usage], self._direct(new_lines)))
+        levels = self._levels(prep_usage)
+
+        # The item and its ancestors: items reaching it through prep lines
+        affected = np.zeros(len(self.dishes), dtype=bool)
+        affected[row] = True
+        while True:
+            grown = affected | (prep_usage @ affected.astype(float) > 0)
+            if (grown == affected).all():
+                break
+            affected = grown
+
+        self.recipes = recipes
+        self.raw_lines, self.raw_usage, self.prep_lines, self.prep_usage = raw_lines, raw_usage, prep_lines, prep_usage
+        self.levels = levels
+        self._propagate(np.flatnonzero(affected))
+
+    def lines(self) -> pd.DataFrame:
+        """
+        Flattened recipe lines: raw material per unit of every item, with
+        nesting and yields included (the nonzeros of ``matrix``).
+
+        Returns:
+            DataFrame with ['dish_name', 'material_name', 'quantity_needed'],
+            in item order then material order
+        """
+        return self._lines(np.arange(len(self.dishes)))
+
+    def menu_lines(self) -> pd.DataFrame:
+        """
+        Flattened recipe lines of the menu items only, leaving out prep
+        items (items that another recipe uses as an ingredient).
+
+        Returns:
+            DataFrame like ``lines``
+        """
+        return self._lines(np.flatnonzero(~self.prep_items()))
+
+    def prep_items(self) -> np.ndarray:
+        """Boolean mask over ``dishes``: True for items used in another recipe."""
+        return np.bincount(self.prep_usage.indices, minlength=len(self.dishes)) > 0
+
+    def _lines(self, items: np.ndarray) -> pd.DataFrame:
+        """Flattened lines of the items at positions ``items`` (sorted)."""
+        matrix = self.matrix.tocsr()[items]
+        matrix.sort_indices()
+        rows = items[np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))]
+        return pd.DataFrame({'dish_name': np.asarray(self.dishes, dtype=object)[rows],
+                             'material_name': np.asarray(self.materials, dtype=object)[matrix.indices],
+                             'quantity_needed': matrix.data})
+
+    def dish_codes(self, dish_names: pd.Series) -> np.ndarray:
+        """Matrix row of every dish name (-1 for dishes without a recipe)."""
+        return self._dish_codes.get_indexer(dish_names)
+
+    def explode(self, demand: np.ndarray) -> sparse.csr_matrix:
+        """
+        Material requirements of a demand matrix.
+
+        Args:
+            demand: (periods x n_dishes) dish quantities, dense or sparse
+
+        Returns:
+            (periods x n_materials) sparse material quantities
+        """
+        return sparse.csr_matrix(demand) @ self.matrix
+
+    def requirements(self, forecast: pd.DataFrame, value_columns: Sequence[str],
+                     keys: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Explode a long forecast frame into material requirements.
+
+        Forecast rows are scattered into one sparse (key x dish) matrix per
+        value column and multiplied by the BOM, so no forecast x recipe frame
+        is ever built. Dishes without a recipe are ignored.
+
+        Args:
+            forecast: Rows with ``keys``, 'dish_name' and the value columns
+            value_columns: Dish quantity columns (e.g. 'predicted_quantity', 'p90')
+            keys: Columns identifying a period (default: ['date']); e.g.
+                  ['location', 'date'] for multi-location forecasts
+
+        Returns:
+            DataFrame with the ``keys``, 'material_name' and one column per
+            value column, with a row for every (key, material) used by a dish
+            forecast for that key, sorted by key then material
+        """
+        keys = ['date'] if keys is None else list(keys)
+        groups = forecast.groupby(keys, sort=True)
+        key_codes = groups.ngroup().to_numpy()
+        key_frame = groups.size().index.to_frame(index=False)
+        dish_codes = self.dish_codes(forecast['dish_name'])
+
+        valid = (key_codes >= 0) & (dish_codes >= 0)
+        rows, cols = key_codes[valid], dish_codes[valid]
+        n_keys, n_materials = len(key_frame), len(self.materials)
+
+        # (key, material) pairs present in the result; CSR order is key then material
+        used = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_keys, len(self.dishes))) @ self.usage
+        used.sort_indices()
+        used_rows = np.repeat(np.arange(n_keys), np.diff(used.indptr))
+        used_cols = used.indices
+
+        result = key_frame.iloc[used_rows].reset_index(drop=True)
+        result['material_name'] = np.asarray(self.materials, dtype=object)[used_cols]
+        if not len(value_columns):
+            return result
+
+        # All value columns in one product: column j occupies rows j*n_keys .. (j+1)*n_keys-1
+        values = np.nan_to_num(forecast[list(value_columns)].to_numpy(dtype=float)[valid])
+        n_values = values.shape[1]
+        demand = sparse.csr_matrix(
+            (values.T.ravel(), (np.concatenate([rows + j * n_keys for j in range(n_values)]),
+                                np.tile(cols, n_values))),
+            shape=(n_values * n_keys, len(self.dishes)))
+        totals = self.explode(demand)
+        totals.sort_indices()
+
+        # Look the present pairs up in the product by flat cell number (sentinel cell -1 = 0)
+        total_cells = np.append(np.repeat(np.arange(totals.shape[0]), np.diff(totals.indptr)) * n_materials
+                                + totals.indices, -1)
+        total_values = np.append(totals.data, 0.0)
+        used_cells = used_rows * n_materials + used_cols
+        for j, column in enumerate(value_columns):
+            cells = used_cells + j * n_keys * n_materials
+            position = np.searchsorted(total_cells[:-1], cells)
+            position[total_cells[position] != cells] = len(total_cells) - 1
+            result[column] = total_values[position]
+        return result
+
+
+def _replace_rows(matrix: sparse.csr_matrix, rows: np.ndarray, values: sparse.spmatrix) -> sparse.csr_matrix:
+    """Copy of a sparse matrix with ``rows`` replaced by the rows of ``values``."""
+    keep = np.ones(matrix.shape[0])
+    keep[rows] = 0
+    scatter = sparse.csr_matrix((np.ones(len(rows)), (rows, np.arange(len(rows)))),
+                                shape=(matrix.shape[0], len(rows)))
+    result = sparse.csr_matrix(sparse.diags(keep) @ matrix + scatter @ values)
+    result.eliminate_zeros()
+    return result
@@ -0,0 +1,157 @@
+"""
+Calendar Features Module
+Precomputed date dimension table shared by all forecasters
+"""
+
+import threading
+import pandas as pd
+import numpy as np
+from typing import Optional
+
+# Column -> dtype of the date dimension table
+CALENDAR_COLUMNS = {
+    'year': np.int16,
+    'month': np.int8,
+    'day': np.int8,
+    'day_of_week': np.int8,
+    'day_of_year': np.int16,
+    'week_of_year': np.int8,
+    'quarter': np.int8,
+    'month_sin': np.float32,
+    'month_cos': np.float32,
+    'day_of_week_sin': np.float32,
+    'day_of_week_cos': np.float32,
+    'is_weekend': np.int8,
+    'is_month_start': np.int8,
+    'is_month_end': np.int8,
+    'is_winter': np.int8,
+    'is_summer': np.int8,
+    'is_spring': np.int8,
+    'is_fall': np.int8,
+    'is_public_holiday': np.int8,
+    'is_lunar_new_year': np.int8,
+    'is_major_event': np.int8,
+    'is_school_holiday': np.int8,
+    'is_exam_week': np.int8,
+}
+
+# Extra days built past the requested range, so a growing forecast horizon
+# does not trigger a rebuild on every call
+HORIZON_MARGIN_DAYS = 366
+
+_table: Optional[pd.DataFrame] = None
+_lock = threading.Lock()
+
+
+def build_calendar_table(start, end) -> pd.DataFrame:
+    """
+    Build the date dimension table for an inclusive date range.
+
+    Holiday, event and school calendars come from ``MarketFactors``, generated
+    for every year in the range.
+
+    Args:
+        start: First date
+        end: Last date
+
+    Returns:
+        DataFrame indexed by day with the columns of ``CALENDAR_COLUMNS``
+    """
+    from src.market_factors import MarketFactors
+
+    dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq='D')
+    month = dates.month.to_numpy()
+    day_of_week = dates.dayofweek.to_numpy()
+
+    table = pd.DataFrame({
+        'year': dates.year,
+        'month': month,
+        'day': dates.day,
+        'day_of_week': day_of_week,
+        'day_of_year': dates.dayofyear,
+        'week_of_year': dates.isocalendar().week.to_numpy(),
+        'quarter': dates.quarter,
+        'month_sin': np.sin(2 * np.pi * month / 12),
+        'month_cos': np.cos(2 * np.pi * month / 12),
+        'day_of_week_sin': np.sin(2 * np.pi * day_of_week / 7),
+        'day_of_week_cos': np.cos(2 * np.pi * day_of_week / 7),
+        'is_weekend': day_of_week >= 5,
+        'is_month_start': dates.is_month_start,
+        'is_month_end': dates.is_month_end,
+        'is_winter': np.isin(month, [12, 1, 2]),
+        'is_summer': np.isin(month, [6, 7, 8]),
+        'is_spring': np.isin(month, [3, 4, 5]),
+        'is_fall': np.isin(month, [9, 10, 11]),
+    }, index=dates)
+
+    # Holiday, event and school calendars of every year the table covers
+    market = MarketFactors()
+    holidays, events, school_holidays, exam_weeks = {}, {}, [], []
+    for year in range(dates.year.min(), dates.year.max() + 1) if len(dates) else []:
+        holidays.update(market.public_holidays(year))
+        events.update(market.events(year))
+        school = market.school_calendar(year)
+        school_holidays += [p for kind, periods in school.items() if kind != 'exam_weeks' for p in periods]
+        exam_weeks += school['exam_weeks']
+
+    date_str = dates.strftime('%Y-%m-%d')
+    tet_days = [d for d, name in holidays.items() if 'Lunar New Year' in name]
+    table['is_public_holiday'] = date_str.isin(list(holidays))
+    table['is_lunar_new_year'] = date_str.isin(tet_days)
+    table['is_major_event'] = date_str.isin(list(events))
+
+    def in_periods(periods):
+        mask = np.zeros(len(dates), dtype=bool)
+        for period_start, period_end in periods:
+            mask |= (date_str >= period_start) & (date_str <= period_end)
+        return mask
+
+    table['is_school_holiday'] = in_periods(school_holidays)
+    table['is_exam_week'] = in_periods(exam_weeks)
+
+    table.index.name = 'date'
+    return table.astype(CALENDAR_COLUMNS)
+
+
+def get_calendar_table(start, end) -> pd.DataFrame:
+    """
+    Process-wide calendar table covering at least ``start``..``end``.
+
+    The table is built once and only rebuilt (to the union of the old and new
+    ranges plus a horizon margin) when a request falls outside it.
+    """
+    global _table
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+
+    table = _table
+    if table is not None and table.index[0] <= start and end <= table.index[-1]:
+        return table
+
+    with _lock:
+        table = _table
+        if table is None or start < table.index[0] or end > table.index[-1]:
+            if table is not None:
+                start = min(start, table.index[0])
+                end = max(end, table.index[-1])
+            _table = build_calendar_table(start, end + pd.Timedelta(days=HORIZON_MARGIN_DAYS))
+        return _table
+
+
+def calendar_lookup(dates) -> pd.DataFrame:
+    """
+    Calendar rows for a sequence of dates, in the same order.
+
+    Args:
+        dates: Datetime-like sequence (may contain repeats and times of day)
+
+    Returns:
+        DataFrame with one row per input date and the ``CALENDAR_COLUMNS``
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    if len(dates) == 0:
+        return build_calendar_table('2000-01-01', '1999-12-31')
+
+    table = get_calendar_table(dates.min(), dates.max())
+    positions = (dates - table.index[0]).days.to_numpy()
+    return table.iloc[positions].reset_index(drop=True)
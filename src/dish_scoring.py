@@ -0,0 +1,151 @@
+"""
+Dish Scoring Module
+Vectorized recommendation scores for every dish at once
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Sequence
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Weights of the score components in the recommendation score
+DEFAULT_WEIGHTS = {
+    'material_availability': 0.3,
+    'expiry_urgency': 0.4,
+    'seasonal_preference': 0.2,
+    'cost_efficiency': 0.1
+}
+
+
+class DishScorer:
+    """
+    Score every dish from its recipe lines in one pass.
+
+    Recipe lines are joined to the material table by position, and every
+    per-dish quantity is a grouped reduction over the lines (``bincount``
+    for sums, ``minimum.reduceat`` over the dish-sorted lines for the
+    servings), so scoring costs O(lines) array work whatever the number of
+    dishes. Per dish:
+
+    - max servings: the fewest whole servings any line's stock allows;
+    - cost per serving: sum of quantity x unit cost;
+    - material availability: mean over lines of min(stock / (minimum stock + 1), 2);
+    - expiry urgency: sum over lines using a near-expiry material of
+      max(0, (expiry_days - days until expiry) / 2), cut by
+      ``low_ratio_penalty`` when near-expiry materials are under
+      ``min_expiry_ratio`` percent of the cost;
+    - seasonal preference: the season's multiplier for preferred dishes, else 1;
+    - cost efficiency: max(0, (cost_scale - cost per serving) / cost_scale).
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, expiry_days: int = 5,
+                 min_expiry_ratio: float = 30.0, low_ratio_penalty: float = 0.2, cost_scale: float = 10.0):
+        """
+        Initialize Dish Scorer.
+
+        Args:
+            weights: Weight of each score component (missing components keep
+                     ``DEFAULT_WEIGHTS``)
+            expiry_days: Horizon of the expiry urgency (days)
+            min_expiry_ratio: Share (%) of the cost from near-expiry materials
+                              below which the urgency is cut
+            low_ratio_penalty: Factor applied to the urgency below that share
+            cost_scale: Cost per serving scoring zero cost efficiency
+        """
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown score components: {sorted(unknown)}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.expiry_days = expiry_days
+        self.min_expiry_ratio = min_expiry_ratio
+        self.low_ratio_penalty = low_ratio_penalty
+        self.cost_scale = cost_scale
+
+    def score(self, recipes: pd.DataFrame, materials: pd.DataFrame, days_until_expiry: pd.Series,
+              preferred_dishes: Sequence[str] = (), preference_multiplier: float = 1.0) -> pd.DataFrame:
+        """
+        Score the dishes that can be made from stock.
+
+        Args:
+            recipes: Recipe lines with ['dish_name', 'material_name', 'quantity_needed']
+            materials: Material table indexed by unique 'material_name' with
+                       ['current_stock', 'cost_per_unit', 'minimum_stock_level']
+            days_until_expiry: Days until expiry of the near-expiry materials,
+                               indexed by material name
+            preferred_dishes: Dishes favoured by the season
+            preference_multiplier: Seasonal preference score of those dishes
+
+        Returns:
+            One row per dish with every material in stock and at least one
+            serving, in recipe order: 'dish_name', 'max_servings_possible',
+            'cost_per_serving', 'expiry_material_ratio', 'recommendation_score',
+            the component scores, 'uses_expiring_materials' and
+            'expiring_materials_used'
+        """
+        dish_codes, dishes = pd.factorize(recipes['dish_name'])
+        n_dishes = len(dishes)
+        rows = materials.index.get_indexer(recipes['material_name'])
+        known = rows >= 0
+
+        def line_values(column: str) -> np.ndarray:
+            return np.where(known, materials[column].to_numpy(dtype=float)[rows], np.nan)
+
+        def per_dish(values: np.ndarray) -> np.ndarray:
+            return np.bincount(dish_codes, weights=values, minlength=n_dishes)
+
+        quantity = recipes['quantity_needed'].to_numpy(dtype=float)
+        stock = line_values('current_stock')
+        cost = quantity * line_values('cost_per_unit')
+
+        # Whole servings each line allows; the dish is limited by its scarcest line
+        with np.errstate(divide='ignore', invalid='ignore'):
+            servings = np.trunc(stock / quantity)
+        order = np.argsort(dish_codes, kind='stable')
+        starts = np.searchsorted(dish_codes[order], np.arange(n_dishes))
+        max_servings = np.minimum.reduceat(np.where(known, servings, -np.inf)[order], starts) \
+            if n_dishes else np.array([])
+
+        availability = np.minimum(stock / (line_values('minimum_stock_level') + 1), 2.0)
+        line_days = days_until_expiry.reindex(recipes['material_name']).to_numpy(dtype=float)
+        expiring = ~np.isnan(line_days)
+        urgency = per_dish(np.where(expiring, np.maximum(0, (self.expiry_days - line_days) * 0.5), 0))
+
+        total_cost = per_dish(cost)
+        expiry_cost = per_dish(np.where(expiring, cost, 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expiry_ratio = np.where(total_cost > 0, expiry_cost / total_cost * 100, 0)
+        low_ratio = (expiry_ratio > 0) & (expiry_ratio < self.min_expiry_ratio)
+        urgency = np.where(low_ratio, urgency * self.low_ratio_penalty, urgency)
+
+        components = {
+            'material_availability': per_dish(availability) / np.bincount(dish_codes, minlength=n_dishes),
+            'expiry_urgency': urgency,
+            'seasonal_preference': np.where(dishes.isin(list(preferred_dishes)), preference_multiplier, 1.0),
+            'cost_efficiency': np.maximum(0, (self.cost_scale - total_cost) / self.cost_scale)
+        }
+        overall = sum(components[name] * weight for name, weight in self.weights.items())
+
+        # Near-expiry materials of every dish, in recipe order
+        used = pd.DataFrame({'dish': dish_codes[expiring], 'material': recipes['material_name'].to_numpy()[expiring]})
+        used = used.drop_duplicates().sort_values('dish', kind='stable')
+        boundaries = np.searchsorted(used['dish'].to_numpy(), np.arange(n_dishes + 1))
+        used_names = used['material'].to_numpy()
+
+        feasible = np.bincount(dish_codes[~known], minlength=n_dishes) == 0
+        feasible &= (max_servings > 0) & np.isfinite(max_servings)
+        result = pd.DataFrame({
+            'dish_name': np.asarray(dishes, dtype=object),
+            'max_servings_possible': np.where(feasible, max_servings, 0).astype(int),
+            'cost_per_serving': np.round(total_cost, 2),
+            'expiry_material_ratio': np.round(expiry_ratio, 2),
+            'recommendation_score': np.round(overall, 2),
+            **{f'{name}_score': np.round(values, 2) for name, values in components.items()},
+            'uses_expiring_materials': np.diff(boundaries) > 0
+        })
+        result = result[feasible].reset_index(drop=True)
+        result['expiring_materials_used'] = [used_names[boundaries[dish]:boundaries[dish + 1]].tolist()
+                                             for dish in np.flatnonzero(feasible)]
+        return result
@@ -0,0 +1,122 @@
+"""
+Expiry Index Module
+Sorted expiry and material-to-dish indexes for near-expiry lookups
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Tuple
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ExpiryIndex:
+    """
+    Inventory rows sorted by expiry date.
+
+    The expiry dates are parsed once and kept as sorted int64 nanoseconds,
+    so "which rows expire on or before T" is a binary search plus the
+    matching slice instead of a parse and a scan of the whole inventory.
+    Rows without an expiry date never match. Row positions also map
+    material names back to their inventory row.
+    """
+
+    def __init__(self, inventory: pd.DataFrame):
+        """
+        Initialize Expiry Index.
+
+        Args:
+            inventory: Inventory with ['material_name', 'expiry_date']; its
+                       'expiry_date' column must already be datetime64
+        """
+        self.frame_id = id(inventory)
+        self.raw_expiry = self._raw_expiry(inventory).copy()
+        expiry = inventory['expiry_date'].to_numpy(dtype='datetime64[ns]')
+        dated = np.flatnonzero(~np.isnat(expiry))
+        order = np.argsort(expiry[dated], kind='stable')
+        self.positions = dated[order]
+        self.expiry = expiry[self.positions].astype(np.int64)
+        # First row of every material (codes follow the order of first appearance)
+        codes, materials = pd.factorize(inventory['material_name'])
+        codes, first = np.unique(codes, return_index=True)
+        self.materials = pd.Index(materials)
+        self.material_rows = first[codes >= 0]
+
+    def is_current(self, inventory: pd.DataFrame) -> bool:
+        """
+        Cheap guard on the indexed inventory: the same frame, of the same
+        length, with the same raw expiry values. Replacing the frame or
+        editing expiry dates in place fails it; renaming materials in place
+        does not (call ``refresh_indexes`` after that).
+        """
+        return (self.frame_id == id(inventory) and len(self.raw_expiry) == len(inventory)
+                and np.array_equal(self.raw_expiry, self._raw_expiry(inventory)))
+
+    @staticmethod
+    def _raw_expiry(inventory: pd.DataFrame) -> np.ndarray:
+        """Expiry column as int64 in its native datetime unit (no conversion copy)."""
+        return inventory['expiry_date'].to_numpy().view(np.int64)
+
+    def expiring(self, before) -> np.ndarray:
+        """Positions of the rows expiring on or before ``before``, in inventory order."""
+        end = np.searchsorted(self.expiry, pd.Timestamp(before).value, side='right')
+        return np.sort(self.positions[:end])
+
+    def rows(self, material_names) -> np.ndarray:
+        """Inventory row of every material name (-1 if unknown)."""
+        found = self.materials.get_indexer(material_names)
+        return np.where(found >= 0, self.material_rows[found], -1)
+
+
+class MaterialDishIndex:
+    """
+    Inverted index from materials to the recipe lines that use them.
+
+    Recipe lines are grouped by material once (stable, so each material's
+    lines keep their recipe order); looking up k materials returns the
+    matching line positions without scanning or merging the recipes. Index
+    the flattened menu lines of the bill of materials
+    (``BillOfMaterials.menu_lines``) so dishes reaching a material through
+    prep items are found too, without the prep items themselves.
+    """
+
+    def __init__(self, recipes: pd.DataFrame):
+        """
+        Initialize Material Dish Index.
+
+        Args:
+            recipes: Recipe lines with ['dish_name', 'material_name', 'quantity_needed']
+        """
+        self.recipes = recipes
+        codes, materials = pd.factorize(recipes['material_name'])
+        self.materials = pd.Index(materials)
+        self.lines = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes[codes >= 0], minlength=len(materials))
+        self.starts = np.cumsum(counts) - counts
+        self.counts = counts
+
+    def lookup(self, material_names) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recipe lines of every material, like a left join on 'material_name'.
+
+        Args:
+            material_names: Material names to look up
+
+        Returns:
+            (left, lines): for every match the position in ``material_names``
+            and the recipe line position, in input order then recipe order;
+            materials without recipes appear once with line -1
+        """
+        found = self.materials.get_indexer(material_names)
+        counts = np.where(found >= 0, self.counts[found], 0)
+        repeats = np.maximum(counts, 1)
+        left = np.repeat(np.arange(len(found)), repeats)
+        offsets = np.cumsum(repeats) - repeats
+        within = np.arange(repeats.sum()) - np.repeat(offsets, repeats)
+        starts = np.where(found >= 0, self.starts[found], 0)
+        lines = np.where(np.repeat(counts, repeats) > 0,
+                         self.lines[np.minimum(np.repeat(starts, repeats) + within, len(self.lines) - 1)]
+                         if len(self.lines) else -1, -1)
+        return left, lines
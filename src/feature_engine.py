@@ -0,0 +1,270 @@
+"""
+Feature Engine Module
+Lag, rolling-window and EWMA demand features for the tree-based forecasters
+"""
+
+import copy
+import hashlib
+import warnings
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class FeatureEngine:
+    """
+    Per-dish autoregressive features computed on a date x dish demand panel.
+
+    Every feature is a column-wise operation on the panel (one column per
+    dish), which is the vectorized equivalent of ``groupby('dish_name').shift``
+    over the whole orders frame:
+
+    - ``lag_<k>``: demand k days earlier
+    - ``rolling_mean_<w>`` / ``rolling_std_<w>``: window of w days
+    - ``ewm_<s>``: exponentially weighted mean with span s
+
+    Rolling and EWMA features are computed on the series shifted by the
+    smallest lag, so no feature looks closer than ``step`` days into the past.
+    That makes ``step`` consecutive days predictable at once in a recursive
+    multi-step forecast.
+
+    Built panels and feature matrices are cached by a fingerprint of the
+    orders they were computed from.
+    """
+
+    def __init__(self, lags: Sequence[int] = (1, 7, 14, 28),
+                 rolling_windows: Sequence[int] = (7, 28),
+                 ewm_spans: Sequence[int] = (7, 28),
+                 cache_size: int = 8):
+        """
+        Initialize Feature Engine.
+
+        Args:
+            lags: Lags in days (must be >= 1)
+            rolling_windows: Rolling mean/std window lengths in days
+            ewm_spans: EWMA spans in days
+            cache_size: Number of order datasets kept in the cache
+        """
+        if not lags or min(lags) < 1:
+            raise ValueError("At least one lag >= 1 is required")
+
+        self.lags = sorted(lags)
+        self.rolling_windows = list(rolling_windows)
+        self.ewm_spans = list(ewm_spans)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    @property
+    def step(self) -> int:
+        """Number of days that can be forecast before predictions feed back as inputs."""
+        return self.lags[0]
+
+    @property
+    def feature_names(self) -> List[str]:
+        names = [f'lag_{lag}' for lag in self.lags]
+        for window in self.rolling_windows:
+            names += [f'rolling_mean_{window}', f'rolling_std_{window}']
+        names += [f'ewm_{span}' for span in self.ewm_spans]
+        return names
+
+    @property
+    def history_needed(self) -> int:
+        """Days of history needed to compute features for the next day."""
+        longest = max([self.lags[-1]] + [self.step + w for w in self.rolling_windows])
+        # EWMA weights beyond 5 spans are below 0.1% of the total
+        return longest + 5 * max(self.ewm_spans, default=0)
+
+    # ==================== PANEL ====================
+
+    @staticmethod
+    def fingerprint(orders: pd.DataFrame) -> str:
+        """Hash of the (date, dish_name, quantity_sold) rows of an orders frame."""
+        values = orders[['date', 'dish_name', 'quantity_sold']]
+        row_hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        return hashlib.sha1(np.sort(row_hashes).tobytes()).hexdigest()
+
+    @staticmethod
+    def build_panel(orders: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pivot orders into a daily date x dish panel.
+
+        Days without sales after a dish's first sale are 0; days before it are
+        NaN so they are neither trained on nor used as inputs.
+        """
+        orders = orders.assign(date=pd.to_datetime(orders['date']))
+        dishes = list(orders['dish_name'].unique())
+        panel = orders.pivot_table(index='date', columns='dish_name', values='quantity_sold',
+                                   aggfunc='sum', sort=True)
+        dates = pd.date_range(panel.index.min(), panel.index.max(), freq='D')
+        panel = panel.reindex(index=dates, columns=dishes).astype(float)
+
+        launched = panel.notna().cummax()
+        return panel.where(~(launched & panel.isna()), 0.0)
+
+    # ==================== FEATURES ====================
+
+    def compute(self, panel: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Compute every feature for every (date, dish) cell of a panel.
+
+        Returns:
+            Mapping feature name -> date x dish DataFrame
+        """
+        features = {f'lag_{lag}': panel.shift(lag) for lag in self.lags}
+
+        shifted = panel.shift(self.step)
+        for window in self.rolling_windows:
+            rolling = shifted.rolling(window, min_periods=1)
+            features[f'rolling_mean_{window}'] = rolling.mean()
+            features[f'rolling_std_{window}'] = rolling.std().fillna(0.0)
+        for span in self.ewm_spans:
+            features[f'ewm_{span}'] = shifted.ewm(span=span, adjust=False).mean()
+
+        return features
+
+    def training_frame(self, orders: pd.DataFrame) -> pd.DataFrame:
+        """
+        Long feature frame for all dishes, cached by orders fingerprint.
+
+        Rows are (dish_name, date) pairs from each dish's first sale onward,
+        excluding the warm-up days where the longest lag is still undefined.
+
+        Returns:
+            DataFrame with ['dish_name', 'date', 'quantity_sold'] + feature_names
+        """
+        key = self.fingerprint(orders)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        panel = self.build_panel(orders)
+        features = self.compute(panel)
+
+        # Dish-major long layout: all dates of the first dish, then the next...
+        n_dates, n_dishes = panel.shape
+        frame = pd.DataFrame({
+            'dish_name': np.repeat(panel.columns.to_numpy(), n_dates),
+            'date': np.tile(panel.index.to_numpy(), n_dishes),
+            'quantity_sold': panel.to_numpy().T.ravel()
+        })
+        for name in self.feature_names:
+            frame[name] = features[name].to_numpy().T.ravel()
+        keep = frame['quantity_sold'].notna() & frame[f'lag_{self.lags[-1]}'].notna()
+        frame = frame[keep].reset_index(drop=True)
+
+        self._store(key, frame)
+        return frame
+    
+    def fold_copy(self, orders: pd.DataFrame, cutoff) -> Tuple['FeatureEngine', pd.DataFrame]:
+        """
+        Engine for a backtest fold trained on ``orders`` up to ``cutoff``.
+        
+        Features only look backward, so the fold's training frame is a slice
+        of the (cached) full-history frame instead of a recomputation. The
+        returned engine's cache holds just that slice, which keeps it cheap to
+        send to worker processes.
+        
+        Args:
+            orders: Full order history
+            cutoff: Last date included in the fold's training data
+            
+        Returns:
+            Tuple of (engine copy, fold orders)
+        """
+        orders = orders.assign(date=pd.to_datetime(orders['date']))
+        fold_orders = orders[orders['date'] <= pd.Timestamp(cutoff)]
+        full = self.training_frame(orders)
+        
+        # The fold panel ends at its last order date, not at the cutoff
+        frame = full[full['date'] <= fold_orders['date'].max()].reset_index(drop=True)
+        
+        engine = copy.copy(self)
+        engine._cache = OrderedDict()
+        engine._store(self.fingerprint(fold_orders), frame)
+        return engine, fold_orders
+    
+    def _store(self, key: str, frame: pd.DataFrame) -> None:
+        self._cache[key] = frame
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def dish_frame(self, dish_data: pd.DataFrame, orders: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Feature rows for one dish.
+
+        If the full ``orders`` frame is given, the (cached) all-dish matrix is
+        sliced instead of computing features for this dish alone.
+        """
+        dish_name = dish_data['dish_name'].iloc[0]
+        frame = self.training_frame(orders if orders is not None else dish_data)
+        return frame[frame['dish_name'] == dish_name].reset_index(drop=True)
+
+    def features_at(self, panel: pd.DataFrame, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Feature values at the given row positions of a panel.
+
+        Only the tail of the panel that can influence those positions is used.
+
+        Returns:
+            Mapping feature name -> (n_dishes, len(positions)) array
+        """
+        start = max(0, int(np.min(positions)) - self.history_needed)
+        window = panel.iloc[start:int(np.max(positions)) + 1]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            features = self.compute(window)
+        local = np.asarray(positions) - start
+        return {name: features[name].to_numpy()[local].T for name in self.feature_names}
+
+    # ==================== RECURSIVE FORECAST ====================
+
+    def recursive_forecast(self, panel: pd.DataFrame, target_dates: Sequence,
+                           predict_block: Callable[[pd.DatetimeIndex, Dict[str, np.ndarray]], np.ndarray]
+                           ) -> np.ndarray:
+        """
+        Multi-step forecast that feeds predictions back in as demand history.
+
+        Days after the end of ``panel`` are predicted in blocks of ``step``
+        days; each block is one ``predict_block`` call covering all dishes.
+
+        Args:
+            panel: Historical date x dish panel (from ``build_panel``)
+            target_dates: Dates to return predictions for
+            predict_block: Callable(dates, features) -> (n_dishes, len(dates))
+                           array, where features maps name -> (n_dishes, len(dates))
+
+        Returns:
+            (n_dishes, len(target_dates)) array of predictions
+        """
+        n_dishes = panel.shape[1]
+        first_date = panel.index[0]
+        targets = np.array([(pd.Timestamp(d) - first_date).days for d in target_dates], dtype=int)
+        if len(targets) == 0:
+            return np.zeros((n_dishes, 0))
+
+        n_history = len(panel)
+        end_pos = max(int(targets.max()), n_history - 1)
+        all_dates = pd.date_range(first_date, periods=end_pos + 1, freq='D')
+        extended = panel.reindex(all_dates)
+
+        # In-sample targets only need history; later days go in step-sized blocks
+        blocks = []
+        in_sample = np.unique(targets[(targets >= 0) & (targets < n_history)])
+        if len(in_sample):
+            blocks.append(in_sample)
+        for start in range(n_history, end_pos + 1, self.step):
+            blocks.append(np.arange(start, min(start + self.step, end_pos + 1)))
+
+        predicted = {}
+        for positions in blocks:
+            features = self.features_at(extended, positions)
+            values = np.maximum(0, np.asarray(predict_block(all_dates[positions], features), dtype=float))
+            for j, pos in enumerate(positions):
+                predicted[pos] = values[:, j]
+            out_of_sample = positions >= n_history
+            if out_of_sample.any():
+                extended.iloc[positions[out_of_sample]] = values[:, out_of_sample].T
+
+        return np.column_stack([predicted.get(pos, np.zeros(n_dishes)) for pos in targets])
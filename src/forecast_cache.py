@@ -0,0 +1,128 @@
+"""
+Forecast Cache Module
+LRU cache of finished demand forecasts, optionally persisted to disk
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ForecastCache:
+    """
+    Keep the most recently used forecasts in memory (and on disk).
+
+    Keys are fingerprints of everything a forecast depends on (see
+    ``make_key``), so an entry never needs explicit invalidation: changed
+    inputs simply produce a different key and stale entries age out of the
+    LRU. On disk, one pickle per key is kept in ``cache_dir``, also capped at
+    ``max_entries`` (oldest files are removed first).
+    """
+
+    def __init__(self, max_entries: int = 32, cache_dir: Optional[str] = None):
+        """
+        Initialize Forecast Cache.
+
+        Args:
+            max_entries: Number of forecasts kept (in memory and on disk)
+            cache_dir: Directory for persisted forecasts (None = memory only)
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """
+        Fingerprint the inputs of a forecast.
+
+        Args:
+            **parts: JSON-serialisable values (non-serialisable ones use str())
+
+        Returns:
+            Hex digest
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Cached forecast for a key (a copy), or None."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key].copy()
+
+        frame = self._read(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self._remember(key, frame)
+        self.hits += 1
+        return frame.copy()
+
+    def put(self, key: str, forecast: pd.DataFrame) -> None:
+        """Store a forecast (a copy) under a key."""
+        frame = forecast.copy()
+        self._remember(key, frame)
+        if self.cache_dir:
+            self._write(key, frame)
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop the in-memory entries (and the persisted ones if ``disk``)."""
+        self._entries.clear()
+        if disk and self.cache_dir:
+            for name in self._files():
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, frame: pd.DataFrame) -> None:
+        self._entries[key] = frame
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ==================== DISK ====================
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _files(self):
+        return [name for name in os.listdir(self.cache_dir) if name.endswith('.pkl')]
+
+    def _read(self, key: str) -> Optional[pd.DataFrame]:
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                frame = pickle.load(f)
+            os.utime(self._path(key))
+            return frame
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Ignoring unreadable cached forecast {key}: {e}")
+            return None
+
+    def _write(self, key: str, frame: pd.DataFrame) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        # Least recently used files (by modification time) go first
+        files = sorted(self._files(), key=lambda name: os.path.getmtime(os.path.join(self.cache_dir, name)))
+        for name in files[:max(0, len(files) - self.max_entries)]:
+            os.remove(os.path.join(self.cache_dir, name))
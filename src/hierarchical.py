@@ -0,0 +1,373 @@
+"""
+Hierarchical Forecasting Module
+Coherent forecasts across dish, category, cuisine and total demand
+"""
+
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from src.ml_forecaster import MLForecaster
+from src.feature_engine import FeatureEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOTAL = 'total'
+DISH = 'dish'
+METHODS = ['bottom_up', 'top_down', 'mint']
+MINT_WEIGHTS = ['variance', 'structural']
+
+
+class Hierarchy:
+    """
+    Aggregation structure of the dish series.
+
+    Every level (e.g. 'cuisine', 'category') groups the dishes by one column
+    of the orders; levels do not have to nest, so cuisine and category may
+    cross. Series are ordered total, then each level's groups, then the
+    dishes. ``aggregation`` is the sparse (n_aggregates x n_dishes) 0/1 matrix
+    mapping dish values to the aggregate series; stacking it on an identity
+    gives the summing matrix ``S``.
+    """
+
+    def __init__(self, dish_groups: pd.DataFrame, levels: Sequence[str]):
+        """
+        Initialize Hierarchy.
+
+        Args:
+            dish_groups: One row per dish, indexed by dish name, with one
+                         column per level
+            levels: Level columns, from coarsest to finest
+        """
+        self.levels = list(levels)
+        self.dishes = list(dish_groups.index)
+
+        labels = [(TOTAL, 'Total')]
+        rows, cols = list(np.zeros(len(self.dishes), dtype=int)), list(range(len(self.dishes)))
+        for level in self.levels:
+            groups = dish_groups[level]
+            names = list(pd.unique(groups))
+            offset = len(labels)
+            labels.extend((level, name) for name in names)
+            codes = pd.Categorical(groups, categories=names).codes
+            rows.extend(offset + codes)
+            cols.extend(range(len(self.dishes)))
+
+        self.aggregates = labels
+        self.aggregation = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(labels), len(self.dishes))
+        )
+
+    @classmethod
+    def from_orders(cls, orders: pd.DataFrame, levels: Sequence[str]) -> 'Hierarchy':
+        """
+        Build the hierarchy from the level columns of the orders.
+
+        A dish belongs to the group of its latest order; missing values go to
+        an 'Unknown' group.
+        """
+        missing = [level for level in levels if level not in orders.columns]
+        if missing:
+            raise ValueError(f"Orders have no {missing} column(s) to aggregate by")
+
+        dish_groups = (orders.sort_values('date', kind='stable')
+                       .groupby('dish_name', sort=False)[list(levels)].last()
+                       .reindex(orders['dish_name'].unique())
+                       .fillna('Unknown'))
+        return cls(dish_groups, levels)
+
+    @property
+    def series(self) -> List[tuple]:
+        """(level, name) of every series, aggregates first."""
+        return self.aggregates + [(DISH, dish) for dish in self.dishes]
+
+    @property
+    def summing_matrix(self) -> sparse.csr_matrix:
+        """Sparse S with ``all_series = S @ dishes``."""
+        return sparse.vstack([self.aggregation, sparse.identity(len(self.dishes), format='csr')],
+                             format='csr')
+
+    def keys(self, series: Optional[Sequence[tuple]] = None) -> List[str]:
+        """Unique names of series, used as ``dish_name`` when forecasting them."""
+        series = self.series if series is None else series
+        return [name if level == DISH else f"{level}:{name}" for level, name in series]
+
+    def aggregate(self, panel: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregate a date x dish panel into a date x aggregate panel.
+
+        Missing dish values count as 0; an aggregate is missing only on dates
+        where none of its dishes had launched.
+        """
+        panel = panel.reindex(columns=self.dishes)
+        values = self.aggregation @ panel.fillna(0).to_numpy().T
+        launched = self.aggregation @ panel.notna().to_numpy().T
+        values = np.where(launched > 0, values, np.nan)
+        return pd.DataFrame(values.T, index=panel.index, columns=self.keys(self.aggregates))
+
+
+def reconcile(base_aggregates: np.ndarray, base_dishes: np.ndarray, hierarchy: Hierarchy,
+              method: str = 'mint', weights: Optional[np.ndarray] = None,
+              proportions: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Reconcile base forecasts into coherent dish forecasts.
+
+    - bottom_up: the dish forecasts as they are
+    - top_down: the total forecast split by historical ``proportions``
+    - mint: minimum-trace projection with diagonal covariance ``weights``.
+      It is computed as ``b + W_b A' (W_a + A W_b A')^-1 (a - A b)``, so the
+      only system solved is (n_aggregates x n_aggregates) and sparse; the
+      cost grows linearly with the number of dishes.
+
+    Every aggregate follows from the result as ``hierarchy.aggregation @ dishes``.
+
+    Args:
+        base_aggregates: (n_aggregates x horizon) forecasts (total row only for top_down)
+        base_dishes: (n_dishes x horizon) forecasts (unused for top_down)
+        hierarchy: Aggregation structure
+        method: One of ``METHODS``
+        weights: Forecast error variance of every series (aggregates first), for mint
+        proportions: Share of every dish in the total, for top_down
+
+    Returns:
+        (n_dishes x horizon) reconciled dish forecasts
+    """
+    A = hierarchy.aggregation
+    # A series without a base forecast contributes no information
+    base_dishes = np.nan_to_num(np.asarray(base_dishes, dtype=float))
+
+    if method == 'bottom_up':
+        return base_dishes
+    if method == 'top_down':
+        return np.outer(proportions, np.nan_to_num(np.asarray(base_aggregates, dtype=float)[0]))
+    if method != 'mint':
+        raise ValueError(f"Method must be one of {METHODS}")
+
+    base_aggregates = np.asarray(base_aggregates, dtype=float)
+    base_aggregates = np.where(np.isnan(base_aggregates), A @ base_dishes, base_aggregates)
+    n_aggregates = A.shape[0]
+    w_aggregates = sparse.diags(weights[:n_aggregates])
+    w_dishes = sparse.diags(weights[n_aggregates:])
+
+    incoherence = base_aggregates - A @ base_dishes
+    system = (w_aggregates + A @ w_dishes @ A.T).tocsc()
+    correction = splu(system).solve(np.asarray(incoherence, dtype=float))
+    return base_dishes + w_dishes @ (A.T @ correction)
+
+
+class HierarchicalForecaster:
+    """
+    Forecast the aggregates of the dish hierarchy and reconcile them with the
+    dish forecasts, so dish, category, cuisine and total forecasts add up.
+
+    Only the series a method needs are forecast: bottom_up fits dish models
+    only, top_down a single model of the total, and mint every series. The
+    dishes can use a cheaper algorithm than the aggregates
+    (``bottom_algorithm``), since mint leans on the smoother aggregates to
+    correct the noisy long tail.
+
+    Quantile columns are reconciled with the same linear map as the point
+    forecast, which treats the series as comonotonic; aggregate quantiles
+    are therefore on the conservative (wide) side.
+    """
+
+    LEVELS = ('cuisine', 'category')
+
+    def __init__(self, algorithm: str = 'sarima', method: str = 'mint',
+                 levels: Sequence[str] = LEVELS, bottom_algorithm: Optional[str] = None,
+                 model_params: Optional[Dict] = None, mint_weights: str = 'variance',
+                 proportion_window: int = 28, residual_window: int = 182,
+                 n_jobs: int = 1, backend: str = 'process', as_of=None):
+        """
+        Initialize Hierarchical Forecaster.
+
+        Args:
+            algorithm: ``MLForecaster`` algorithm for the aggregate series
+            method: Reconciliation method, one of ``METHODS``
+            levels: Order columns aggregated by (e.g. 'cuisine', 'category')
+            bottom_algorithm: Algorithm for the dish series (default: ``algorithm``)
+            model_params: Hyperparameters passed to both forecasters
+            mint_weights: 'variance' (weekly seasonal-naive error variance of
+                          each series) or 'structural' (number of dishes in it)
+            proportion_window: Days of history behind the top_down proportions
+            residual_window: Days of history behind the mint variances
+            n_jobs: Number of series trained in parallel (-1 = all cores)
+            backend: Parallel backend for training, 'process' or 'thread'
+            as_of: Clock of the forecaster: ``fit`` ignores orders after it and
+                   ``predict`` forecasts from it by default (None = now)
+        """
+        if method not in METHODS:
+            raise ValueError(f"Method must be one of {METHODS}")
+        if mint_weights not in MINT_WEIGHTS:
+            raise ValueError(f"MinT weights must be one of {MINT_WEIGHTS}")
+
+        self.algorithm = algorithm
+        self.bottom_algorithm = bottom_algorithm or algorithm
+        self.method = method
+        self.levels = list(levels)
+        self.model_params = model_params
+        self.mint_weights = mint_weights
+        self.proportion_window = proportion_window
+        self.residual_window = residual_window
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.as_of = pd.Timestamp(as_of) if as_of is not None else None
+
+        self.hierarchy = None
+        self.aggregate_forecaster = None
+        self.dish_forecaster = None
+        self.weights = None
+        self.proportions = None
+        self.is_fitted = False
+
+    def _forecaster(self, algorithm: str) -> MLForecaster:
+        return MLForecaster(algorithm=algorithm, n_jobs=self.n_jobs, backend=self.backend,
+                            model_params=self.model_params)
+
+    def fit(self, orders_data: pd.DataFrame) -> None:
+        """
+        Build the hierarchy and train the base forecasters it needs.
+
+        Args:
+            orders_data: Historical orders with ['date', 'dish_name',
+                         'quantity_sold'] and the ``levels`` columns
+        """
+        orders = orders_data.assign(date=pd.to_datetime(orders_data['date']))
+        if self.as_of is not None:
+            orders = orders[orders['date'] <= self.as_of]
+        self.hierarchy = Hierarchy.from_orders(orders, self.levels)
+        dish_panel = FeatureEngine.build_panel(orders)
+        aggregate_panel = self.hierarchy.aggregate(dish_panel)
+
+        logger.info(f"Hierarchy: {len(self.hierarchy.aggregates)} aggregates over "
+                    f"{len(self.hierarchy.dishes)} dishes, method={self.method}")
+
+        if self.method in ['top_down', 'mint']:
+            series = aggregate_panel if self.method == 'mint' else aggregate_panel.iloc[:, :1]
+            self.aggregate_forecaster = self._forecaster(self.algorithm)
+            self.aggregate_forecaster.fit(_panel_orders(series))
+
+        if self.method in ['bottom_up', 'mint']:
+            self.dish_forecaster = self._forecaster(self.bottom_algorithm)
+            # Same zero-filled daily basis as the aggregates, so base forecasts are comparable
+            self.dish_forecaster.fit(_panel_orders(dish_panel))
+
+        if self.method == 'top_down':
+            recent = dish_panel.iloc[-self.proportion_window:].fillna(0).mean()
+            total = recent.sum()
+            self.proportions = (recent / total).to_numpy() if total > 0 else \
+                np.full(len(recent), 1.0 / len(recent))
+
+        if self.method == 'mint':
+            self.weights = self._mint_weights(pd.concat([aggregate_panel, dish_panel], axis=1))
+
+        self.is_fitted = True
+
+    def _mint_weights(self, panel: pd.DataFrame) -> np.ndarray:
+        """Diagonal error covariance of every series (aggregates first)."""
+        if self.mint_weights == 'structural':
+            return np.concatenate([np.asarray(self.hierarchy.aggregation.sum(axis=1)).ravel(),
+                                   np.ones(len(self.hierarchy.dishes))])
+
+        residuals = (panel - panel.shift(7)).iloc[-self.residual_window:]
+        variance = residuals.var().fillna(0).to_numpy()
+        # Series with no recent error still need a positive weight
+        floor = max(1e-6, 1e-3 * np.nanmean(variance)) if np.any(variance > 0) else 1.0
+        return np.maximum(variance, floor)
+
+    def predict(self, days_ahead: int = 7, start_date=None) -> pd.DataFrame:
+        """
+        Coherent forecasts of every series of the hierarchy.
+
+        Args:
+            days_ahead: Number of days to forecast
+            start_date: Forecast origin; predictions cover the N days after it
+                        (default: ``as_of``, or today)
+
+        Returns:
+            DataFrame with ['date', 'level', 'series', 'base_quantity',
+            'predicted_quantity'] and the quantile columns
+        """
+        if not self.is_fitted:
+            raise ValueError("Models not fitted. Call fit() first.")
+
+        if start_date is None:
+            start_date = self.as_of if self.as_of is not None else datetime.now()
+        start_date = pd.Timestamp(start_date).date()
+        future_dates = [start_date + timedelta(days=i) for i in range(1, days_ahead + 1)]
+        hierarchy = self.hierarchy
+        columns = ['predicted_quantity'] + MLForecaster.QUANTILE_COLUMNS
+
+        aggregate_keys = hierarchy.keys(hierarchy.aggregates)
+        base_aggregates = _forecast_matrix(self.aggregate_forecaster, aggregate_keys, future_dates,
+                                           days_ahead, columns)
+        base_dishes = _forecast_matrix(self.dish_forecaster, hierarchy.dishes, future_dates,
+                                       days_ahead, columns)
+
+        reconciled = {}
+        for column in columns:
+            dishes = reconcile(base_aggregates[column], base_dishes[column], hierarchy,
+                               method=self.method, weights=self.weights,
+                               proportions=self.proportions)
+            # Clipping the dishes before aggregating keeps every level coherent
+            dishes = np.maximum(dishes, 0)
+            reconciled[column] = np.vstack([hierarchy.aggregation @ dishes, dishes])
+
+        quantiles = np.sort(np.stack([reconciled[c] for c in MLForecaster.QUANTILE_COLUMNS]), axis=0)
+        base = np.vstack([base_aggregates['predicted_quantity'], base_dishes['predicted_quantity']])
+
+        n_series = len(hierarchy.series)
+        levels, names = zip(*hierarchy.series)
+        result = pd.DataFrame({
+            'date': np.tile(future_dates, n_series),
+            'level': np.repeat(levels, days_ahead),
+            'series': np.repeat(names, days_ahead),
+            'base_quantity': base.ravel(),
+            'predicted_quantity': reconciled['predicted_quantity'].ravel()
+        })
+        for k, column in enumerate(MLForecaster.QUANTILE_COLUMNS):
+            result[column] = quantiles[k].ravel()
+        return result
+
+    def predict_dishes(self, days_ahead: int = 7, start_date=None) -> pd.DataFrame:
+        """
+        Reconciled dish forecasts in the ``MLForecaster.predict`` format, ready
+        for ``InventoryOptimizer.calculate_material_requirements``.
+        """
+        forecast = self.predict(days_ahead, start_date)
+        dishes = forecast[forecast['level'] == DISH].rename(columns={'series': 'dish_name'})
+        dishes = dishes.assign(algorithm=f"hierarchical_{self.method}")
+        return dishes[['date', 'dish_name', 'predicted_quantity', 'algorithm']
+                      + MLForecaster.QUANTILE_COLUMNS].reset_index(drop=True)
+
+
+def _panel_orders(panel: pd.DataFrame) -> pd.DataFrame:
+    """Long orders frame of a date x series panel, one row per known value."""
+    orders = (panel.rename_axis('date').reset_index()
+              .melt(id_vars='date', var_name='dish_name', value_name='quantity_sold')
+              .dropna(subset=['quantity_sold']))
+    return orders.reset_index(drop=True)
+
+
+def _forecast_matrix(forecaster: Optional[MLForecaster], keys: List[str], future_dates: List,
+                     days_ahead: int, columns: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Base forecasts as (series x horizon) matrices per column; series the
+    forecaster does not cover are NaN (and unused by the method).
+    """
+    if forecaster is None:
+        return {c: np.full((len(keys), days_ahead), np.nan) for c in columns}
+
+    forecast = forecaster.predict(days_ahead=days_ahead, start_date=future_dates[0] - timedelta(days=1))
+    forecast = forecast.assign(date=pd.to_datetime(forecast['date']))
+    dates = pd.to_datetime(future_dates)
+    matrices = {}
+    for column in columns:
+        wide = forecast.pivot_table(index='dish_name', columns='date', values=column, aggfunc='sum')
+        matrices[column] = wide.reindex(index=keys, columns=dates).to_numpy(dtype=float)
+    return matrices
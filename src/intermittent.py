@@ -0,0 +1,159 @@
+"""
+Intermittent Demand Module
+Sparsity classification and Croston-type forecasts for dishes that sell only some days
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Sequence
+
+# Syntetos-Boylan cut-offs on the average demand interval and squared CV of sizes
+ADI_CUTOFF = 1.32
+CV2_CUTOFF = 0.49
+DEMAND_CLASSES = ['smooth', 'erratic', 'intermittent', 'lumpy']
+
+# Classes forecast with a Croston-type method when routing is enabled
+SPARSE_CLASSES = ['intermittent', 'lumpy']
+
+METHODS = ['croston', 'sba', 'tsb']
+
+
+def classify_demand(panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    Classify every dish of a daily panel by demand pattern.
+
+    - ADI: launched days per day with demand (1 = sells every day)
+    - CV²: squared coefficient of variation of the non-zero demand sizes
+
+    Args:
+        panel: Date x dish panel from ``FeatureEngine.build_panel`` (NaN before launch)
+
+    Returns:
+        DataFrame indexed by dish with ['adi', 'cv2', 'demand_class']
+    """
+    values = panel.to_numpy(dtype=float)
+    launched = (~np.isnan(values)).sum(axis=0)
+    sizes = np.where(values > 0, values, np.nan)
+    demand_days = (~np.isnan(sizes)).sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adi = np.where(demand_days > 0, launched / np.maximum(demand_days, 1), np.inf)
+    mean = np.nansum(sizes, axis=0) / np.maximum(demand_days, 1)
+    variance = np.nansum((sizes - mean) ** 2, axis=0) / np.maximum(demand_days, 1)
+    cv2 = np.where(mean > 0, variance / np.where(mean > 0, mean, 1) ** 2, 0.0)
+
+    sparse = adi >= ADI_CUTOFF
+    variable = cv2 >= CV2_CUTOFF
+    classes = np.array(DEMAND_CLASSES)[sparse.astype(int) * 2 + variable.astype(int)]
+    return pd.DataFrame({'adi': adi, 'cv2': cv2, 'demand_class': classes}, index=panel.columns)
+
+
+def fit_intermittent(panel: pd.DataFrame, method: str = 'sba', alpha: float = 0.1,
+                     beta: float = 0.1, quantiles: Sequence[float] = (0.1, 0.5, 0.9)) -> Dict[str, Dict]:
+    """
+    Fit a Croston-type model to every dish of a panel at once.
+
+    The smoothing recursions run once over the dates with every dish updated
+    in the same array operation, so the cost is one pass over the panel
+    regardless of the number of dishes.
+
+    - croston: smoothed demand size / smoothed interval between demands
+    - sba: Croston with the Syntetos-Boylan bias correction (1 - alpha/2)
+    - tsb: smoothed size x smoothed probability of demand, updated every
+      day, so the forecast decays while a dish stops selling
+
+    Quantiles mix a zero with probability 1 - p (p = probability of demand)
+    and the dish's historical non-zero sizes rescaled to the smoothed size.
+
+    Args:
+        panel: Date x dish panel from ``FeatureEngine.build_panel``
+        method: One of ``METHODS``
+        alpha: Smoothing of the demand size (and interval)
+        beta: Smoothing of the demand probability (TSB only)
+        quantiles: Quantile levels stored with every model
+
+    Returns:
+        Mapping dish name -> {'type': 'croston', 'method', 'value',
+        'probability', 'size', 'quantiles'}
+    """
+    if method not in METHODS:
+        raise ValueError(f"Method must be one of {METHODS}")
+
+    values = panel.to_numpy(dtype=float)
+    n_dishes = values.shape[1]
+    size = np.zeros(n_dishes)
+    interval = np.ones(n_dishes)
+    probability = np.zeros(n_dishes)
+    since_demand = np.zeros(n_dishes)
+    started = np.zeros(n_dishes, dtype=bool)
+
+    for row in values:
+        active = ~np.isnan(row)
+        since_demand += active
+        demand = active & (row > 0)
+        first = demand & ~started
+        update = demand & started
+
+        # Initialise at the first demand: its size and the days it took to arrive
+        size[first] = row[first]
+        interval[first] = since_demand[first]
+        probability[first] = 1.0 / since_demand[first]
+
+        size[update] += alpha * (row[update] - size[update])
+        if method == 'tsb':
+            decay = active & started & ~demand
+            probability[update] += beta * (1.0 - probability[update])
+            probability[decay] -= beta * probability[decay]
+        else:
+            interval[update] += alpha * (since_demand[update] - interval[update])
+
+        started |= first
+        since_demand[demand] = 0
+
+    if method == 'tsb':
+        rate = probability
+    else:
+        rate = np.where(started, 1.0 / interval, 0.0)
+    value = size * rate
+    if method == 'sba':
+        value *= 1 - alpha / 2
+    value = np.where(started, value, 0.0)
+
+    quantile_values = _mixture_quantiles(values, size, np.clip(rate, 0.0, 1.0), quantiles)
+    return {
+        dish_name: {
+            'type': 'croston',
+            'method': method,
+            'value': float(value[i]),
+            'probability': float(rate[i]),
+            'size': float(size[i]),
+            'quantiles': quantile_values[i].tolist()
+        }
+        for i, dish_name in enumerate(panel.columns)
+    }
+
+
+def _mixture_quantiles(values: np.ndarray, size: np.ndarray, probability: np.ndarray,
+                       levels: Sequence[float]) -> np.ndarray:
+    """(dishes x levels) quantiles of a zero / rescaled-size mixture, for all dishes at once."""
+    sizes = np.where(values > 0, values, np.nan).reshape(-1, len(size))
+    counts = (~np.isnan(sizes)).sum(axis=0)
+    mean = np.nansum(sizes, axis=0) / np.maximum(counts, 1)
+    relative = sizes / np.where(mean > 0, mean, 1)
+    ordered = np.sort(relative, axis=0)          # NaNs sort last
+
+    result = np.zeros((values.shape[1], len(levels)))
+    if not counts.any():
+        return result
+    for k, level in enumerate(levels):
+        # Level within the size distribution once the zero mass is passed
+        within = (level - (1 - probability)) / np.where(probability > 0, probability, 1)
+        position = np.clip(within, 0, 1) * np.maximum(counts - 1, 0)
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+        columns = np.arange(values.shape[1])
+        low, high = ordered[lower, columns], ordered[upper, columns]
+        quantile = low + (position - lower) * (high - low)
+        nonzero = (within > 0) & (counts > 0)
+        result[:, k] = np.where(nonzero, np.nan_to_num(quantile) * size, 0.0)
+    return result
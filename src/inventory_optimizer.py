@@ -1,12 +1,25 @@
+import re
 import pandas as pd
 import numpy as np
+from scipy.stats import norm
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+from src.statistical_forecaster import StatisticalForecaster
+from src.forecast_cache import ForecastCache
+from src.feature_engine import FeatureEngine
+from src.bom import BillOfMaterials
+from src.mrp import MaterialRequirementsPlanner
+from src.inventory_policy import InventoryPolicyOptimizer
+from src.lot_inventory import LotInventory
+from src.expiry_index import ExpiryIndex, MaterialDishIndex
+from src.dish_scoring import DishScorer
+
 try:
     from src.ml_forecaster import MLForecaster
+    from src.model_registry import ModelRegistry
     ML_AVAILABLE = True
 except ImportError:
     ML_AVAILABLE = False
@@ -19,28 +32,76 @@ class InventoryOptimizer:
     Supports both statistical methods and ML algorithms (SARIMA, XGBoost, Random Forest, Prophet).
     """
     
-    def __init__(self, use_ml: bool = False, ml_algorithm: str = 'sarima'):
+    # Quantile levels of the statistical forecast (columns p10/p50/p90)
+    FORECAST_QUANTILES = (0.1, 0.5, 0.9)
+    
+    def __init__(self, use_ml: bool = False, ml_algorithm: str = 'sarima', ml_n_jobs: int = 1,
+                 model_registry_dir: Optional[str] = None, statistical_params: Optional[Dict] = None,
+                 forecast_cache_size: int = 32, forecast_cache_dir: Optional[str] = None,
+                 as_of=None):
         """
         Initialize Inventory Optimizer.
         
         Args:
             use_ml: Whether to use Machine Learning for forecasting
-            ml_algorithm: ML algorithm to use ('sarima', 'xgboost', 'random_forest', 'prophet')
+            ml_algorithm: ML algorithm to use ('sarima', 'xgboost', 'random_forest', 'prophet',
+                          'xgboost_global', or 'auto' for the best algorithm per dish)
+            ml_n_jobs: Number of dishes trained in parallel (-1 = all cores)
+            model_registry_dir: Directory of the on-disk model registry; when set,
+                                fitted models are reused across processes
+            statistical_params: Settings of the statistical forecaster (lookback
+                                windows, smoothing), see ``StatisticalForecaster``
+            forecast_cache_size: Number of forecasts kept by the forecast cache
+                                 (0 disables caching)
+            forecast_cache_dir: Directory the forecast cache is persisted to
+            as_of: Clock of the optimizer (date or timestamp). Forecasts start
+                   from it, only orders up to it are used, and expiry is
+                   measured against it. None = the current time.
         """
         self.orders_data = None
         self.inventory_data = None
+        self.lots = None
+        self.lot_location = None
         self.recipes_data = None
         self.seasonal_factors = None
         self.use_ml = use_ml and ML_AVAILABLE
         self.ml_algorithm = ml_algorithm
+        self.ml_n_jobs = ml_n_jobs
         self.ml_forecaster = None
+        self._ml_tuned_params = None
+        self.model_registry = None
+        self.statistical_params = statistical_params or {}
+        self.as_of = pd.Timestamp(as_of) if as_of is not None else None
+        self._bom = None
+        self._bom_fingerprint = None
+        self._expiry_index = None
+        self._dish_index = None
+        self._dish_index_fingerprint = None
+        self.forecast_cache = None
+        if forecast_cache_size > 0:
+            self.forecast_cache = ForecastCache(max_entries=forecast_cache_size, cache_dir=forecast_cache_dir)
+        
+        if self.use_ml and model_registry_dir:
+            self.model_registry = ModelRegistry(model_registry_dir)
         
         if self.use_ml:
             print(f"🤖 ML Mode enabled with algorithm: {ml_algorithm.upper()}")
         else:
             print("📊 Statistical forecasting mode")
         
-    def load_data(self, orders_file: str = None, inventory_file: str = None, recipes_file: str = None):
+    def now(self) -> pd.Timestamp:
+        """Current time of the optimizer: ``as_of`` if set, else the wall clock."""
+        return self.as_of if self.as_of is not None else pd.Timestamp.now()
+    
+    def _history(self) -> pd.DataFrame:
+        """Orders known at ``as_of`` (all orders when no clock is set)."""
+        self.orders_data['date'] = pd.to_datetime(self.orders_data['date'])
+        if self.as_of is None:
+            return self.orders_data
+        return self.orders_data[self.orders_data['date'] <= self.as_of]
+    
+    def load_data(self, orders_file: str = None, inventory_file: str = None, recipes_file: str = None,
+                  lots_file: str = None):
         """Load data from files or create sample data for demonstration."""
         if orders_file:
             self.orders_data = pd.read_csv(orders_file)
@@ -57,8 +118,45 @@ class InventoryOptimizer:
         else:
             self.recipes_data = self._create_sample_recipes_data()
             
+        if lots_file:
+            self.set_lots(pd.read_csv(lots_file))
+            
         self.seasonal_factors = self._create_seasonal_factors()
         
+    def set_lots(self, lots, location: Optional[str] = None):
+        """
+        Track stock as lots, each with its own quantity and expiry.
+        
+        ``current_stock`` and ``expiry_date`` (earliest lot) of the inventory
+        are refreshed from the lots; call again after receiving or consuming
+        lots to refresh them.
+        
+        Args:
+            lots: ``LotInventory`` or lot rows with ['material_name', 'quantity',
+                  'expiry_date'] and optionally 'location'
+            location: Only use the lots of this location
+        """
+        self.lots = lots if isinstance(lots, LotInventory) else LotInventory.from_frame(lots)
+        self.lot_location = location
+        stock = self.lots.stock(location=location).set_index('material_name')
+        
+        if self.inventory_data is None:
+            self.inventory_data = pd.DataFrame({'material_name': stock.index})
+        missing = stock.index.difference(self.inventory_data['material_name'])
+        inventory = pd.concat([self.inventory_data, pd.DataFrame({'material_name': missing})], ignore_index=True)
+        inventory['current_stock'] = inventory['material_name'].map(stock['current_stock']).fillna(0)
+        inventory['expiry_date'] = inventory['material_name'].map(stock['expiry_date'])
+        self.inventory_data = inventory
+        
+    def _lot_frame(self) -> Optional[pd.DataFrame]:
+        """Lots holding stock at the tracked location (None without lots)."""
+        if self.lots is None:
+            return None
+        lots = self.lots.to_frame()
+        if self.lot_location is not None:
+            lots = lots[lots['location'] == self.lot_location]
+        return lots
+    
     def _create_sample_orders_data(self) -> pd.DataFrame:
         """Create sample order data for demonstration."""
         dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='D')
@@ -106,7 +204,7 @@ class InventoryOptimizer:
         for material in materials:
             # Set realistic expiry dates
             days_to_expiry = np.random.randint(1, 15)
-            expiry_date = datetime.now() + timedelta(days=days_to_expiry)
+            expiry_date = self.now() + timedelta(days=days_to_expiry)
             
             data.append({
                 'material_name': material,
@@ -145,7 +243,8 @@ class InventoryOptimizer:
         
         return pd.DataFrame(recipes)
     
-    def _create_seasonal_factors(self) -> Dict:
+    @staticmethod
+    def _create_seasonal_factors() -> Dict:
         """Create seasonal adjustment factors."""
         return {
             'winter_months': [12, 1, 2],
@@ -162,13 +261,25 @@ class InventoryOptimizer:
             'holiday_factor': 1.5
         }
     
-    def forecast_demand(self, days_ahead: int = 7) -> pd.DataFrame:
+    def forecast_demand(self, days_ahead: int = 7, start_date=None, use_weather: bool = False,
+                        use_market: bool = False) -> pd.DataFrame:
         """
         Forecast demand for the next specified days.
         Uses ML algorithms if enabled, otherwise uses statistical methods.
         
+        Results are cached by a fingerprint of the order history, the
+        algorithm and its hyperparameters (tuned ones from the registry
+        included), the horizon, the start date and the enrichment flags, so a
+        repeated request returns the stored forecast; appending orders or
+        saving new tuned parameters changes the fingerprint and therefore
+        invalidates it.
+        
         Args:
             days_ahead: Number of days to forecast
+            start_date: Forecast origin; predictions cover the N days after it
+                        (default: ``now()``)
+            use_weather: Add weather features (``add_weather_to_forecast``)
+            use_market: Add market factor features (``add_market_to_forecast``)
             
         Returns:
             DataFrame with demand forecasts
@@ -176,104 +287,298 @@ class InventoryOptimizer:
         if self.orders_data is None:
             raise ValueError("Orders data not loaded. Please load data first.")
         
-        # Prepare historical data
-        self.orders_data['date'] = pd.to_datetime(self.orders_data['date'])
+        start_date = pd.Timestamp(start_date if start_date is not None else self.now()).date()
+        
+        key = None
+        if self.forecast_cache is not None:
+            key = self._forecast_key(days_ahead, start_date, use_weather, use_market)
+            cached = self.forecast_cache.get(key)
+            if cached is not None:
+                return cached
         
         # Use ML forecasting if enabled
         if self.use_ml:
-            return self._forecast_with_ml(days_ahead)
+            forecast = self._forecast_with_ml(days_ahead, start_date=start_date)
         else:
-            return self._forecast_statistical(days_ahead)
+            forecast = self._forecast_statistical(days_ahead, start_date=start_date)
+        
+        if use_weather and not forecast.empty:
+            from src.weather_integration import add_weather_to_forecast
+            forecast = add_weather_to_forecast(forecast)
+        if use_market and not forecast.empty:
+            from src.market_factors import add_market_to_forecast
+            forecast = add_market_to_forecast(forecast)
+        
+        if key is not None:
+            self.forecast_cache.put(key, forecast)
+        return forecast
+    
+    def _forecast_key(self, days_ahead: int, start_date, use_weather: bool, use_market: bool) -> str:
+        """Cache key of a forecast request."""
+        return ForecastCache.make_key(
+            orders=FeatureEngine.fingerprint(self._history()),
+            algorithm=self.ml_algorithm if self.use_ml else 'statistical',
+            model=self._ml_model_config() if self.use_ml else None,
+            statistical_params=self.statistical_params,
+            seasonal_factors=self.seasonal_factors,
+            days_ahead=days_ahead,
+            start_date=str(start_date),
+            use_weather=use_weather,
+            use_market=use_market
+        )
+    
+    def _ml_model_config(self) -> Dict:
+        """
+        Configuration the ML forecast depends on besides the data: the
+        hyperparameter hash of the forecaster and the tuned per-dish
+        hyperparameters saved in the registry (of every candidate for 'auto').
+        """
+        forecaster = self._new_ml_forecaster()
+        return {'params': forecaster.params_hash(), 'tuned_params': ModelRegistry.hash_params(self._tuned_params())}
     
-    def _forecast_with_ml(self, days_ahead: int) -> pd.DataFrame:
+    def _tuned_params(self) -> Dict[str, Dict]:
+        """Tuned hyperparameters in the registry per algorithm used by the forecaster."""
+        if self.model_registry is None:
+            return {}
+        algorithms = [self.ml_algorithm]
+        if self.ml_algorithm == 'auto':
+            from src.model_selection import AUTO_CANDIDATES
+            algorithms += AUTO_CANDIDATES
+        return {algorithm: self.model_registry.load_tuned_params(algorithm) for algorithm in algorithms}
+    
+    def _new_ml_forecaster(self) -> 'MLForecaster':
+        return MLForecaster(algorithm=self.ml_algorithm, n_jobs=self.ml_n_jobs, as_of=self.as_of)
+    
+    def _forecast_with_ml(self, days_ahead: int, start_date=None) -> pd.DataFrame:
         """
         Forecast using Machine Learning algorithms.
         """
         print(f"\n🤖 Generating ML forecast using {self.ml_algorithm.upper()}...")
         
-        # Initialize and train ML forecaster if not already done
-        if self.ml_forecaster is None:
-            self.ml_forecaster = MLForecaster(algorithm=self.ml_algorithm)
-            self.ml_forecaster.fit(self.orders_data)
+        # Initialize and train ML forecaster if not already done (or the clock
+        # moved, or new tuned hyperparameters were saved since it was trained)
+        tuned_params = self._tuned_params()
+        if (self.ml_forecaster is None or self.ml_forecaster.as_of != self.as_of
+                or tuned_params != self._ml_tuned_params):
+            self.ml_forecaster = self._new_ml_forecaster()
+            self.ml_forecaster.fit(self.orders_data, registry=self.model_registry)
+            self._ml_tuned_params = tuned_params
         
         # Generate predictions
-        forecasts = self.ml_forecaster.predict(days_ahead=days_ahead)
+        forecasts = self.ml_forecaster.predict(days_ahead=days_ahead, start_date=start_date)
         
         print(f"✅ ML forecast completed for {len(forecasts)} predictions\n")
         return forecasts
     
-    def _forecast_statistical(self, days_ahead: int) -> pd.DataFrame:
+    def append_orders(self, new_orders: pd.DataFrame) -> None:
         """
-        Forecast using statistical methods (original implementation).
+        Append newly arrived orders to the order history.
+        
+        If ML models are already trained they are updated incrementally
+        instead of being retrained from scratch. Cached forecasts of the
+        previous history are dropped.
+        
+        Args:
+            new_orders: New order rows with the same columns as ``orders_data``
         """
-        # Calculate average daily demand for each dish
-        daily_avg = self.orders_data.groupby('dish_name')['quantity_sold'].mean()
+        if self.orders_data is None:
+            raise ValueError("Orders data not loaded. Please load data first.")
         
-        # Generate forecast dates
-        start_date = datetime.now().date()
-        forecast_dates = [start_date + timedelta(days=i) for i in range(1, days_ahead + 1)]
+        new_orders = new_orders.copy()
+        new_orders['date'] = pd.to_datetime(new_orders['date'])
+        self.orders_data['date'] = pd.to_datetime(self.orders_data['date'])
+        self.orders_data = pd.concat([self.orders_data, new_orders], ignore_index=True)
         
-        forecasts = []
-        for date in forecast_dates:
-            # Apply seasonal factors
-            month = date.month
-            seasonal_factor = 1.0
-            
-            if month in self.seasonal_factors['winter_months']:
-                seasonal_factor = self.seasonal_factors['factors']['winter']
-            elif month in self.seasonal_factors['summer_months']:
-                seasonal_factor = self.seasonal_factors['factors']['summer']
-            
-            # Apply weekend factor
-            weekend_factor = 1.0
-            if date.weekday() >= 5:  # Weekend
-                weekend_factor = self.seasonal_factors['weekend_factor']
+        if self.ml_forecaster is not None and self.ml_forecaster.is_fitted:
+            self.ml_forecaster.update(new_orders, registry=self.model_registry)
+        
+        # Cached forecasts are keyed by the old history and can no longer be hit
+        if self.forecast_cache is not None:
+            self.forecast_cache.clear()
+    
+    def _forecast_statistical(self, days_ahead: int, start_date=None) -> pd.DataFrame:
+        """
+        Forecast using statistical methods.
+        
+        Every dish is forecast at once by ``StatisticalForecaster``: per-dish
+        weekday and month indices (the configured seasonal factors where the
+        history is too short) around a smoothed level and trend.
+        
+        Args:
+            days_ahead: Number of days to forecast
+            start_date: Forecast origin; predictions cover the N days after it
+                        (default: ``now()``)
+        """
+        forecaster = self._statistical_forecaster()
+        forecaster.fit(self._history())
+        return forecaster.predict(days_ahead, start_date=start_date if start_date is not None else self.now())
+    
+    def _statistical_forecaster(self) -> StatisticalForecaster:
+        return StatisticalForecaster(seasonal_factors=self.seasonal_factors,
+                                     quantiles=self.FORECAST_QUANTILES,
+                                     **self.statistical_params)
+    
+    def forecast_origins(self, origins: List, days_ahead: int = 7) -> pd.DataFrame:
+        """
+        Forecast as of many origins, e.g. for backtests or scheduled jobs.
+        
+        Each origin only sees the orders up to it. Statistical forecasts for
+        all origins come from one vectorized run
+        (``StatisticalForecaster.predict_origins``); ML forecasts train one
+        forecaster per origin.
+        
+        Args:
+            origins: Forecast origins (dates or timestamps)
+            days_ahead: Number of days forecast after each origin
             
-            for dish in daily_avg.index:
-                predicted_quantity = int(daily_avg[dish] * seasonal_factor * weekend_factor)
-                forecasts.append({
-                    'date': date,
-                    'dish_name': dish,
-                    'predicted_quantity': max(0, predicted_quantity),
-                    'seasonal_factor': seasonal_factor,
-                    'weekend_factor': weekend_factor
-                })
-        
-        return pd.DataFrame(forecasts)
+        Returns:
+            DataFrame with an 'origin' column followed by the forecast columns
+        """
+        if self.orders_data is None:
+            raise ValueError("Orders data not loaded. Please load data first.")
+        
+        orders = self._history()
+        if not self.use_ml:
+            return self._statistical_forecaster().predict_origins(orders, origins, days_ahead)
+        
+        forecasts = []
+        for origin in origins:
+            forecaster = MLForecaster(algorithm=self.ml_algorithm, n_jobs=self.ml_n_jobs, as_of=origin)
+            forecaster.fit(orders.copy())
+            forecast = forecaster.predict(days_ahead=days_ahead)
+            forecast.insert(0, 'origin', pd.Timestamp(origin))
+            forecasts.append(forecast)
+        return pd.concat(forecasts, ignore_index=True) if forecasts else pd.DataFrame()
     
     def calculate_material_requirements(self, forecast_data: pd.DataFrame) -> pd.DataFrame:
         """
         Calculate raw material requirements based on demand forecast.
+        
+        Quantile columns of the forecast (p10/p50/p90) become
+        ``total_material_needed_<q>`` columns. Dish quantiles are summed as
+        if dish demands moved together, so the material P90 is a
+        conservative (upper) estimate.
+        
+        The forecast is multiplied by the sparse bill of materials (see
+        ``bom``) instead of being joined with every recipe line. Nested
+        recipes (prep items) and yield factors are flattened into raw
+        materials.
         """
         if self.recipes_data is None:
             raise ValueError("Recipe data not loaded. Please load data first.")
         
-        # Merge forecast with recipes
-        requirements = forecast_data.merge(self.recipes_data, on='dish_name', how='left')
+        quantile_columns = self._quantile_columns(forecast_data)
+        value_columns = ['predicted_quantity'] + quantile_columns
         
-        # Calculate total material needed
-        requirements['total_material_needed'] = (
-            requirements['predicted_quantity'] * requirements['quantity_needed']
-        )
+        # One sparse (date x dish) @ (dish x material) product per value column
+        material_requirements = self.bom.requirements(forecast_data, value_columns)
+        return material_requirements.rename(columns={
+            'predicted_quantity': 'total_material_needed',
+            **{c: f'total_material_needed_{c}' for c in quantile_columns}
+        })
+    
+    @property
+    def bom(self) -> BillOfMaterials:
+        """Sparse bill of materials of ``recipes_data``, recompiled when the recipes change."""
+        fingerprint = BillOfMaterials.fingerprint(self.recipes_data)
+        if self._bom is None or fingerprint != self._bom_fingerprint:
+            self._bom = BillOfMaterials.from_recipes(self.recipes_data)
+            self._bom_fingerprint = fingerprint
+        return self._bom
+    
+    @property
+    def expiry_index(self) -> ExpiryIndex:
+        """
+        Sorted expiry index of ``inventory_data``, rebuilt when the frame is
+        replaced or its expiry dates change (see ``ExpiryIndex.is_current``).
+        """
+        if not pd.api.types.is_datetime64_any_dtype(self.inventory_data['expiry_date']):
+            self.inventory_data['expiry_date'] = pd.to_datetime(self.inventory_data['expiry_date'])
+        if self._expiry_index is None or not self._expiry_index.is_current(self.inventory_data):
+            self._expiry_index = ExpiryIndex(self.inventory_data)
+        return self._expiry_index
+    
+    @property
+    def material_dish_index(self) -> MaterialDishIndex:
+        """
+        Raw material -> dish index over the flattened menu lines of ``bom``
+        (prep items resolved to their raw materials and not listed as
+        dishes), rebuilt with the BOM.
+        """
+        bom = self.bom
+        if self._dish_index is None or self._dish_index_fingerprint != self._bom_fingerprint:
+            self._dish_index = MaterialDishIndex(bom.menu_lines())
+            self._dish_index_fingerprint = self._bom_fingerprint
+        return self._dish_index
+    
+    def refresh_indexes(self) -> None:
+        """
+        Drop the expiry and material -> dish indexes; they are rebuilt on next
+        use. Needed only after renaming materials of ``inventory_data`` in
+        place (other changes are detected).
+        """
+        self._expiry_index = None
+        self._dish_index = None
+    
+    def update_recipe(self, dish_name: str, lines: pd.DataFrame) -> None:
+        """
+        Replace the recipe of a dish or prep item.
         
-        # Aggregate by material and date
-        material_requirements = requirements.groupby(['date', 'material_name']).agg({
-            'total_material_needed': 'sum'
-        }).reset_index()
+        The compiled bill of materials is updated in place, re-flattening
+        only the item and the dishes that use it.
         
-        return material_requirements
+        Args:
+            dish_name: Dish or prep item whose recipe is replaced
+            lines: New recipe lines ['material_name', 'quantity_needed'] and
+                   optionally 'yield_factor'
+        """
+        if self.recipes_data is None:
+            raise ValueError("Recipe data not loaded. Please load data first.")
+        
+        bom = self.bom
+        bom.update_recipe(dish_name, lines)
+        self.recipes_data = pd.concat([self.recipes_data[self.recipes_data['dish_name'] != dish_name],
+                                       lines.assign(dish_name=dish_name)], ignore_index=True)
+        self._bom_fingerprint = BillOfMaterials.fingerprint(self.recipes_data)
     
-    def calculate_restocking_needs(self, material_requirements: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _quantile_columns(forecast_data: pd.DataFrame) -> List[str]:
+        """Quantile columns (p10, p50, p90, ...) present in a forecast."""
+        return [c for c in forecast_data.columns if re.fullmatch(r'p\d{1,2}', str(c))]
+    
+    def calculate_restocking_needs(self, material_requirements: pd.DataFrame,
+                                   service_level: Optional[str] = None,
+                                   policies: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         Calculate what materials need to be restocked based on current inventory and requirements.
+        
+        With a ``service_level``, a safety stock covers the demand of the
+        whole period up to that quantile (see ``_safety_stock``).
+        
+        Materials with a policy (``optimize_inventory_policy``) are restocked
+        up to their order-up-to level once the stock is at or below their
+        reorder point instead.
+        
+        Args:
+            material_requirements: Output of ``calculate_material_requirements``
+            service_level: Quantile the stock should cover (e.g. 'p90'; default:
+                           the point forecast, no safety stock)
+            policies: Optional (s, S) policies with ['material_name',
+                      'reorder_point', 'order_up_to']
         """
         if self.inventory_data is None:
             raise ValueError("Inventory data not loaded. Please load data first.")
         
         # Get total requirements for the forecast period
-        total_requirements = material_requirements.groupby('material_name').agg({
-            'total_material_needed': 'sum'
-        }).reset_index()
+        total_requirements = material_requirements.groupby('material_name')[
+            ['total_material_needed']].sum().reset_index()
+        
+        # Safety stock: extra cover up to the service-level quantile
+        total_requirements['safety_stock'] = 0.0
+        if service_level:
+            safety_stock = self._safety_stock(material_requirements, service_level)
+            total_requirements['safety_stock'] = safety_stock.reindex(
+                total_requirements['material_name']).fillna(0).to_numpy()
         
         # Merge with current inventory
         restock_analysis = total_requirements.merge(
@@ -284,13 +589,27 @@ class InventoryOptimizer:
         
         # Calculate restocking needs
         restock_analysis['shortage'] = (
-            restock_analysis['total_material_needed'] - restock_analysis['current_stock']
+            restock_analysis['total_material_needed'] + restock_analysis['safety_stock']
+            - restock_analysis['current_stock']
         )
         restock_analysis['needs_restocking'] = restock_analysis['shortage'] > 0
         restock_analysis['restock_quantity'] = np.maximum(
             restock_analysis['shortage'], 
             restock_analysis['minimum_stock_level'] - restock_analysis['current_stock']
         )
+        
+        if policies is not None:
+            restock_analysis = restock_analysis.merge(
+                policies[['material_name', 'reorder_point', 'order_up_to']], on='material_name', how='left'
+            )
+            has_policy = restock_analysis['reorder_point'].notna()
+            restock_analysis['needs_restocking'] = restock_analysis['needs_restocking'].where(
+                ~has_policy, restock_analysis['current_stock'] <= restock_analysis['reorder_point']
+            )
+            restock_analysis['restock_quantity'] = restock_analysis['restock_quantity'].where(
+                ~has_policy, restock_analysis['order_up_to'] - restock_analysis['current_stock']
+            )
+        
         restock_analysis['restock_cost'] = (
             restock_analysis['restock_quantity'] * restock_analysis['cost_per_unit']
         )
@@ -298,40 +617,157 @@ class InventoryOptimizer:
         # Filter only items that need restocking
         return restock_analysis[restock_analysis['needs_restocking']].sort_values('restock_cost', ascending=False)
     
+    def _safety_stock(self, material_requirements: pd.DataFrame, service_level: str) -> pd.Series:
+        """
+        Safety stock per material covering the period demand up to a quantile.
+        
+        The spread of every day's requirement comes from its widest
+        symmetric quantile pair (e.g. P10/P90: sigma = (P90 - P10) / (2 z_0.9)),
+        or from the gap between the service-level quantile and the point
+        requirement. Days are taken as independent, so the period spread is
+        the square root of the summed daily variances and the safety stock
+        is z_q times it, not the sum of the daily gaps (which grows with the
+        horizon instead of its square root).
+        
+        Args:
+            material_requirements: Output of ``calculate_material_requirements``
+            service_level: Quantile column suffix, e.g. 'p90'
+            
+        Returns:
+            Safety stock indexed by material name (0 where no quantiles exist)
+        """
+        if not re.fullmatch(r'p\d{1,2}', service_level):
+            raise ValueError(f"Service level must be a quantile such as 'p90', got {service_level!r}")
+        z = norm.ppf(int(service_level[1:]) / 100)
+        base = 'total_material_needed'
+        levels = sorted(int(c[len(base) + 2:]) for c in material_requirements.columns
+                        if re.fullmatch(rf'{base}_p\d{{1,2}}', c))
+        pairs = [level for level in levels if level < 50 and 100 - level in levels]
+        
+        if pairs:
+            low, high = pairs[0], 100 - pairs[0]
+            sigma = (material_requirements[f'{base}_p{high}'] - material_requirements[f'{base}_p{low}']) / (
+                norm.ppf(high / 100) - norm.ppf(low / 100))
+        elif int(service_level[1:]) in levels and z > 0:
+            sigma = (material_requirements[f'{base}_{service_level}'] - material_requirements[base]) / z
+        else:
+            return pd.Series(dtype=float)
+        
+        variance = (sigma.clip(lower=0) ** 2).groupby(material_requirements['material_name']).sum()
+        return np.maximum(0, z * np.sqrt(variance))
+    
+    def plan_purchases(self, material_requirements: Optional[pd.DataFrame] = None, days_ahead: int = 14,
+                       service_level: Optional[str] = None,
+                       scheduled_receipts: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Time-phased purchase plan (MRP) for the forecast horizon.
+        
+        Unlike ``calculate_restocking_needs``, which compares the total of the
+        period with the current stock, stock is projected day by day and
+        every shortfall becomes a purchase order released
+        ``supplier_lead_time`` days before the day it is needed (see
+        ``MaterialRequirementsPlanner``).
+        
+        Args:
+            material_requirements: Output of ``calculate_material_requirements``
+                                   (default: requirements of a ``days_ahead`` forecast)
+            days_ahead: Days forecast when no requirements are given
+            service_level: Quantile to cover (e.g. 'p90'; default: the point forecast)
+            scheduled_receipts: Open orders with ['material_name', 'date', 'quantity']
+            
+        Returns:
+            Dictionary with 'projection' and 'purchase_orders' DataFrames
+        """
+        if self.inventory_data is None:
+            raise ValueError("Inventory data not loaded. Please load data first.")
+        
+        if material_requirements is None:
+            material_requirements = self.calculate_material_requirements(self.forecast_demand(days_ahead))
+        requirement_column = 'total_material_needed'
+        if service_level and f'{requirement_column}_{service_level}' in material_requirements.columns:
+            requirement_column = f'{requirement_column}_{service_level}'
+        
+        today = self.now().normalize()
+        return MaterialRequirementsPlanner().plan(
+            material_requirements, self.inventory_data, requirement_column=requirement_column,
+            scheduled_receipts=scheduled_receipts, start_date=today + timedelta(days=1), as_of=today
+        )
+    
+    def optimize_inventory_policy(self, material_requirements: Optional[pd.DataFrame] = None,
+                                  days_ahead: int = 28, **kwargs) -> pd.DataFrame:
+        """
+        Optimize an (s, S) reorder policy per material by simulating demand.
+        
+        Args:
+            material_requirements: Output of ``calculate_material_requirements``
+                                   (default: requirements of a ``days_ahead`` forecast)
+            days_ahead: Days forecast when no requirements are given
+            **kwargs: Options of ``InventoryPolicyOptimizer`` (e.g. n_scenarios,
+                      target_fill_rate, order_cost)
+            
+        Returns:
+            DataFrame with the policy, expected fill rate, waste and cost per
+            material (pass it to ``calculate_restocking_needs``)
+        """
+        if self.inventory_data is None:
+            raise ValueError("Inventory data not loaded. Please load data first.")
+        
+        if material_requirements is None:
+            material_requirements = self.calculate_material_requirements(self.forecast_demand(days_ahead))
+        return InventoryPolicyOptimizer(**kwargs).optimize(
+            material_requirements, self.inventory_data, as_of=self.now().normalize(), lots=self._lot_frame()
+        )
+    
     def find_near_expiry_materials(self, days_threshold: int = 3) -> pd.DataFrame:
         """
         Find materials that are near expiry and suggest dishes that can use them.
+        
+        Expiry is measured against ``now()``, so replaying a past day with
+        ``as_of`` gives the same result as running on that day. With lots
+        (``set_lots``), only the lots expiring in time count: their total is
+        'expiring_quantity' and dishes possible are computed from it.
         """
         if self.inventory_data is None:
             raise ValueError("Inventory data not loaded. Please load data first.")
         
-        # Convert expiry_date to datetime if it's not already
-        self.inventory_data['expiry_date'] = pd.to_datetime(self.inventory_data['expiry_date'])
-        
-        # Find materials expiring soon
-        threshold_date = datetime.now() + timedelta(days=days_threshold)
-        near_expiry = self.inventory_data[
-            self.inventory_data['expiry_date'] <= threshold_date
-        ].copy()
+        # Find materials expiring soon (binary search on the expiry indexes)
+        now = self.now()
+        threshold_date = now + timedelta(days=days_threshold)
+        if self.lots is not None:
+            lots = self.lots.expiring(threshold_date, location=self.lot_location)
+            near_expiry = lots.groupby('material_name', sort=False).agg(
+                expiring_quantity=('quantity', 'sum'), expiry_date=('expiry_date', 'min'), lot_count=('lot_id', 'size')
+            ).reset_index()
+            details = _take_rows(self.inventory_data.drop(columns=['material_name', 'expiry_date']),
+                                 self.expiry_index.rows(near_expiry['material_name']))
+            near_expiry = pd.concat([near_expiry, details], axis=1)
+        else:
+            near_expiry = self.inventory_data.iloc[self.expiry_index.expiring(threshold_date)]
         
         if near_expiry.empty:
             return pd.DataFrame()
         
-        # Find dishes that can use these materials
-        near_expiry_with_dishes = near_expiry.merge(
-            self.recipes_data, 
-            on='material_name', 
-            how='left'
-        )
+        # Find dishes that can use these materials, directly or through prep
+        # items (a left join on the flattened BOM lines through the inverted index)
+        dish_index = self.material_dish_index
+        left, lines = dish_index.lookup(near_expiry['material_name'])
+        near_expiry = near_expiry.iloc[left].reset_index(drop=True)
+        dishes = _take_rows(dish_index.recipes.drop(columns='material_name'), lines)
+        overlap = near_expiry.columns.intersection(dishes.columns)
+        near_expiry_with_dishes = pd.concat([
+            near_expiry.rename(columns={column: f'{column}_x' for column in overlap}),
+            dishes.rename(columns={column: f'{column}_y' for column in overlap})
+        ], axis=1)
         
         # Calculate how many dishes can be made with current stock
+        usable = 'expiring_quantity' if self.lots is not None else 'current_stock'
         near_expiry_with_dishes['max_dishes_possible'] = (
-            near_expiry_with_dishes['current_stock'] / near_expiry_with_dishes['quantity_needed']
+            near_expiry_with_dishes[usable] / near_expiry_with_dishes['quantity_needed']
         ).fillna(0).astype(int)
         
         # Calculate days until expiry
         near_expiry_with_dishes['days_until_expiry'] = (
-            near_expiry_with_dishes['expiry_date'] - datetime.now()
+            near_expiry_with_dishes['expiry_date'] - now
         ).dt.days
         
         return near_expiry_with_dishes.sort_values('days_until_expiry')
@@ -344,6 +780,7 @@ class InventoryOptimizer:
         demand_forecast = self.forecast_demand(7)
         material_requirements = self.calculate_material_requirements(demand_forecast)
         restocking_needs = self.calculate_restocking_needs(material_requirements)
+        purchase_plan = self.plan_purchases(material_requirements)
         near_expiry = self.find_near_expiry_materials(3)
         dish_recommendations = self.recommend_dishes(5)
         
@@ -360,11 +797,13 @@ class InventoryOptimizer:
                 'materials_to_restock': materials_to_restock,
                 'materials_near_expiry': materials_near_expiry,
                 'recommended_dishes': recommended_dishes,
+                'as_of': self.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'report_generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             },
             'demand_forecast': demand_forecast,
             'material_requirements': material_requirements,
             'restocking_needs': restocking_needs,
+            'purchase_orders': purchase_plan['purchase_orders'],
             'near_expiry_materials': near_expiry,
             'dish_recommendations': dish_recommendations
         }
@@ -373,7 +812,7 @@ class InventoryOptimizer:
     
     def _get_weather_preferences(self) -> Dict:
         """Get dish preferences based on weather/season."""
-        current_month = datetime.now().month
+        current_month = self.now().month
         
         # Simulate weather preferences based on season
         if current_month in [12, 1, 2]:  # Winter
@@ -405,141 +844,103 @@ class InventoryOptimizer:
                 'preference_multiplier': 1.2
             }
     
-    def recommend_dishes(self, max_recommendations: int = 5) -> pd.DataFrame:
+    def dish_prices(self) -> pd.Series:
+        """Average selling price per dish from the order history ('revenue' / 'quantity_sold')."""
+        history = self._history()
+        if 'revenue' not in history.columns:
+            return pd.Series(dtype=float)
+        totals = history.groupby('dish_name')[['revenue', 'quantity_sold']].sum()
+        return (totals['revenue'] / totals['quantity_sold'].where(totals['quantity_sold'] > 0)).dropna()
+    
+    def plan_production(self, days_ahead: int = 3, demand_forecast: Optional[pd.DataFrame] = None,
+                        prices: Optional[pd.Series] = None, integer: bool = False,
+                        demand_column: str = 'predicted_quantity') -> Dict:
         """
-        Recommend dishes based on available materials, expiry dates, weather, and seasonal factors.
+        Optimal production mix for the coming days (see ``ProductionPlanner``).
+        
+        Unlike ``recommend_dishes``, which ranks dishes one by one, servings
+        of all dishes are decided together: they share the stock, stay within
+        the forecast demand, and stock can only be used before it expires.
+        The plan maximizes the margin minus the cost of stock expiring unused.
+        
+        Args:
+            days_ahead: Days planned when no forecast is given
+            demand_forecast: Output of ``forecast_demand`` (default: a
+                             ``days_ahead`` forecast)
+            prices: Selling price per dish (default: ``dish_prices``)
+            integer: Plan whole servings
+            demand_column: Forecast column capping the servings (e.g. 'p90')
+            
+        Returns:
+            Dictionary with the 'plan' and 'materials' DataFrames and totals
         """
         if any(data is None for data in [self.inventory_data, self.recipes_data]):
             raise ValueError("Inventory and recipe data must be loaded first.")
         
-        # Get current weather preferences
-        weather_prefs = self._get_weather_preferences()
+        # scipy.optimize.milp needs scipy >= 1.9; import only when planning
+        from src.production_planner import ProductionPlanner
         
-        # Find materials near expiry (within 5 days)
-        near_expiry = self.find_near_expiry_materials(5)
-        expiry_materials = set(near_expiry['material_name'].unique()) if not near_expiry.empty else set()
+        if demand_forecast is None:
+            demand_forecast = self.forecast_demand(days_ahead)
+        stock = self._lot_frame() if self.lots is not None else self.inventory_data
+        unit_costs = self.inventory_data.drop_duplicates('material_name').set_index('material_name')['cost_per_unit']
+        return ProductionPlanner(integer=integer).plan(
+            self.bom, demand_forecast, stock, prices=prices if prices is not None else self.dish_prices(),
+            unit_costs=unit_costs, demand_column=demand_column
+        )
+    
+    def _near_expiry_days(self, days_threshold: int, expiry_index: Optional[ExpiryIndex] = None) -> pd.Series:
+        """Days until the earliest expiry of every material expiring within ``days_threshold`` days."""
+        now = self.now()
+        threshold_date = now + timedelta(days=days_threshold)
+        if self.lots is not None:
+            expiring = self.lots.expiring(threshold_date, location=self.lot_location)
+        else:
+            expiry_index = expiry_index if expiry_index is not None else self.expiry_index
+            expiring = self.inventory_data.iloc[expiry_index.expiring(threshold_date)]
+        days = (expiring['expiry_date'] - now).dt.days
+        return days.groupby(expiring['material_name'].to_numpy(), sort=False).min()
+    
+    def recommend_dishes(self, max_recommendations: int = 5,
+                         weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """
+        Recommend dishes based on available materials, expiry dates, weather, and seasonal factors.
         
-        # Get all possible dishes
-        all_dishes = self.recipes_data['dish_name'].unique()
-        recommendations = []
+        All menu dishes are scored at once by ``DishScorer`` from the
+        flattened menu lines of ``bom`` (prep items resolved to raw materials,
+        yields included, and never recommended themselves) against the indexed material table (first inventory row of
+        every material).
         
-        for dish in all_dishes:
-            dish_recipes = self.recipes_data[self.recipes_data['dish_name'] == dish]
-            
-            # Check if we have all required materials
-            required_materials = set(dish_recipes['material_name'])
-            available_materials = set(self.inventory_data['material_name'])
-            
-            if not required_materials.issubset(available_materials):
-                continue  # Skip if we don't have all required materials
-            
-            # Calculate feasibility score
-            score_components = {
-                'material_availability': 0,
-                'expiry_urgency': 0,
-                'seasonal_preference': 0,
-                'cost_efficiency': 0
-            }
-            
-            total_cost = 0
-            max_servings = float('inf')
-            urgency_bonus = 0
-            
-            # Track expiry material usage ratio
-            expiry_material_cost = 0  # Cost of near-expiry materials used
-            total_material_cost = 0   # Total cost of all materials
-            
-            # Analyze each required material
-            for _, recipe_row in dish_recipes.iterrows():
-                material_name = recipe_row['material_name']
-                qty_needed = recipe_row['quantity_needed']
-                
-                # Get material info from inventory
-                material_info = self.inventory_data[
-                    self.inventory_data['material_name'] == material_name
-                ].iloc[0]
-                
-                current_stock = material_info['current_stock']
-                cost_per_unit = material_info['cost_per_unit']
-                
-                # Calculate maximum servings possible with this material
-                possible_servings = int(current_stock / qty_needed)
-                max_servings = min(max_servings, possible_servings)
-                
-                # Calculate cost for this material
-                material_cost = qty_needed * cost_per_unit
-                total_cost += material_cost
-                total_material_cost += material_cost
-                
-                # Material availability score (higher stock = higher score)
-                stock_ratio = current_stock / (material_info['minimum_stock_level'] + 1)
-                score_components['material_availability'] += min(stock_ratio, 2.0)
-                
-                # Track expiry material cost ratio
-                if material_name in expiry_materials:
-                    expiry_material_cost += material_cost
-                    
-                    # Expiry urgency bonus (higher bonus for using near-expiry materials)
-                    expiry_info = near_expiry[near_expiry['material_name'] == material_name]
-                    if not expiry_info.empty:
-                        days_until_expiry = expiry_info['days_until_expiry'].min()
-                        # Higher bonus for more urgent expiry
-                        urgency_bonus += max(0, (5 - days_until_expiry) * 0.5)
-            
-            if max_servings <= 0:
-                continue  # Can't make this dish
-            
-            # Calculate expiry material usage ratio (%)
-            expiry_material_ratio = (expiry_material_cost / total_material_cost * 100) if total_material_cost > 0 else 0
-            
-            # IMPORTANT: Only recommend if expiry material ratio is significant (>= 30%)
-            # This avoids recommending dishes that barely use expiring materials
-            if expiry_material_ratio > 0 and expiry_material_ratio < 30:
-                # If uses expiring materials but ratio is too low, reduce urgency bonus significantly
-                urgency_bonus *= 0.2  # Reduce by 80%
-            
-            # Normalize material availability score
-            score_components['material_availability'] /= len(dish_recipes)
-            score_components['expiry_urgency'] = urgency_bonus
-            
-            # Seasonal preference score
-            if dish in weather_prefs['preferred_dishes']:
-                score_components['seasonal_preference'] = weather_prefs['preference_multiplier']
-            else:
-                score_components['seasonal_preference'] = 1.0
-            
-            # Cost efficiency score (lower cost per serving = higher score)
-            cost_per_serving = total_cost
-            score_components['cost_efficiency'] = max(0, (10 - cost_per_serving) / 10)
-            
-            # Calculate overall recommendation score
-            overall_score = (
-                score_components['material_availability'] * 0.3 +
-                score_components['expiry_urgency'] * 0.4 +
-                score_components['seasonal_preference'] * 0.2 +
-                score_components['cost_efficiency'] * 0.1
-            )
-            
-            recommendations.append({
-                'dish_name': dish,
-                'max_servings_possible': max_servings,
-                'cost_per_serving': round(cost_per_serving, 2),
-                'expiry_material_ratio': round(expiry_material_ratio, 2),  # NEW: Show ratio
-                'recommendation_score': round(overall_score, 2),
-                'material_availability_score': round(score_components['material_availability'], 2),
-                'expiry_urgency_score': round(score_components['expiry_urgency'], 2),
-                'seasonal_preference_score': round(score_components['seasonal_preference'], 2),
-                'cost_efficiency_score': round(score_components['cost_efficiency'], 2),
-                'season': weather_prefs['season'],
-                'uses_expiring_materials': bool(required_materials.intersection(expiry_materials)),
-                'expiring_materials_used': list(required_materials.intersection(expiry_materials))
-            })
+        Args:
+            max_recommendations: Number of dishes returned
+            weights: Weights of the score components ('material_availability',
+                     'expiry_urgency', 'seasonal_preference', 'cost_efficiency';
+                     default ``DEFAULT_WEIGHTS``)
+        """
+        if any(data is None for data in [self.inventory_data, self.recipes_data]):
+            raise ValueError("Inventory and recipe data must be loaded first.")
+        
+        # Get current weather preferences
+        weather_prefs = self._get_weather_preferences()
         
-        # Convert to DataFrame and sort by recommendation score
-        recommendations_df = pd.DataFrame(recommendations)
-        if not recommendations_df.empty:
-            recommendations_df = recommendations_df.sort_values(
-                'recommendation_score', ascending=False
-            ).head(max_recommendations).reset_index(drop=True)
+        scorer = DishScorer(weights)
+        expiry_index = self.expiry_index
+        materials = self.inventory_data.iloc[expiry_index.material_rows].set_index('material_name')
+        recommendations_df = scorer.score(
+            self.bom.menu_lines(), materials, self._near_expiry_days(scorer.expiry_days, expiry_index),
+            preferred_dishes=weather_prefs['preferred_dishes'],
+            preference_multiplier=weather_prefs['preference_multiplier']
+        )
+        recommendations_df.insert(recommendations_df.columns.get_loc('uses_expiring_materials'),
+                                  'season', weather_prefs['season'])
         
-        return recommendations_df
\ No newline at end of file
+        # Sort by recommendation score
+        if recommendations_df.empty:
+            return pd.DataFrame()
+        return recommendations_df.sort_values(
+            'recommendation_score', ascending=False
+        ).head(max_recommendations).reset_index(drop=True)
+
+def _take_rows(frame: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    """Rows of ``frame`` by position with a fresh index; position -1 gives a row of missing values."""
+    return frame.reset_index(drop=True).reindex(positions).reset_index(drop=True)
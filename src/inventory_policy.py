@@ -0,0 +1,318 @@
+"""
+Inventory Policy Module
+Monte Carlo optimization of (s, S) reorder policies per material
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Sequence
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# z-score of the 90th percentile, to turn a P10-P90 spread into a standard deviation
+Z90 = 1.2815515655446004
+
+COST_COMPONENTS = ['holding_cost', 'stockout_cost', 'waste_cost', 'ordering_cost']
+
+
+class InventoryPolicyOptimizer:
+    """
+    Choose a reorder point ``s`` and order-up-to level ``S`` per material.
+
+    Policies are compared in steady state: the daily requirement
+    distributions of the forecast are resampled into a fixed horizon of
+    ``warmup_days + simulation_days`` days (every simulated day draws a
+    forecast day of the same weekday), so the choice does not depend on the
+    length of the forecast. The simulation starts from the current stock, and
+    costs are only counted after the warm-up, once the policy rather than
+    the opening stock drives the inventory.
+
+    Every day of a simulation the stock of expired batches is written off,
+    demand is served first-in first-out (unmet demand is lost), and when the
+    inventory position (on hand + on order) is at or below ``s`` an order
+    brings it up to ``S``, arriving ``supplier_lead_time`` days later.
+    ``S == s`` is the base-stock policy.
+
+    Candidates are ``s = mean lead-time demand + z * its std`` for every
+    ``z`` in ``z_grid`` and ``S = s + q * mean daily demand`` for every ``q``
+    in ``cover_grid``. Each candidate is simulated over the same demand
+    scenarios (common random numbers), vectorized across scenarios and
+    materials, and the cheapest candidate meeting ``target_fill_rate`` is
+    kept (the best fill rate if none does).
+
+    Costs per material, from ``cost_per_unit``: holding at
+    ``holding_rate`` per year, lost sales at ``stockout_cost_factor`` times
+    the unit cost, expired stock at the unit cost, plus ``order_cost`` per
+    order. Expiry uses ``shelf_life_days`` (none when missing) and the
+    ``expiry_date`` of the current stock, or of every lot when the stock is
+    given as lots (``LotInventory.to_frame``).
+    """
+
+    def __init__(self, n_scenarios: int = 1000, z_grid: Sequence[float] = (0.0, 0.5, 1.0, 1.5, 2.0, 3.0),
+                 cover_grid: Sequence[float] = (0.0, 1.0, 2.0, 4.0, 7.0), holding_rate: float = 0.25,
+                 stockout_cost_factor: float = 2.0, order_cost: float = 5.0,
+                 target_fill_rate: Optional[float] = None, default_lead_time: int = 2,
+                 default_cv: float = 0.3, warmup_days: int = 14, simulation_days: int = 56,
+                 random_state: Optional[int] = 42):
+        """
+        Initialize Inventory Policy Optimizer.
+
+        Args:
+            n_scenarios: Demand scenarios simulated per candidate policy
+            z_grid: Safety factors of the reorder point candidates
+            cover_grid: Days of mean demand between ``s`` and ``S`` (0 = base stock)
+            holding_rate: Yearly holding cost as a fraction of the unit cost
+            stockout_cost_factor: Cost of a unit of lost demand, in unit costs
+            order_cost: Fixed cost per purchase order
+            target_fill_rate: Minimum share of demand served (e.g. 0.95)
+            default_lead_time: Lead time (days) of materials without ``supplier_lead_time``
+            default_cv: Coefficient of variation of demand without quantile columns
+            warmup_days: Simulated days before costs are counted
+            simulation_days: Simulated days over which costs are counted
+            random_state: Seed of the demand scenarios
+        """
+        self.n_scenarios = n_scenarios
+        self.z_grid = np.asarray(z_grid, dtype=float)
+        self.cover_grid = np.asarray(cover_grid, dtype=float)
+        self.holding_rate = holding_rate
+        self.stockout_cost_factor = stockout_cost_factor
+        self.order_cost = order_cost
+        self.target_fill_rate = target_fill_rate
+        self.default_lead_time = default_lead_time
+        self.default_cv = default_cv
+        self.warmup_days = warmup_days
+        self.simulation_days = simulation_days
+        self.random_state = random_state
+
+    def optimize(self, requirements: pd.DataFrame, inventory: pd.DataFrame,
+                 requirement_column: str = 'total_material_needed', as_of=None,
+                 lots: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Optimize the policy of every material with a requirement.
+
+        Args:
+            requirements: Daily requirements (``calculate_material_requirements``);
+                          the spread of the p10/p90 columns sets the demand
+                          uncertainty when present
+            inventory: Stock per material with ['material_name', 'current_stock',
+                       'cost_per_unit'] and optionally 'supplier_lead_time',
+                       'shelf_life_days' and 'expiry_date'
+            requirement_column: Mean daily requirement column
+            as_of: Day the simulation starts from, for the expiry of current
+                   stock (default: the day before the first requirement)
+            lots: Current stock as lots with ['material_name', 'quantity',
+                  'expiry_date']; replaces the stock and expiry of ``inventory``
+
+        Returns:
+            DataFrame with one row per material: 'material_name', 'policy',
+            'reorder_point', 'order_up_to', 'fill_rate', 'expected_waste',
+            'expected_orders', 'expected_cost' and the ``COST_COMPONENTS``
+            (totals over the ``simulation_days`` after the warm-up)
+        """
+        if requirements.empty:
+            return pd.DataFrame(columns=['material_name', 'policy', 'reorder_point', 'order_up_to', 'fill_rate',
+                                         'expected_waste', 'expected_orders', 'expected_cost'] + COST_COMPONENTS)
+        mean, std, materials, days = self._demand(requirements, requirement_column)
+        n_days = self.warmup_days + self.simulation_days
+        params = self._material_params(inventory, materials, days, n_days, as_of, lots)
+        demand = self._scenarios(mean, std, days, n_days)
+
+        # Candidate (s, S) pairs around the lead-time demand of every material
+        daily = mean.mean(axis=0)
+        cover_days = params['lead_time'] + 1
+        lead_mean = daily * cover_days
+        lead_std = np.sqrt((std ** 2).mean(axis=0) * cover_days)
+        candidates = [(z, q) for z in self.z_grid for q in self.cover_grid]
+
+        results = []
+        for z, q in candidates:
+            reorder_point = lead_mean + z * lead_std
+            order_up_to = reorder_point + q * daily
+            results.append(self._simulate(demand, reorder_point, order_up_to, params, self.warmup_days))
+        costs = np.stack([r['expected_cost'] for r in results])          # candidates x materials
+        fill = np.stack([r['fill_rate'] for r in results])
+
+        # Cheapest candidate meeting the fill-rate target (best fill rate if none does)
+        eligible = fill >= self.target_fill_rate - 1e-12 if self.target_fill_rate is not None \
+            else np.ones_like(fill, dtype=bool)
+        best = np.where(eligible.any(axis=0),
+                        np.where(eligible, costs, np.inf).argmin(axis=0), fill.argmax(axis=0))
+
+        columns = np.arange(len(materials))
+        z_best = np.array([candidates[i][0] for i in best])
+        q_best = np.array([candidates[i][1] for i in best])
+        policies = pd.DataFrame({
+            'material_name': np.asarray(materials, dtype=object),
+            'policy': np.where(q_best == 0, 'base_stock', 's_S'),
+            'reorder_point': lead_mean + z_best * lead_std,
+            'order_up_to': lead_mean + z_best * lead_std + q_best * daily,
+        })
+        for name in ['fill_rate', 'expected_waste', 'expected_orders', 'expected_cost'] + COST_COMPONENTS:
+            policies[name] = np.stack([r[name] for r in results])[best, columns]
+
+        logger.info(f"Optimized (s, S) policies for {len(materials)} materials: "
+                    f"{len(candidates)} candidates x {self.n_scenarios} scenarios x {n_days} days")
+        return policies
+
+    def _demand(self, requirements: pd.DataFrame, requirement_column: str):
+        """(days x materials) mean and standard deviation of the daily requirement."""
+        dates = pd.DatetimeIndex(pd.to_datetime(requirements['date'], cache=False)).normalize()
+        days = pd.date_range(dates.min(), dates.max(), freq='D')
+        materials = pd.Index(pd.unique(requirements['material_name']))
+
+        def grid(column: str) -> np.ndarray:
+            return (requirements.assign(date=dates)
+                    .pivot_table(index='date', columns='material_name', values=column, aggfunc='sum')
+                    .reindex(index=days, columns=materials).fillna(0).to_numpy())
+
+        mean = grid(requirement_column)
+        low, high = f'{requirement_column}_p10', f'{requirement_column}_p90'
+        if low in requirements.columns and high in requirements.columns:
+            std = np.maximum(grid(high) - grid(low), 0) / (2 * Z90)
+        else:
+            std = self.default_cv * mean
+        return mean, std, materials, days
+
+    def _scenarios(self, mean: np.ndarray, std: np.ndarray, days: pd.DatetimeIndex, n_days: int) -> np.ndarray:
+        """
+        (simulated days x materials x scenarios) demand resampled from the forecast days.
+
+        Every simulated day and scenario draws a forecast day of the same
+        weekday (any day when the forecast has none) and a normal deviate
+        around its mean. Deviates and days come from separate streams, so
+        forecasts of any length with the same daily distribution give the
+        same scenarios.
+        """
+        noise_rng, day_rng = (np.random.default_rng(seed)
+                              for seed in np.random.SeedSequence(self.random_state).spawn(2))
+        weekday = days.dayofweek.to_numpy()
+        simulated_weekday = (weekday[0] + np.arange(n_days)) % 7
+        source = np.empty((n_days, self.n_scenarios), dtype=int)
+        for day in range(7):
+            pool = np.flatnonzero(weekday == day)
+            pool = pool if len(pool) else np.arange(len(days))
+            rows = simulated_weekday == day
+            source[rows] = pool[day_rng.integers(len(pool), size=(rows.sum(), self.n_scenarios))]
+
+        # Single precision halves the memory traffic of the simulation
+        mean, std = mean.astype(np.float32).T, std.astype(np.float32).T
+        demand = np.empty((n_days, mean.shape[0], self.n_scenarios), dtype=np.float32)
+        for t in range(n_days):
+            noise = noise_rng.standard_normal(demand.shape[1:], dtype=np.float32)
+            np.maximum(0, mean[:, source[t]] + std[:, source[t]] * noise, out=demand[t])
+        return demand
+
+    def _material_params(self, inventory: pd.DataFrame, materials: pd.Index, days: pd.DatetimeIndex,
+                         n_days: int, as_of, lots: Optional[pd.DataFrame] = None) -> Dict[str, np.ndarray]:
+        """Stock, costs, lead time and shelf life per material (missing materials hold no stock)."""
+        inventory = inventory.drop_duplicates('material_name', keep='last').set_index('material_name')
+        inventory = inventory.reindex(materials)
+
+        def column(name: str, default: float) -> np.ndarray:
+            if name not in inventory.columns:
+                return np.full(len(materials), default, dtype=float)
+            return pd.to_numeric(inventory[name], errors='coerce').fillna(default).to_numpy(dtype=float)
+
+        horizon = n_days + 1
+        # Shelf lives past the horizon never expire within the simulation
+        shelf_life = np.minimum(column('shelf_life_days', horizon), horizon).clip(min=1).astype(int)
+        start = pd.Timestamp(as_of).normalize() if as_of is not None else days[0] - pd.Timedelta(days=1)
+        if lots is None:
+            lots = pd.DataFrame({'material_name': materials, 'quantity': column('current_stock', 0.0),
+                                 'expiry_date': inventory['expiry_date'].to_numpy()
+                                 if 'expiry_date' in inventory.columns else pd.NaT})
+        lot_material = materials.get_indexer(lots['material_name'])
+        known = lot_material >= 0
+        lot_material = lot_material[known]
+        quantity = pd.to_numeric(lots['quantity'], errors='coerce').fillna(0).to_numpy(dtype=float)[known]
+        remaining = (pd.to_datetime(lots['expiry_date']) - start).dt.days.to_numpy(dtype=float)[known]
+        # Current stock is the oldest, so it expires no later than a fresh batch
+        remaining = np.where(np.isnan(remaining), shelf_life[lot_material],
+                             np.minimum(remaining, shelf_life[lot_material])).clip(min=0).astype(int)
+        # Cumulative current stock expired by each day
+        stock_expiring = np.bincount(remaining * len(materials) + lot_material, weights=quantity,
+                                     minlength=(horizon + 1) * len(materials))
+        stock_expiring = np.cumsum(stock_expiring.reshape(horizon + 1, len(materials)), axis=0)
+
+        unit_cost = column('cost_per_unit', 0.0)
+        return {
+            'stock': np.bincount(lot_material, weights=quantity, minlength=len(materials)),
+            'unit_cost': unit_cost,
+            'holding_cost': unit_cost * self.holding_rate / 365,
+            'lead_time': np.maximum(column('supplier_lead_time', self.default_lead_time), 1).astype(int),
+            'shelf_life': shelf_life,
+            'stock_expiring': stock_expiring
+        }
+
+    def _simulate(self, demand: np.ndarray, reorder_point: np.ndarray, order_up_to: np.ndarray,
+                  params: Dict[str, np.ndarray], warmup: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Run one (s, S) candidate over every scenario, counting costs after
+        the first ``warmup`` days.
+
+        Batches are consumed first-expired first-out, so the stock expiring by
+        day t is always the oldest: current lots once t reaches their expiry, plus
+        everything that arrived on or before ``t - shelf_life``. Whatever of
+        that has been neither consumed nor written off yet is waste.
+        """
+        n_days, n_materials, n_scenarios = demand.shape
+        dtype = demand.dtype
+        materials = np.arange(n_materials)
+        lead_time, shelf_life = params['lead_time'], params['shelf_life']
+        stock = params['stock'][:, None].astype(dtype)
+        reorder_point, order_up_to = reorder_point[:, None].astype(dtype), order_up_to[:, None].astype(dtype)
+
+        shape = (n_materials, n_scenarios)
+        on_hand = np.repeat(stock, n_scenarios, axis=1)
+        on_order = np.zeros(shape, dtype=dtype)
+        ordered = np.zeros((n_days + 1,) + shape, dtype=dtype)     # order quantity by day
+        arrived = np.zeros((n_days + 1,) + shape, dtype=dtype)     # cumulative arrivals by day
+        used = np.zeros(shape, dtype=dtype)                         # consumed + written off
+        totals = {name: np.zeros(shape, dtype=dtype) for name in ['held', 'sold', 'wasted', 'orders']}
+
+        for t in range(1, n_days + 1):
+            # Orders placed at the end of day t - lead_time arrive at the start of day t
+            arrivals = ordered[np.maximum(t - lead_time, 0), materials]
+            on_hand += arrivals
+            on_order -= arrivals
+            np.add(arrived[t - 1], arrivals, out=arrived[t])
+
+            # Write off expired stock (FIFO prefix: current stock, then old arrivals)
+            expiring = arrived[np.maximum(t - shelf_life, 0), materials]
+            expiring += params['stock_expiring'][t].astype(dtype)[:, None]
+            wasted = np.minimum(np.maximum(expiring - used, 0), on_hand)
+            on_hand -= wasted
+
+            sold = np.minimum(on_hand, demand[t - 1])
+            on_hand -= sold
+            used += wasted
+            used += sold
+
+            # Review: order up to S when the inventory position is at or below s (S >= s)
+            position = on_hand + on_order
+            trigger = position <= reorder_point
+            np.multiply(order_up_to - position, trigger, out=ordered[t])
+            on_order += ordered[t]
+
+            if t > warmup:
+                totals['held'] += on_hand
+                totals['sold'] += sold
+                totals['wasted'] += wasted
+                totals['orders'] += trigger & (ordered[t] > 0)
+
+        totals['lost'] = demand[warmup:].sum(axis=0) - totals['sold']
+        mean = {name: value.mean(axis=1, dtype=float) for name, value in totals.items()}
+        demanded = mean['sold'] + mean['lost']
+        result = {
+            'holding_cost': mean['held'] * params['holding_cost'],
+            'stockout_cost': mean['lost'] * params['unit_cost'] * self.stockout_cost_factor,
+            'waste_cost': mean['wasted'] * params['unit_cost'],
+            'ordering_cost': mean['orders'] * self.order_cost,
+            'fill_rate': np.where(demanded > 0, mean['sold'] / np.where(demanded > 0, demanded, 1), 1.0),
+            'expected_waste': mean['wasted'],
+            'expected_orders': mean['orders']
+        }
+        result['expected_cost'] = sum(result[name] for name in COST_COMPONENTS)
+        return result
@@ -0,0 +1,330 @@
+"""
+Lot Inventory Module
+Lot-level stock with per-lot expiry and first-expired first-out consumption
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCATION = 'default'
+
+# Lots without an expiry date sort after every dated lot
+NO_EXPIRY = np.iinfo(np.int64).max
+
+
+class LotInventory:
+    """
+    Stock held as lots: deliveries of one material at one location, each with
+    its own quantity and expiry date.
+
+    Lots live in parallel NumPy columns (material and location codes,
+    quantity, expiry and receipt timestamps as int64 nanoseconds) that grow
+    by doubling, so tens of thousands of lots take a few hundred kilobytes.
+    Two sorted indexes are built lazily and dropped whenever lots are added
+    or compacted:
+
+    - the expiry index orders lots by expiry, so "what expires before T" is a
+      binary search plus the matching slice;
+    - the FEFO index orders lots by (material, location, expiry), so every
+      material's lots at a location are a contiguous slice consumed in
+      expiry order.
+
+    Consuming or writing off stock only changes quantities; empty lots stay
+    in the indexes until ``compact``.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize Lot Inventory.
+
+        Args:
+            capacity: Initial number of lots the arrays can hold
+        """
+        self.materials: List[str] = []
+        self.locations: List[str] = []
+        self._material_codes: Dict[str, int] = {}
+        self._location_codes: Dict[str, int] = {}
+        self._size = 0
+        self._next_id = 0
+        self._allocate(max(capacity, 1))
+        self._expiry_order = None
+        self._fefo_order = None
+
+    @classmethod
+    def from_frame(cls, lots: pd.DataFrame) -> 'LotInventory':
+        """Build an inventory from lot rows (see ``add_lots``)."""
+        inventory = cls(capacity=len(lots))
+        inventory.add_lots(lots)
+        return inventory
+
+    @classmethod
+    def from_inventory(cls, inventory: pd.DataFrame, location: str = DEFAULT_LOCATION) -> 'LotInventory':
+        """One lot per material of a per-material inventory ('current_stock', 'expiry_date')."""
+        lots = pd.DataFrame({
+            'material_name': inventory['material_name'],
+            'quantity': inventory['current_stock'],
+            'expiry_date': inventory['expiry_date'] if 'expiry_date' in inventory.columns else pd.NaT,
+            'location': location
+        })
+        return cls.from_frame(lots)
+
+    def __len__(self) -> int:
+        """Number of lots holding stock."""
+        return int(np.count_nonzero(self._quantity[:self._size] > 0))
+
+    def _allocate(self, capacity: int) -> None:
+        """Grow (or create) the lot columns to ``capacity`` rows."""
+        columns = {'_lot_id': np.int64, '_material': np.int32, '_location': np.int32,
+                   '_quantity': np.float64, '_expiry': np.int64, '_received': np.int64}
+        for name, dtype in columns.items():
+            grown = np.zeros(capacity, dtype=dtype)
+            if hasattr(self, name):
+                grown[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, grown)
+
+    def _codes(self, names: pd.Series, table: List[str], codes: Dict[str, int]) -> np.ndarray:
+        """Integer codes of ``names``, registering new names."""
+        uniques, inverse = np.unique(names.astype(str).to_numpy(), return_inverse=True)
+        for name in uniques:
+            if name not in codes:
+                codes[name] = len(table)
+                table.append(name)
+        return np.array([codes[name] for name in uniques], dtype=np.int32)[inverse]
+
+    def add_lots(self, lots: pd.DataFrame) -> np.ndarray:
+        """
+        Add received lots.
+
+        Args:
+            lots: Rows with ['material_name', 'quantity', 'expiry_date'] and
+                  optionally 'location' (default ``DEFAULT_LOCATION``) and
+                  'received_date'; a missing expiry date never expires
+
+        Returns:
+            Lot ids of the new lots
+        """
+        n = len(lots)
+        if self._size + n > len(self._quantity):
+            self._allocate(max(2 * len(self._quantity), self._size + n))
+
+        location = lots['location'] if 'location' in lots.columns else pd.Series(DEFAULT_LOCATION, index=lots.index)
+        received = lots['received_date'] if 'received_date' in lots.columns else pd.Series(pd.NaT, index=lots.index)
+        rows = slice(self._size, self._size + n)
+        lot_ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+
+        self._lot_id[rows] = lot_ids
+        self._material[rows] = self._codes(lots['material_name'], self.materials, self._material_codes)
+        self._location[rows] = self._codes(location, self.locations, self._location_codes)
+        self._quantity[rows] = pd.to_numeric(lots['quantity'], errors='coerce').fillna(0).clip(lower=0).to_numpy()
+        self._expiry[rows] = _timestamps(lots['expiry_date'], missing=NO_EXPIRY)
+        self._received[rows] = _timestamps(received, missing=np.iinfo(np.int64).min)
+        self._size += n
+        self._next_id += n
+        self._expiry_order = self._fefo_order = None
+        return lot_ids
+
+    def receive(self, material_name: str, quantity: float, expiry_date=None,
+                location: str = DEFAULT_LOCATION, received_date=None) -> int:
+        """Add a single lot and return its id."""
+        return int(self.add_lots(pd.DataFrame({
+            'material_name': [material_name], 'quantity': [quantity], 'expiry_date': [expiry_date],
+            'location': [location], 'received_date': [received_date]
+        }))[0])
+
+    def compact(self) -> None:
+        """Drop empty lots (lot ids are kept)."""
+        keep = np.flatnonzero(self._quantity[:self._size] > 0)
+        for name in ['_lot_id', '_material', '_location', '_quantity', '_expiry', '_received']:
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+        self._size = len(keep)
+        self._expiry_order = self._fefo_order = None
+
+    @property
+    def expiry_index(self) -> np.ndarray:
+        """Lot rows ordered by expiry."""
+        if self._expiry_order is None:
+            self._expiry_order = np.argsort(self._expiry[:self._size], kind='stable')
+        return self._expiry_order
+
+    @property
+    def fefo_index(self) -> np.ndarray:
+        """Lot rows ordered by material, location and expiry."""
+        if self._fefo_order is None:
+            n = self._size
+            self._fefo_order = np.lexsort((self._lot_id[:n], self._expiry[:n], self._location[:n], self._material[:n]))
+        return self._fefo_order
+
+    def _group_keys(self, rows: np.ndarray) -> np.ndarray:
+        """(material, location) key of lot rows, in FEFO index order."""
+        return self._material[rows].astype(np.int64) * max(len(self.locations), 1) + self._location[rows]
+
+    def _frame(self, rows: np.ndarray) -> pd.DataFrame:
+        """Lot rows as a DataFrame."""
+        return pd.DataFrame({
+            'lot_id': self._lot_id[rows],
+            'material_name': np.asarray(self.materials, dtype=object)[self._material[rows]],
+            'location': np.asarray(self.locations, dtype=object)[self._location[rows]],
+            'quantity': self._quantity[rows],
+            'expiry_date': _datetimes(self._expiry[rows], NO_EXPIRY),
+            'received_date': _datetimes(self._received[rows], np.iinfo(np.int64).min)
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        """Lots holding stock, in expiry order."""
+        rows = self.expiry_index
+        return self._frame(rows[self._quantity[rows] > 0])
+
+    def expiring(self, before, after=None, location: Optional[str] = None) -> pd.DataFrame:
+        """
+        Lots holding stock that expire on or before ``before``.
+
+        Args:
+            before: Latest expiry (inclusive)
+            after: Only lots expiring strictly after this time (e.g. ``as_of``
+                   to leave out lots that already expired)
+            location: Only lots at this location
+
+        Returns:
+            Lot rows in expiry order
+        """
+        expiry = self._expiry[self.expiry_index]
+        start = np.searchsorted(expiry, pd.Timestamp(after).value, side='right') if after is not None else 0
+        end = np.searchsorted(expiry, pd.Timestamp(before).value, side='right')
+        rows = self.expiry_index[start:end]
+        keep = self._quantity[rows] > 0
+        if location is not None:
+            keep &= self._location[rows] == self._location_codes.get(location, -1)
+        return self._frame(rows[keep])
+
+    def stock(self, as_of=None, location: Optional[str] = None, by_location: bool = False) -> pd.DataFrame:
+        """
+        Stock per material, in the layout of ``InventoryOptimizer.inventory_data``.
+
+        Args:
+            as_of: Leave out lots expired at this time
+            location: Only lots at this location
+            by_location: One row per material and location
+
+        Returns:
+            DataFrame with 'material_name' (and 'location'), 'current_stock',
+            'expiry_date' (earliest expiry of the lots counted) and 'lot_count'
+        """
+        rows = self.fefo_index
+        keep = self._quantity[rows] > 0
+        if as_of is not None:
+            keep &= self._expiry[rows] > pd.Timestamp(as_of).value
+        if location is not None:
+            keep &= self._location[rows] == self._location_codes.get(location, -1)
+        rows = rows[keep]
+
+        # The FEFO order keeps every material (and location) contiguous
+        keys = self._group_keys(rows) if by_location else self._material[rows].astype(np.int64)
+        starts = np.flatnonzero(np.diff(keys, prepend=-1))
+        empty = len(rows) == 0
+        result = pd.DataFrame({
+            'material_name': np.asarray(self.materials, dtype=object)[self._material[rows][starts]],
+            'current_stock': np.array([]) if empty else np.add.reduceat(self._quantity[rows], starts),
+            'expiry_date': _datetimes(np.array([], dtype=np.int64) if empty
+                                      else np.minimum.reduceat(self._expiry[rows], starts), NO_EXPIRY),
+            'lot_count': np.diff(np.append(starts, len(rows)))
+        })
+        if by_location:
+            result.insert(1, 'location', np.asarray(self.locations, dtype=object)[self._location[rows][starts]])
+        return result
+
+    def consume(self, demand: pd.DataFrame, as_of=None) -> pd.DataFrame:
+        """
+        Take stock first-expired first-out.
+
+        Each (material, location) request is served from that material's
+        lots at the location in expiry order; lots expired at ``as_of`` are
+        skipped. All requests are allocated at once: the lots of the
+        requested groups are cut from the FEFO index and a grouped cumulative
+        sum decides how much each lot gives.
+
+        Args:
+            demand: Rows with ['material_name', 'quantity'] and optionally
+                    'location' (default ``DEFAULT_LOCATION``); repeated
+                    requests add up
+            as_of: Time of consumption, to skip expired lots
+
+        Returns:
+            One row per lot drawn from: 'lot_id', 'material_name', 'location',
+            'expiry_date' and 'quantity' taken. Requests larger than the
+            stock take everything and are logged.
+        """
+        location = demand['location'] if 'location' in demand.columns else pd.Series(DEFAULT_LOCATION, index=demand.index)
+        material_codes = demand['material_name'].map(self._material_codes)
+        location_codes = location.map(self._location_codes)
+        quantity = pd.to_numeric(demand['quantity'], errors='coerce').fillna(0).to_numpy()
+        known = (material_codes.notna() & location_codes.notna()).to_numpy()
+
+        keys = (material_codes[known].to_numpy(np.int64) * max(len(self.locations), 1)
+                + location_codes[known].to_numpy(np.int64))
+        request_keys, inverse = np.unique(keys, return_inverse=True)
+        requested = np.bincount(inverse, weights=quantity[known], minlength=len(request_keys))
+
+        # Lots of the requested groups, in FEFO order
+        order = self.fefo_index
+        sorted_keys = self._group_keys(order)
+        starts = np.searchsorted(sorted_keys, request_keys, side='left')
+        lengths = np.searchsorted(sorted_keys, request_keys, side='right') - starts
+        group = np.repeat(np.arange(len(request_keys)), lengths)
+        offsets = np.cumsum(lengths) - lengths
+        rows = order[np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())]
+
+        available = self._quantity[rows].copy()
+        if as_of is not None:
+            available[self._expiry[rows] <= pd.Timestamp(as_of).value] = 0
+        # Stock of the earlier lots of the same group
+        cumulative = np.concatenate(([0.0], np.cumsum(available)))
+        before = cumulative[:-1] - np.repeat(cumulative[offsets], lengths)
+        taken = np.clip(requested[group] - before, 0, available)
+        self._quantity[rows] -= taken
+
+        served = np.bincount(group, weights=taken, minlength=len(request_keys))
+        short = requested - served > 1e-9
+        unknown = quantity[~known] > 0
+        if short.any() or unknown.any():
+            logger.warning(f"{int(short.sum() + unknown.sum())} requests exceed the available stock "
+                           f"(short by {(requested - served)[short].sum() + quantity[~known][unknown].sum():.2f})")
+
+        drawn = taken > 0
+        allocations = self._frame(rows[drawn]).drop(columns=['quantity', 'received_date'])
+        allocations['quantity'] = taken[drawn]
+        return allocations
+
+    def write_off_expired(self, as_of) -> pd.DataFrame:
+        """
+        Empty every lot expired at ``as_of`` (expiry on or before it).
+
+        Returns:
+            The written-off lots with the quantity lost
+        """
+        expired = self.expiring(as_of)
+        rows = self.expiry_index[:np.searchsorted(self._expiry[self.expiry_index], pd.Timestamp(as_of).value,
+                                                  side='right')]
+        self._quantity[rows] = 0
+        if not expired.empty:
+            logger.info(f"Wrote off {len(expired)} expired lots ({expired['quantity'].sum():.2f} units)")
+        return expired
+
+
+def _timestamps(values: pd.Series, missing: int) -> np.ndarray:
+    """Datetime-like values as int64 nanoseconds, ``missing`` for NaT."""
+    dates = pd.to_datetime(values, cache=False)
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+    nanoseconds = dates.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    return np.where(dates.isna().to_numpy(), missing, nanoseconds)
+
+
+def _datetimes(values: np.ndarray, missing: int) -> np.ndarray:
+    """int64 nanoseconds back to datetime64, NaT for ``missing``."""
+    return np.where(values == missing, np.datetime64('NaT'), values.astype('datetime64[ns]'))
@@ -13,6 +13,29 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# First day of Tết (1st day of the 1st lunar month, Vietnam time zone)
+LUNAR_NEW_YEAR = {
+    2015: '2015-02-19', 2016: '2016-02-08', 2017: '2017-01-28', 2018: '2018-02-16',
+    2019: '2019-02-05', 2020: '2020-01-25', 2021: '2021-02-12', 2022: '2022-02-01',
+    2023: '2023-01-22', 2024: '2024-02-10', 2025: '2025-01-29', 2026: '2026-02-17',
+    2027: '2027-02-06', 2028: '2028-01-26', 2029: '2029-02-13', 2030: '2030-02-02',
+    2031: '2031-01-23', 2032: '2032-02-11', 2033: '2033-01-31', 2034: '2034-02-19',
+    2035: '2035-02-08', 2036: '2036-01-28', 2037: '2037-02-15', 2038: '2038-02-04',
+    2039: '2039-01-24', 2040: '2040-02-12'
+}
+
+# Hung Kings Festival (10th day of the 3rd lunar month)
+HUNG_KINGS_FESTIVAL = {
+    2015: '2015-04-28', 2016: '2016-04-16', 2017: '2017-04-06', 2018: '2018-04-25',
+    2019: '2019-04-14', 2020: '2020-04-02', 2021: '2021-04-21', 2022: '2022-04-10',
+    2023: '2023-04-29', 2024: '2024-04-18', 2025: '2025-04-07', 2026: '2026-04-26',
+    2027: '2027-04-16', 2028: '2028-04-04', 2029: '2029-04-23', 2030: '2030-04-12',
+    2031: '2031-04-01', 2032: '2032-04-19', 2033: '2033-04-09', 2034: '2034-04-28',
+    2035: '2035-04-17', 2036: '2036-04-06', 2037: '2037-04-24', 2038: '2038-04-13',
+    2039: '2039-04-03', 2040: '2040-04-20'
+}
+
+
 class MarketFactors:
     """
     Integrate market factors into demand forecasting:
@@ -32,45 +55,104 @@ class MarketFactors:
         """Initialize Vietnamese holiday and event calendars"""
         
         # Vietnamese Public Holidays 2025
-        self.holidays_2025 = {
-            '2025-01-01': 'New Year',
-            '2025-01-28': 'Lunar New Year Eve',
-            '2025-01-29': 'Lunar New Year (Tết) Day 1',
-            '2025-01-30': 'Lunar New Year (Tết) Day 2',
-            '2025-01-31': 'Lunar New Year (Tết) Day 3',
-            '2025-02-01': 'Lunar New Year (Tết) Day 4',
-            '2025-02-02': 'Lunar New Year (Tết) Day 5',
-            '2025-04-10': 'Hung Kings Festival',
-            '2025-04-30': 'Reunification Day',
-            '2025-05-01': 'Labor Day',
-            '2025-09-02': 'National Day',
-            '2025-09-03': 'National Day Holiday'
-        }
+        self.holidays_2025 = self.public_holidays(2025)
         
         # Major events
-        self.major_events = {
-            '2025-02-14': 'Valentine Day',
-            '2025-03-08': 'Women Day',
-            '2025-05-11': 'Mother Day',
-            '2025-06-15': 'Father Day',
-            '2025-10-20': 'Vietnamese Women Day',
-            '2025-11-20': 'Teachers Day',
-            '2025-12-24': 'Christmas Eve',
-            '2025-12-25': 'Christmas'
-        }
+        self.major_events = self.events(2025)
         
         # School calendar
-        self.school_holidays = {
-            'summer': [('2025-06-01', '2025-08-31')],
-            'tet': [('2025-01-25', '2025-02-10')],
+        self.school_holidays = self.school_calendar(2025)
+    
+    
+    def public_holidays(self, year: int) -> Dict[str, str]:
+        """
+        Vietnamese public holidays of one year.
+        
+        Fixed-date holidays are generated for any year; the lunar ones (Tết
+        and the Hung Kings Festival) for the years of ``LUNAR_NEW_YEAR``.
+        
+        Args:
+            year: Calendar year
+            
+        Returns:
+            Dict of 'YYYY-MM-DD' -> holiday name
+        """
+        holidays = {f'{year}-01-01': 'New Year'}
+        tet = self.lunar_new_year(year)
+        if tet is not None:
+            holidays[(tet - timedelta(days=1)).strftime('%Y-%m-%d')] = 'Lunar New Year Eve'
+            for day in range(5):
+                date = (tet + timedelta(days=day)).strftime('%Y-%m-%d')
+                holidays[date] = f'Lunar New Year (Tết) Day {day + 1}'
+            holidays[HUNG_KINGS_FESTIVAL[year]] = 'Hung Kings Festival'
+        holidays.update({
+            f'{year}-04-30': 'Reunification Day',
+            f'{year}-05-01': 'Labor Day',
+            f'{year}-09-02': 'National Day',
+            f'{year}-09-03': 'National Day Holiday'
+        })
+        return dict(sorted(holidays.items()))
+    
+    
+    def events(self, year: int) -> Dict[str, str]:
+        """
+        Major (non-holiday) events of one year.
+        
+        Args:
+            year: Calendar year
+            
+        Returns:
+            Dict of 'YYYY-MM-DD' -> event name
+        """
+        def nth_sunday(month: int, n: int) -> str:
+            first = datetime(year, month, 1)
+            return (first + timedelta(days=(6 - first.weekday()) % 7 + 7 * (n - 1))).strftime('%Y-%m-%d')
+        
+        return {
+            f'{year}-02-14': 'Valentine Day',
+            f'{year}-03-08': 'Women Day',
+            nth_sunday(5, 2): 'Mother Day',
+            nth_sunday(6, 3): 'Father Day',
+            f'{year}-10-20': 'Vietnamese Women Day',
+            f'{year}-11-20': 'Teachers Day',
+            f'{year}-12-24': 'Christmas Eve',
+            f'{year}-12-25': 'Christmas'
+        }
+    
+    
+    def school_calendar(self, year: int) -> Dict[str, List]:
+        """
+        School holiday and exam periods of one year.
+        
+        Args:
+            year: Calendar year
+            
+        Returns:
+            Dict of period type -> list of inclusive ('YYYY-MM-DD', 'YYYY-MM-DD') ranges
+        """
+        tet = self.lunar_new_year(year)
+        tet_break = [] if tet is None else [((tet - timedelta(days=4)).strftime('%Y-%m-%d'),
+                                             (tet + timedelta(days=12)).strftime('%Y-%m-%d'))]
+        return {
+            'summer': [(f'{year}-06-01', f'{year}-08-31')],
+            'tet': tet_break,
             'exam_weeks': [
-                ('2025-01-02', '2025-01-15'),  # Semester 1 exams
-                ('2025-05-15', '2025-05-30'),  # Semester 2 exams
-                ('2025-12-15', '2025-12-30')   # Final exams
+                (f'{year}-01-02', f'{year}-01-15'),  # Semester 1 exams
+                (f'{year}-05-15', f'{year}-05-30'),  # Semester 2 exams
+                (f'{year}-12-15', f'{year}-12-30')   # Final exams
             ]
         }
     
     
+    @staticmethod
+    def lunar_new_year(year: int) -> Optional[datetime]:
+        """First day of Tết in one year (None outside ``LUNAR_NEW_YEAR``)."""
+        if year not in LUNAR_NEW_YEAR:
+            logger.warning(f"No lunar calendar for {year}: Tết and Hung Kings Festival are not flagged")
+            return None
+        return datetime.strptime(LUNAR_NEW_YEAR[year], '%Y-%m-%d')
+    
+    
     # ==================== ECONOMIC FACTORS ====================
     
     def get_economic_features(self, date: datetime) -> Dict:
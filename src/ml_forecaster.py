@@ -3,6 +3,8 @@ Machine Learning Forecaster Module for Inventory Optimization
 Uses advanced ML algorithms: SARIMA, XGBoost, and Prophet
 """
 
+import os
+import copy
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -23,29 +25,160 @@ except ImportError:
     PROPHET_AVAILABLE = False
     print("Warning: Prophet not available. Install with: pip install prophet")
 
+from src.parallel_utils import parallel_map, VALID_BACKENDS
+from src.model_registry import ModelRegistry
+from src.feature_engine import FeatureEngine
+from src.calendar_features import calendar_lookup
+from src.intermittent import classify_demand, fit_intermittent, SPARSE_CLASSES
+
 
 class MLForecaster:
     """
     Advanced Machine Learning forecaster for demand prediction.
-    Supports multiple algorithms: SARIMA, XGBoost, Random Forest, and Prophet.
+    Supports multiple algorithms: SARIMA, XGBoost, Random Forest, Prophet
+    and Croston-type intermittent demand models.
     """
     
-    def __init__(self, algorithm: str = 'sarima'):
+    # Default hyperparameters for each algorithm
+    DEFAULT_PARAMS = {
+        'sarima': {
+            'order': (1, 1, 1),              # Non-seasonal: AR(1), I(1), MA(1)
+            'seasonal_order': (1, 1, 1, 7),  # Seasonal: weekly pattern
+            'maxiter': 200
+        },
+        'xgboost': {
+            'n_estimators': 100,
+            'max_depth': 5,
+            'learning_rate': 0.1,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            'random_state': 42,
+            'objective': 'reg:squarederror'
+        },
+        'random_forest': {
+            'n_estimators': 100,
+            'max_depth': 10,
+            'min_samples_split': 5,
+            'min_samples_leaf': 2,
+            'random_state': 42,
+            'n_jobs': -1
+        },
+        'xgboost_global': {
+            'n_estimators': 300,
+            'max_depth': 6,
+            'learning_rate': 0.1,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            'random_state': 42,
+            'objective': 'reg:squarederror',
+            'tree_method': 'hist'
+        },
+        'prophet': {
+            'yearly_seasonality': True,
+            'weekly_seasonality': True,
+            'daily_seasonality': False,
+            'seasonality_mode': 'multiplicative',
+            'changepoint_prior_scale': 0.05,
+            'interval_width': 0.8             # yhat_lower/upper = P10/P90
+        },
+        'croston': {
+            'method': 'sba',                  # 'croston', 'sba' or 'tsb'
+            'alpha': 0.1,                     # Smoothing of size and interval
+            'beta': 0.1                       # Smoothing of demand probability (TSB)
+        }
+    }
+    
+    # Quantile levels of the probabilistic forecast and their output columns
+    QUANTILES = (0.1, 0.5, 0.9)
+    QUANTILE_COLUMNS = ['p10', 'p50', 'p90']
+    
+    # Calendar features shared by the tree models
+    CALENDAR_FEATURES = [
+        'month', 'day_of_week', 'day_of_year', 'week_of_year', 'quarter',
+        'month_sin', 'month_cos', 'day_of_week_sin', 'day_of_week_cos',
+        'is_weekend', 'is_winter', 'is_summer', 'is_spring', 'is_fall',
+        'is_public_holiday', 'is_major_event', 'is_school_holiday'
+    ]
+    
+    # Lags of the global model; the smallest lag is also the number of days
+    # that can be predicted in one batch before predictions feed back as lags
+    GLOBAL_LAGS = [7, 14, 28]
+    
+    # Per-dish algorithms whose models train on several threads themselves
+    THREADED_ALGORITHMS = ['xgboost', 'random_forest']
+
+    # Per-dish algorithms whose sparse dishes can be routed to Croston
+    ROUTABLE_ALGORITHMS = ['sarima', 'xgboost', 'random_forest', 'prophet']
+    
+    def __init__(self, algorithm: str = 'sarima', n_jobs: int = 1, backend: str = 'process',
+                 model_params: Optional[Dict] = None, feature_engine: Optional[FeatureEngine] = None,
+                 dish_params: Optional[Dict[str, Dict]] = None, selector=None,
+                 quantiles: bool = True, route_intermittent: bool = False, as_of=None):
         """
         Initialize ML Forecaster.
         
         Args:
-            algorithm: 'sarima', 'xgboost', 'random_forest', or 'prophet'
+            algorithm: 'sarima', 'xgboost', 'random_forest', 'prophet',
+                       'croston' (Croston/SBA/TSB intermittent demand models),
+                       'xgboost_global' (one XGBoost model shared by all dishes), or
+                       'auto' (best algorithm per dish, chosen by backtest)
+            n_jobs: Number of dishes trained in parallel (1 = serial, -1 = all cores)
+            backend: Parallel backend for training, 'process' or 'thread'
+            model_params: Hyperparameters overriding ``DEFAULT_PARAMS`` for the algorithm
+            feature_engine: Lag/rolling/EWMA feature engine for the tree models.
+                            Per-dish XGBoost/Random Forest use calendar features
+                            only unless one is given; the global model always
+                            uses one (lags ``GLOBAL_LAGS`` by default).
+            dish_params: Tuned hyperparameters per dish name (key '__all__'
+                         applies to every dish and to the global model), applied
+                         on top of ``model_params``. When omitted, ``fit`` picks
+                         up the configs saved in the registry by the tuner.
+            selector: ``AlgorithmSelector`` used by 'auto' (default settings
+                      if omitted)
+            quantiles: Add P10/P50/P90 columns to the predictions (XGBoost
+                       then also trains a quantile-objective model per dish,
+                       about doubling its training time; backtests and tuning
+                       turn them off)
+            route_intermittent: Classify dishes by sparsity (ADI / CV²) and fit
+                                intermittent and lumpy dishes with Croston
+                                instead of a per-dish algorithm
+            as_of: Clock of the forecaster: ``fit`` ignores orders after it and
+                   ``predict`` forecasts from it by default (None = now)
         """
         self.algorithm = algorithm.lower()
         self.models = {}
         self.label_encoder = LabelEncoder()
+        self.category_encoder = LabelEncoder()
+        self.cuisine_encoder = LabelEncoder()
+        self.global_model = None
         self.is_fitted = False
+        self.history = None
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.selector = selector
+        self.quantiles = quantiles
+        self.route_intermittent = route_intermittent
+        self.as_of = pd.Timestamp(as_of) if as_of is not None else None
+        self.demand_classes = {}
+        self.selection = {}
+        self.sub_forecasters = {}
         
         # Validate algorithm choice
-        valid_algorithms = ['sarima', 'xgboost', 'random_forest', 'prophet']
+        valid_algorithms = ['sarima', 'xgboost', 'random_forest', 'prophet', 'croston',
+                            'xgboost_global', 'auto']
         if self.algorithm not in valid_algorithms:
             raise ValueError(f"Algorithm must be one of {valid_algorithms}")
+        
+        if self.backend not in VALID_BACKENDS:
+            raise ValueError(f"Backend must be one of {VALID_BACKENDS}")
+        
+        self.model_params = copy.deepcopy(self.DEFAULT_PARAMS.get(self.algorithm, {}))
+        self.model_params.update(model_params or {})
+        self.dish_params = copy.deepcopy(dish_params) if dish_params else {}
+        
+        if feature_engine is None and self.algorithm == 'xgboost_global':
+            feature_engine = FeatureEngine(lags=self.GLOBAL_LAGS, rolling_windows=(7, 28), ewm_spans=(7, 28))
+        self.feature_engine = feature_engine
             
         if self.algorithm == 'prophet' and not PROPHET_AVAILABLE:
             raise ImportError("Prophet not installed. Please install: pip install prophet")
@@ -54,6 +187,9 @@ class MLForecaster:
         """
         Prepare time-based features for ML models.
         
+        Joins the rows against the precomputed calendar table
+        (see ``src.calendar_features``).
+        
         Args:
             df: DataFrame with 'date' column
             
@@ -63,31 +199,11 @@ class MLForecaster:
         df = df.copy()
         df['date'] = pd.to_datetime(df['date'])
         
-        # Time-based features
-        df['year'] = df['date'].dt.year
-        df['month'] = df['date'].dt.month
-        df['day'] = df['date'].dt.day
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['day_of_year'] = df['date'].dt.dayofyear
-        df['week_of_year'] = df['date'].dt.isocalendar().week
-        df['quarter'] = df['date'].dt.quarter
-        
-        # Cyclical features (sin/cos encoding for periodicity)
-        df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-        df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-        df['day_of_week_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['day_of_week_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-        
-        # Boolean features
-        df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
-        df['is_month_start'] = df['date'].dt.is_month_start.astype(int)
-        df['is_month_end'] = df['date'].dt.is_month_end.astype(int)
-        
-        # Seasonal indicators
-        df['is_winter'] = df['month'].isin([12, 1, 2]).astype(int)
-        df['is_summer'] = df['month'].isin([6, 7, 8]).astype(int)
-        df['is_spring'] = df['month'].isin([3, 4, 5]).astype(int)
-        df['is_fall'] = df['month'].isin([9, 10, 11]).astype(int)
+        # Calendar, seasonal and holiday columns come from the shared
+        # date dimension table instead of being recomputed per call
+        calendar = calendar_lookup(df['date'])
+        for col in calendar.columns:
+            df[col] = calendar[col].to_numpy()
         
         return df
     
@@ -109,18 +225,17 @@ class MLForecaster:
             # SARIMA parameters (p,d,q) x (P,D,Q,s)
             # p,d,q: non-seasonal parameters (AR, I, MA)
             # P,D,Q,s: seasonal parameters with period s=7 (weekly)
-            order = (1, 1, 1)  # Non-seasonal: AR(1), I(1), MA(1)
-            seasonal_order = (1, 1, 1, 7)  # Seasonal: weekly pattern
+            params = self.params_for(dish_name)
             
             model = SARIMAX(
                 ts_data,
-                order=order,
-                seasonal_order=seasonal_order,
+                order=tuple(params['order']),
+                seasonal_order=tuple(params['seasonal_order']),
                 enforce_stationarity=False,
                 enforce_invertibility=False
             )
             
-            self.models[dish_name] = model.fit(disp=False, maxiter=200)
+            self.models[dish_name] = model.fit(disp=False, maxiter=params['maxiter'])
             print(f"✓ SARIMA model fitted for {dish_name}")
             
         except Exception as e:
@@ -140,31 +255,21 @@ class MLForecaster:
         """
         try:
             # Prepare features
-            df_features = self.prepare_features(dish_data)
-            
-            # Select features for training
-            feature_cols = [
-                'month', 'day_of_week', 'day_of_year', 'week_of_year', 'quarter',
-                'month_sin', 'month_cos', 'day_of_week_sin', 'day_of_week_cos',
-                'is_weekend', 'is_winter', 'is_summer', 'is_spring', 'is_fall'
-            ]
+            df_features, feature_cols = self._training_features(dish_data)
             
             X = df_features[feature_cols]
             y = df_features['quantity_sold']
             
             # XGBoost with optimized parameters
-            model = xgb.XGBRegressor(
-                n_estimators=100,
-                max_depth=5,
-                learning_rate=0.1,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                random_state=42,
-                objective='reg:squarederror'
-            )
+            params = self.params_for(dish_name)
+            model = xgb.XGBRegressor(**params)
             
             model.fit(X, y)
-            self.models[dish_name] = {'model': model, 'features': feature_cols}
+            model_dict = {'model': model, 'features': feature_cols}
+            if self.quantiles:
+                model_dict['quantile_model'] = self._quantile_model(params)
+                model_dict['quantile_model'].fit(X, y)
+            self.models[dish_name] = model_dict
             print(f"✓ XGBoost model fitted for {dish_name}")
             
         except Exception as e:
@@ -183,26 +288,13 @@ class MLForecaster:
         """
         try:
             # Prepare features
-            df_features = self.prepare_features(dish_data)
-            
-            feature_cols = [
-                'month', 'day_of_week', 'day_of_year', 'week_of_year', 'quarter',
-                'month_sin', 'month_cos', 'day_of_week_sin', 'day_of_week_cos',
-                'is_weekend', 'is_winter', 'is_summer', 'is_spring', 'is_fall'
-            ]
+            df_features, feature_cols = self._training_features(dish_data)
             
             X = df_features[feature_cols]
             y = df_features['quantity_sold']
             
             # Random Forest with optimized parameters
-            model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1
-            )
+            model = RandomForestRegressor(**self.params_for(dish_name))
             
             model.fit(X, y)
             self.models[dish_name] = {'model': model, 'features': feature_cols}
@@ -212,6 +304,20 @@ class MLForecaster:
             print(f"✗ Error fitting Random Forest for {dish_name}: {str(e)}")
             self.models[dish_name] = {'type': 'average', 'value': dish_data['quantity_sold'].mean()}
     
+    def _training_features(self, dish_data: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Feature frame and feature columns used to train a per-dish tree model.
+        
+        With a feature engine the rows are the dish's daily series (zero-sale
+        days included) with lag/rolling/EWMA features, sliced from the matrix
+        cached for the whole order history when available.
+        """
+        if self.feature_engine is None:
+            return self.prepare_features(dish_data), list(self.CALENDAR_FEATURES)
+        
+        frame = self.feature_engine.dish_frame(dish_data, orders=self.history)
+        return self.prepare_features(frame), list(self.CALENDAR_FEATURES) + self.feature_engine.feature_names
+    
     def fit_prophet(self, dish_data: pd.DataFrame, dish_name: str) -> None:
         """
         Fit Prophet model for a specific dish.
@@ -228,13 +334,7 @@ class MLForecaster:
             df_prophet.columns = ['ds', 'y']
             
             # Initialize Prophet with seasonality
-            model = Prophet(
-                yearly_seasonality=True,
-                weekly_seasonality=True,
-                daily_seasonality=False,
-                seasonality_mode='multiplicative',
-                changepoint_prior_scale=0.05
-            )
+            model = Prophet(**self.params_for(dish_name))
             
             model.fit(df_prophet)
             self.models[dish_name] = model
@@ -243,45 +343,473 @@ class MLForecaster:
         except Exception as e:
             print(f"✗ Error fitting Prophet for {dish_name}: {str(e)}")
             self.models[dish_name] = {'type': 'average', 'value': dish_data['quantity_sold'].mean()}
+
+    def fit_croston(self, orders_data: pd.DataFrame) -> None:
+        """
+        Fit Croston-type models for every dish in the orders at once.
+        Croston / SBA / TSB: separate smoothing of demand sizes and intervals
+        Best for: Dishes that sell only on some days (intermittent demand)
+
+        All dishes sharing a configuration are smoothed in one vectorized pass
+        over their daily panel (zero-sale days included).
+
+        Args:
+            orders_data: Historical orders of the dishes to fit
+        """
+        panel = FeatureEngine.build_panel(orders_data)
+        groups = {}
+        for dish_name in panel.columns:
+            params = self.DEFAULT_PARAMS['croston'].copy()
+            if self.algorithm == 'croston':
+                params.update(self.params_for(dish_name))
+            key = (params['method'], params['alpha'], params['beta'])
+            groups.setdefault(key, []).append(dish_name)
+
+        for (method, alpha, beta), dishes in groups.items():
+            self.models.update(fit_intermittent(panel[dishes], method=method, alpha=alpha,
+                                                beta=beta, quantiles=self.QUANTILES))
+        print(f"✓ Croston models fitted for {len(panel.columns)} dishes")
+
+    def fit_global_xgboost(self, orders_data: pd.DataFrame, registry: Optional[ModelRegistry] = None) -> None:
+        """
+        Fit a single XGBoost model on all dishes at once.
+        Global model: one booster shared across the menu
+        Best for: Large menus where per-dish fits are small and repetitive
+        
+        Dishes are distinguished by dish/category/cuisine codes, and each row
+        carries the feature engine's lag/rolling/EWMA features of its own dish.
+        
+        Args:
+            orders_data: Historical orders for all dishes
+            registry: Optional model registry used as a persistent cache
+        """
+        if registry is not None:
+            # Category and cuisine feed the static codes, so re-categorised dishes retrain
+            columns = ['date', 'dish_name', 'quantity_sold'] + [
+                column for column in ['category', 'cuisine'] if column in orders_data.columns]
+            data_hash = registry.hash_data(orders_data, columns=columns)
+            cached = registry.load(self.algorithm, '__all__', data_hash, self.params_hash())
+            if cached is not None:
+                self._set_global_model(cached)
+                print(f"📦 Loaded global model for {len(cached['dishes'])} dishes from registry")
+                return
+        
+        dishes = list(orders_data['dish_name'].unique())
+        
+        # Static dish attributes
+        self.label_encoder.fit(dishes)
+        dish_attrs = orders_data.drop_duplicates('dish_name').set_index('dish_name').reindex(dishes)
+        static_codes = {'dish_code': self.label_encoder.transform(dishes)}
+        for column, encoder in [('category', self.category_encoder), ('cuisine', self.cuisine_encoder)]:
+            values = dish_attrs[column].fillna('unknown').astype(str) if column in dish_attrs else pd.Series('unknown', index=dishes)
+            static_codes[f'{column}_code'] = encoder.fit_transform(values)
+        
+        frame = self.prepare_features(self.feature_engine.training_frame(orders_data))
+        dish_index = frame['dish_name'].map({dish: i for i, dish in enumerate(dishes)}).to_numpy()
+        for name, codes in static_codes.items():
+            frame[name] = codes[dish_index]
+        
+        feature_cols = list(self.CALENDAR_FEATURES) + list(static_codes) + self.feature_engine.feature_names
+        model = xgb.XGBRegressor(**self.params_for())
+        model.fit(frame[feature_cols], frame['quantity_sold'])
+        quantile_model = None
+        if self.quantiles:
+            quantile_model = self._quantile_model(self.params_for())
+            quantile_model.fit(frame[feature_cols], frame['quantity_sold'])
+        
+        global_model = {
+            'model': model,
+            'quantile_model': quantile_model,
+            'features': feature_cols,
+            'dishes': dishes,
+            'static_codes': static_codes,
+            'panel': self.feature_engine.build_panel(orders_data)
+        }
+        self._set_global_model(global_model)
+        print(f"✓ Global XGBoost model fitted for {len(dishes)} dishes on {len(frame)} rows")
+        
+        if registry is not None:
+            registry.save(self.algorithm, '__all__', global_model, data_hash, self.params_hash())
     
-    def fit(self, orders_data: pd.DataFrame) -> None:
+    def fit_auto(self, orders_data: pd.DataFrame, registry: Optional[ModelRegistry] = None) -> None:
+        """
+        Fit the best algorithm for every dish.
+        Auto: per-dish choice between statistical baselines and ML models
+        Best for: Menus mixing steady, seasonal and sparse dishes
+        
+        Dishes are grouped by their selected algorithm and each group is
+        trained by its own forecaster; baseline dishes get a baseline model.
+        
+        Args:
+            orders_data: Historical orders for all dishes
+            registry: Optional model registry; also stores the memoized
+                      backtest scores of the selector
+        """
+        from src.model_selection import AlgorithmSelector, BASELINES, baseline_model
+        
+        if self.selector is None:
+            cache_path = os.path.join(registry.root_dir, 'auto', 'fold_scores.json') if registry is not None else None
+            self.selector = AlgorithmSelector(cache_path=cache_path, n_jobs=self.n_jobs, backend=self.backend)
+        self.selection = self.selector.select(orders_data)
+        
+        groups = {}
+        for dish_name, choice in self.selection.items():
+            groups.setdefault(choice['algorithm'], []).append(dish_name)
+        
+        self.models = {}
+        self.sub_forecasters = {}
+        for algorithm, dishes in groups.items():
+            group_orders = orders_data[orders_data['dish_name'].isin(dishes)].copy()
+            if algorithm in BASELINES:
+                for dish_name in dishes:
+                    dish_data = group_orders[group_orders['dish_name'] == dish_name]
+                    self.models[dish_name] = baseline_model(algorithm, dish_data, self.selector.baseline_window)
+                print(f"✓ Baseline {algorithm} used for {len(dishes)} dishes")
+                continue
+            
+            forecaster = MLForecaster(algorithm=algorithm, n_jobs=self.n_jobs, backend=self.backend,
+                                      quantiles=self.quantiles)
+            forecaster.fit(group_orders, registry=registry)
+            self.sub_forecasters[algorithm] = forecaster
+            self.models.update(forecaster.models)
+        
+        self.models = {dish_name: self.models[dish_name] for dish_name in self.selection}
+    
+    def _quantile_model(self, params: Dict) -> xgb.XGBRegressor:
+        """XGBoost model predicting every level of ``QUANTILES`` in one call."""
+        params = dict(params, objective='reg:quantileerror', quantile_alpha=list(self.QUANTILES))
+        return xgb.XGBRegressor(**params)
+    
+    def _set_global_model(self, global_model: Dict) -> None:
+        self.global_model = global_model
+        self.models = {}
+    
+    def fit(self, orders_data: pd.DataFrame, registry: Optional[ModelRegistry] = None) -> None:
         """
         Train models for all dishes in the dataset.
         
+        Dishes are independent, so with ``n_jobs > 1`` they are trained
+        concurrently; each worker runs the same per-dish fit as the serial
+        path, so the fitted models are identical.
+        
+        With a registry, dishes whose training data and hyperparameters are
+        unchanged are loaded from disk and only stale dishes are retrained.
+        
         Args:
             orders_data: Historical orders DataFrame with columns:
                         ['date', 'dish_name', 'quantity_sold']
+            registry: Optional model registry used as a persistent cache
         """
         print(f"\n🤖 Training {self.algorithm.upper()} models...")
         print("=" * 60)
         
         orders_data['date'] = pd.to_datetime(orders_data['date'])
+        if self.as_of is not None:
+            orders_data = orders_data[orders_data['date'] <= self.as_of].copy()
+        self.history = orders_data.copy()
+        
+        if registry is not None and not self.dish_params:
+            self.dish_params = registry.load_tuned_params(self.algorithm)
+        
+        if self.algorithm == 'xgboost_global':
+            self.fit_global_xgboost(orders_data, registry=registry)
+            self.is_fitted = True
+            print("=" * 60)
+            print(f"✅ Global model trained successfully!\n")
+            return
         
-        # Train a model for each dish
+        if self.algorithm == 'auto':
+            self.fit_auto(orders_data, registry=registry)
+            self.is_fitted = True
+            print("=" * 60)
+            print(f"✅ All models trained successfully!\n")
+            return
+        
+        # One task per dish, in first-seen order
+        tasks = []
         for dish_name in orders_data['dish_name'].unique():
             dish_data = orders_data[orders_data['dish_name'] == dish_name].copy()
             dish_data = dish_data.sort_values('date')
+            tasks.append((dish_name, dish_data))
+        dish_order = [dish_name for dish_name, _ in tasks]
+        
+        # Croston fits every dish in one pass; sparse dishes can be routed to it
+        croston_dishes = []
+        if self.algorithm == 'croston':
+            croston_dishes = dish_order
+        elif self.route_intermittent and self.algorithm in self.ROUTABLE_ALGORITHMS:
+            classes = classify_demand(FeatureEngine.build_panel(orders_data))['demand_class']
+            self.demand_classes = classes.to_dict()
+            croston_dishes = [dish for dish in dish_order if classes.get(dish) in SPARSE_CLASSES]
+            print(f"🔀 Routing {len(croston_dishes)} sparse dishes to Croston")
+        if croston_dishes:
+            self.fit_croston(orders_data[orders_data['dish_name'].isin(croston_dishes)])
+            tasks = [(dish_name, dish_data) for dish_name, dish_data in tasks
+                     if dish_name not in set(croston_dishes)]
+        
+        # Lag features for every dish come from one cached matrix
+        if self.feature_engine is not None and self.algorithm in ['xgboost', 'random_forest']:
+            self.feature_engine.training_frame(self.history)
+        
+        # Serve unchanged dishes from the registry
+        data_hashes = {}
+        if registry is not None:
+            stale_tasks = []
+            for dish_name, dish_data in tasks:
+                data_hashes[dish_name] = registry.hash_data(dish_data)
+                model = registry.load(self.algorithm, dish_name, data_hashes[dish_name],
+                                      self.params_hash(dish_name))
+                if model is None:
+                    stale_tasks.append((dish_name, dish_data))
+                else:
+                    self.models[dish_name] = model
+            print(f"📦 Loaded {len(tasks) - len(stale_tasks)} models from registry, "
+                  f"{len(stale_tasks)} to train")
+            tasks = stale_tasks
+        
+        if self.n_jobs == 1:
+            for dish_name, dish_data in tasks:
+                self._fit_dish(dish_data, dish_name)
+        else:
+            template = self._worker_template()
+            results = parallel_map(
+                _fit_dish_worker,
+                [(template, dish_name, dish_data) for dish_name, dish_data in tasks],
+                n_jobs=self.n_jobs,
+                backend=self.backend
+            )
+            for (dish_name, _), model in zip(tasks, results):
+                self.models[dish_name] = model
+        
+        if registry is not None:
+            for dish_name, _ in tasks:
+                registry.save(self.algorithm, dish_name, self.models[dish_name],
+                              data_hashes[dish_name], self.params_hash(dish_name))
+        
+        # Keep dish order stable regardless of which models came from disk
+        ordered = {dish_name: self.models[dish_name] for dish_name in dish_order}
+        ordered.update({k: v for k, v in self.models.items() if k not in ordered})
+        self.models = ordered
+        self.is_fitted = True
+        print("=" * 60)
+        print(f"✅ All models trained successfully!\n")
+    
+    def _fit_dish(self, dish_data: pd.DataFrame, dish_name: str) -> None:
+        """Fit the configured algorithm for a single dish."""
+        if self.algorithm == 'sarima':
+            self.fit_sarima(dish_data, dish_name)
+        elif self.algorithm == 'xgboost':
+            self.fit_xgboost(dish_data, dish_name)
+        elif self.algorithm == 'random_forest':
+            self.fit_random_forest(dish_data, dish_name)
+        elif self.algorithm == 'prophet':
+            self.fit_prophet(dish_data, dish_name)
+        elif self.algorithm == 'croston':
+            self.fit_croston(dish_data)
+    
+    def update(self, new_orders: pd.DataFrame, boost_rounds: int = 20, forest_trees: int = 20,
+               recent_days: int = 90, registry: Optional[ModelRegistry] = None) -> List[str]:
+        """
+        Incrementally update fitted models with newly arrived orders.
+        
+        Only dishes present in ``new_orders`` are touched, and each model is
+        updated from its current state instead of being refit from scratch:
+        
+        - SARIMA: new observations are appended to the state-space model with
+          the fitted parameters kept (``append(refit=False)``)
+        - XGBoost: boosting continues from the existing booster on the new rows
+        - Random Forest: extra trees are grown on a recent window (warm start)
+        - Prophet: refit warm-started from the previous parameters
+        - Croston: refit, a single vectorized pass over the dish's history
+        
+        Dishes without a model, and dishes whose new rows overlap the
+        existing history (corrections), are fully refit. The global XGBoost
+        model is refit on the full history.
+        
+        Args:
+            new_orders: New orders with columns ['date', 'dish_name', 'quantity_sold']
+            boost_rounds: Boosting rounds added to XGBoost models
+            forest_trees: Trees added to Random Forest models
+            recent_days: Window of history used for the new Random Forest trees
+            registry: Optional model registry the updated models are saved to
             
-            # Select appropriate fitting method
-            if self.algorithm == 'sarima':
-                self.fit_sarima(dish_data, dish_name)
+        Returns:
+            Names of the dishes that were updated
+        """
+        if not self.is_fitted:
+            raise ValueError("Models not fitted. Call fit() first.")
+        
+        new_orders = new_orders.copy()
+        new_orders['date'] = pd.to_datetime(new_orders['date'])
+        previous_history = self.history
+        self.history = pd.concat([previous_history, new_orders], ignore_index=True)
+        
+        if self.algorithm == 'xgboost_global':
+            # A single shared model: the new rows change every dish's lags
+            self.fit_global_xgboost(self.history, registry=registry)
+            return list(self.global_model['dishes'])
+        
+        if self.algorithm == 'auto':
+            return self._update_auto(new_orders, boost_rounds, forest_trees, recent_days, registry)
+        
+        updated = []
+        for dish_name in new_orders['dish_name'].unique():
+            new_data = new_orders[new_orders['dish_name'] == dish_name].sort_values('date')
+            old_history = previous_history[previous_history['dish_name'] == dish_name]
+            dish_history = pd.concat([old_history, new_data]).sort_values('date')
+            model = self.models.get(dish_name)
+            
+            is_fallback = model is None or (isinstance(model, dict) and model.get('type') == 'average')
+            overlaps = not old_history.empty and new_data['date'].min() <= old_history['date'].max()
+            
+            if isinstance(model, dict) and model.get('type') == 'croston':
+                # A full pass over one dish is cheaper than any incremental update
+                self.fit_croston(dish_history)
+            elif is_fallback or overlaps:
+                self._fit_dish(dish_history, dish_name)
+            elif self.algorithm == 'sarima':
+                self._update_sarima(model, new_data, dish_name, old_history['date'].max())
             elif self.algorithm == 'xgboost':
-                self.fit_xgboost(dish_data, dish_name)
+                self._update_xgboost(model, dish_history, new_data, dish_name, boost_rounds)
             elif self.algorithm == 'random_forest':
-                self.fit_random_forest(dish_data, dish_name)
+                cutoff = dish_history['date'].max() - timedelta(days=recent_days)
+                self._update_random_forest(model, dish_history, cutoff, dish_name, forest_trees)
             elif self.algorithm == 'prophet':
-                self.fit_prophet(dish_data, dish_name)
+                self._update_prophet(model, dish_history, dish_name)
+            
+            if registry is not None:
+                registry.save(self.algorithm, dish_name, self.models[dish_name],
+                              registry.hash_data(dish_history), self.params_hash(dish_name))
+            updated.append(dish_name)
         
-        self.is_fitted = True
-        print("=" * 60)
-        print(f"✅ All models trained successfully!\n")
+        print(f"🔁 Updated {len(updated)} {self.algorithm.upper()} models with new orders")
+        return updated
+    
+    def _update_auto(self, new_orders: pd.DataFrame, boost_rounds: int, forest_trees: int,
+                     recent_days: int, registry: Optional[ModelRegistry]) -> List[str]:
+        """Update each dish with its selected algorithm; baselines are recomputed."""
+        from src.model_selection import baseline_model
+        
+        updated = []
+        for algorithm, forecaster in self.sub_forecasters.items():
+            rows = new_orders[new_orders['dish_name'].isin(list(forecaster.models))]
+            if len(rows):
+                updated += forecaster.update(rows, boost_rounds, forest_trees, recent_days, registry)
+                self.models.update(forecaster.models)
+        
+        # Baseline dishes, and dishes first seen in the new orders
+        for dish_name in new_orders['dish_name'].unique():
+            if dish_name in updated:
+                continue
+            algorithm = self.selection.get(dish_name, {}).get('algorithm', 'moving_average')
+            self.selection.setdefault(dish_name, {'algorithm': algorithm, 'scores': {}, 'screened': True})
+            dish_history = self.history[self.history['dish_name'] == dish_name]
+            window = self.selector.baseline_window if self.selector is not None else 28
+            self.models[dish_name] = baseline_model(algorithm, dish_history, window)
+            updated.append(dish_name)
+        
+        print(f"🔁 Updated {len(updated)} AUTO models with new orders")
+        return updated
+    
+    def _update_sarima(self, model, new_data: pd.DataFrame, dish_name: str, last_date) -> None:
+        """Append new observations to a fitted SARIMA model without re-estimating it."""
+        new_index = pd.date_range(last_date + timedelta(days=1), new_data['date'].max(), freq='D')
+        new_ts = new_data.groupby('date')['quantity_sold'].sum().reindex(new_index, fill_value=0)
+        self.models[dish_name] = model.append(new_ts, refit=False)
+    
+    def _update_xgboost(self, model_dict: dict, dish_history: pd.DataFrame, new_data: pd.DataFrame,
+                        dish_name: str, boost_rounds: int) -> None:
+        """Continue boosting an existing XGBoost model on the new rows."""
+        # Lag features of the new rows depend on the history before them
+        source = dish_history if self.feature_engine is not None else new_data
+        df_features, _ = self._training_features(source)
+        df_features = df_features[df_features['date'] >= new_data['date'].min()]
+        params = dict(self.params_for(dish_name), n_estimators=boost_rounds)
+        
+        model = xgb.XGBRegressor(**params)
+        model.fit(df_features[model_dict['features']], df_features['quantity_sold'],
+                  xgb_model=model_dict['model'].get_booster())
+        updated = {'model': model, 'features': model_dict['features']}
+        
+        if 'quantile_model' in model_dict:
+            quantile_model = self._quantile_model(params)
+            quantile_model.fit(df_features[model_dict['features']], df_features['quantity_sold'],
+                               xgb_model=model_dict['quantile_model'].get_booster())
+            updated['quantile_model'] = quantile_model
+        self.models[dish_name] = updated
+    
+    def _update_random_forest(self, model_dict: dict, dish_history: pd.DataFrame, cutoff,
+                              dish_name: str, forest_trees: int) -> None:
+        """Grow additional trees on data after ``cutoff``, keeping the existing ones."""
+        source = dish_history if self.feature_engine is not None else dish_history[dish_history['date'] > cutoff]
+        df_features, _ = self._training_features(source)
+        df_features = df_features[df_features['date'] > cutoff]
+        model = model_dict['model']
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + forest_trees)
+        model.fit(df_features[model_dict['features']], df_features['quantity_sold'])
+        model.set_params(warm_start=False)
+    
+    def _update_prophet(self, model, dish_history: pd.DataFrame, dish_name: str) -> None:
+        """Refit Prophet initialised from the previous model's parameters."""
+        df_prophet = dish_history[['date', 'quantity_sold']].copy()
+        df_prophet.columns = ['ds', 'y']
+        
+        init = {}
+        for name in ['k', 'm', 'sigma_obs']:
+            init[name] = model.params[name][0][0]
+        for name in ['delta', 'beta']:
+            init[name] = model.params[name][0]
+        
+        new_model = Prophet(**self.params_for(dish_name))
+        new_model.fit(df_prophet, init=init)
+        self.models[dish_name] = new_model
+    
+    def params_for(self, dish_name: str = '__all__') -> Dict:
+        """Hyperparameters used for one dish (or the global model)."""
+        params = dict(self.model_params)
+        params.update(self.dish_params.get('__all__', {}))
+        if dish_name != '__all__':
+            params.update(self.dish_params.get(dish_name, {}))
+        return params
+    
+    def params_hash(self, dish_name: str = '__all__') -> str:
+        """Fingerprint of the algorithm and hyperparameters, used as a registry key."""
+        features = self.feature_engine.feature_names if self.feature_engine is not None else None
+        return ModelRegistry.hash_params({'algorithm': self.algorithm, 'params': self.params_for(dish_name),
+                                          'features': features, 'quantiles': self.quantiles})
+    
+    def _worker_template(self) -> 'MLForecaster':
+        """
+        Shallow copy of this forecaster without fitted models, shipped to workers.
+
+        Each worker trains its models on a single thread: a forest or booster
+        using every core in each of ``n_jobs`` workers would oversubscribe
+        the machine ``n_jobs`` times over.
+        """
+        template = copy.copy(self)
+        template.models = {}
+        if self.algorithm in self.THREADED_ALGORITHMS:
+            template.model_params = self._single_threaded(self.model_params)
+            template.dish_params = {dish: self._single_threaded(params, force=False)
+                                    for dish, params in self.dish_params.items()}
+        return template
+
+    @staticmethod
+    def _single_threaded(params: Dict, force: bool = True) -> Dict:
+        """Copy of model hyperparameters limited to one thread."""
+        params = {key: value for key, value in params.items() if key not in ('n_jobs', 'nthread')}
+        if force:
+            params['n_jobs'] = 1
+        return params
     
-    def predict(self, days_ahead: int = 7) -> pd.DataFrame:
+    def predict(self, days_ahead: int = 7, start_date=None) -> pd.DataFrame:
         """
         Generate predictions for the next N days.
         
         Args:
             days_ahead: Number of days to forecast
+            start_date: Forecast origin; predictions cover the N days after it
+                        (default: ``as_of``, or today)
             
         Returns:
             DataFrame with predictions
@@ -290,69 +818,322 @@ class MLForecaster:
             raise ValueError("Models not fitted. Call fit() first.")
         
         # Generate future dates
-        start_date = datetime.now().date()
+        if start_date is None:
+            start_date = self.as_of if self.as_of is not None else datetime.now()
+        start_date = pd.Timestamp(start_date).date()
         future_dates = [start_date + timedelta(days=i) for i in range(1, days_ahead + 1)]
         
+        if self.algorithm == 'xgboost_global':
+            return self._predict_global(future_dates)
+        if self.algorithm == 'auto':
+            return self._predict_auto(future_dates, start_date)
+        if self.algorithm in ['xgboost', 'random_forest'] and self.feature_engine is not None:
+            return self._predict_recursive(future_dates)
+        
+        # Calendar features for the horizon are shared by every tree model,
+        # so they are built once instead of once per (dish, date)
+        future_features = None
+        if self.algorithm in ['xgboost', 'random_forest']:
+            future_features = self.prepare_features(pd.DataFrame({'date': future_dates}))
+        
         predictions = []
         
         for dish_name, model in self.models.items():
-            for date in future_dates:
-                # Get prediction based on algorithm
-                if self.algorithm == 'sarima':
-                    pred_value = self._predict_sarima(model, len(future_dates))
-                elif self.algorithm in ['xgboost', 'random_forest']:
-                    pred_value = self._predict_tree_model(model, date)
-                elif self.algorithm == 'prophet':
-                    pred_value = self._predict_prophet(model, date)
-                else:
-                    pred_value = model.get('value', 0)
-                
-                predictions.append({
-                    'date': date,
-                    'dish_name': dish_name,
-                    'predicted_quantity': max(0, int(pred_value)),
-                    'algorithm': self.algorithm
-                })
-        
-        return pd.DataFrame(predictions)
-    
-    def _predict_sarima(self, model, steps: int) -> float:
-        """Get SARIMA prediction."""
+            intervals = None
+            
+            # Get predictions (and quantiles) for the whole horizon based on algorithm
+            if isinstance(model, dict) and model.get('type') == 'croston':
+                pred_values = np.full(len(future_dates), model['value'])
+                quantiles = np.tile(np.asarray(model['quantiles'], dtype=float), (len(future_dates), 1))
+            elif self.algorithm == 'sarima':
+                pred_values, lower, upper, quantiles = self._predict_sarima(model, future_dates, return_quantiles=True)
+                intervals = (lower, upper)
+            elif self.algorithm in ['xgboost', 'random_forest']:
+                pred_values = self._predict_tree_model(model, future_features)
+                quantiles = self._predict_tree_quantiles(model, future_features) if self.quantiles else None
+            elif self.algorithm == 'prophet':
+                pred_values, quantiles = self._predict_prophet(model, future_dates)
+            else:
+                pred_values = [model.get('value', 0)] * len(future_dates)
+                quantiles = np.tile(np.asarray(pred_values, dtype=float)[:, None], len(self.QUANTILES))
+            
+            dish_predictions = pd.DataFrame({
+                'date': future_dates,
+                'dish_name': dish_name,
+                'predicted_quantity': np.maximum(0, np.asarray(pred_values, dtype=float).astype(int)),
+                'algorithm': self.algorithm
+            })
+            if intervals is not None:
+                dish_predictions['lower_bound'] = np.maximum(0, intervals[0])
+                dish_predictions['upper_bound'] = np.maximum(0, intervals[1])
+            if self.quantiles:
+                self._add_quantile_columns(dish_predictions, quantiles)
+            predictions.append(dish_predictions)
+        
+        if not predictions:
+            return pd.DataFrame(columns=['date', 'dish_name', 'predicted_quantity', 'algorithm'])
+        return pd.concat(predictions, ignore_index=True)
+    
+    def _predict_auto(self, future_dates: List, start_date) -> pd.DataFrame:
+        """
+        Predict every dish with its selected algorithm.
+        
+        The 'algorithm' column holds the algorithm used for each dish.
+        """
+        from src.model_selection import baseline_forecast, baseline_quantiles
+        
+        predictions = [forecaster.predict(days_ahead=len(future_dates), start_date=start_date)
+                       for forecaster in self.sub_forecasters.values()]
+        
+        served = set().union(*[forecaster.models for forecaster in self.sub_forecasters.values()])
+        for dish_name, model in self.models.items():
+            if dish_name in served:
+                continue
+            dish_predictions = pd.DataFrame({
+                'date': future_dates,
+                'dish_name': dish_name,
+                'predicted_quantity': np.maximum(0, baseline_forecast(model, future_dates).astype(int)),
+                'algorithm': self.selection[dish_name]['algorithm']
+            })
+            if self.quantiles:
+                self._add_quantile_columns(dish_predictions, baseline_quantiles(model, future_dates, self.QUANTILES))
+            predictions.append(dish_predictions)
+        
+        if not predictions:
+            return pd.DataFrame(columns=['date', 'dish_name', 'predicted_quantity', 'algorithm'])
+        
+        # Same dish order as the single-algorithm forecasters
+        forecast = pd.concat(predictions, ignore_index=True)
+        dish_order = {dish_name: i for i, dish_name in enumerate(self.models)}
+        forecast = forecast.sort_values('dish_name', key=lambda s: s.map(dish_order), kind='stable')
+        return forecast.reset_index(drop=True)
+    
+    def _predict_sarima(self, model, future_dates: List, alpha: float = 0.05,
+                        return_quantiles: bool = False) -> Tuple[np.ndarray, ...]:
+        """
+        Get the SARIMA forecast path for all horizon dates in one call.
+        
+        The model is predicted once over the horizon dates, so each value
+        belongs to its own date: dates after the training series are
+        forecasts, dates within it are one-step-ahead in-sample predictions.
+        
+        Args:
+            model: Fitted SARIMAX results (or average fallback)
+            future_dates: Consecutive daily dates to forecast
+            alpha: Significance level of the confidence interval (0.05 = 95%)
+            return_quantiles: Also return the ``QUANTILES`` of the forecast
+                              distribution, read from the same forecast
+            
+        Returns:
+            Tuple of (mean, lower bound, upper bound) arrays, one value per date,
+            plus a (dates x quantiles) array if ``return_quantiles``
+        """
+        steps = len(future_dates)
         try:
             if isinstance(model, dict) and model.get('type') == 'average':
-                return model['value']
-            forecast = model.forecast(steps=steps)
-            return forecast.iloc[-1]
+                value = np.full(steps, model['value'], dtype=float)
+                result = (value, value, value)
+                quantiles = np.tile(value[:, None], len(self.QUANTILES))
+                return result + (quantiles,) if return_quantiles else result
+            
+            # Predict by date: any gap after (or overlap with) the training series is handled by the model
+            forecast = model.get_prediction(start=pd.Timestamp(future_dates[0]), end=pd.Timestamp(future_dates[-1]))
+            mean = forecast.predicted_mean.to_numpy()
+            conf_int = forecast.conf_int(alpha=alpha).to_numpy()
+            result = (mean, conf_int[:, 0], conf_int[:, 1])
+            if not return_quantiles:
+                return result
+            
+            # Quantile q is a bound of the central (1 - 2q) interval
+            columns = []
+            for q in self.QUANTILES:
+                if q == 0.5:
+                    columns.append(mean)
+                    continue
+                bounds = forecast.conf_int(alpha=2 * min(q, 1 - q)).to_numpy()
+                columns.append(bounds[:, 0] if q < 0.5 else bounds[:, 1])
+            return result + (np.column_stack(columns),)
         except:
-            return 0
+            zeros = np.zeros(steps)
+            result = (zeros, zeros, zeros)
+            return result + (np.zeros((steps, len(self.QUANTILES))),) if return_quantiles else result
     
-    def _predict_tree_model(self, model_dict: dict, date) -> float:
-        """Get XGBoost/Random Forest prediction."""
+    def _predict_tree_model(self, model_dict: dict, future_features: pd.DataFrame) -> np.ndarray:
+        """
+        Get XGBoost/Random Forest predictions for every horizon date in one call.
+        
+        Args:
+            model_dict: Fitted model entry from ``self.models``
+            future_features: Output of ``prepare_features`` for the horizon dates
+            
+        Returns:
+            Array with one prediction per row of ``future_features``
+        """
         try:
+            if isinstance(model_dict, dict) and model_dict.get('type') in ['average', 'croston']:
+                return np.full(len(future_features), model_dict['value'])
+            
+            X = future_features[model_dict['features']]
+            return model_dict['model'].predict(X)
+        except:
+            return np.zeros(len(future_features))
+    
+    def _predict_tree_quantiles(self, model_dict: dict, future_features: pd.DataFrame) -> np.ndarray:
+        """
+        Get XGBoost/Random Forest quantiles for every horizon date in one call.
+        
+        XGBoost uses its quantile-objective model; Random Forest takes the
+        quantiles of the individual trees' predictions.
+        
+        Returns:
+            (rows x quantiles) array
+        """
+        n_rows = len(future_features)
+        try:
+            if isinstance(model_dict, dict) and model_dict.get('type') == 'croston':
+                return np.tile(np.asarray(model_dict['quantiles'], dtype=float), (n_rows, 1))
             if isinstance(model_dict, dict) and model_dict.get('type') == 'average':
-                return model_dict['value']
+                return np.full((n_rows, len(self.QUANTILES)), model_dict['value'], dtype=float)
             
-            # Prepare features for prediction
-            df_future = pd.DataFrame({'date': [date]})
-            df_future = self.prepare_features(df_future)
+            X = future_features[model_dict['features']]
+            model = model_dict['model']
+            if model_dict.get('quantile_model') is not None:
+                quantiles = model_dict['quantile_model'].predict(X)
+            elif isinstance(model, RandomForestRegressor):
+                values = X.to_numpy(dtype=np.float32)
+                per_tree = np.stack([tree.predict(values) for tree in model.estimators_])
+                quantiles = np.quantile(per_tree, self.QUANTILES, axis=0).T
+            else:
+                quantiles = np.tile(model.predict(X)[:, None], len(self.QUANTILES))
             
-            X = df_future[model_dict['features']]
-            prediction = model_dict['model'].predict(X)
-            return prediction[0]
+            # Independently fitted quantiles can cross; keep them ordered
+            return np.sort(np.asarray(quantiles, dtype=float).reshape(n_rows, -1), axis=1)
         except:
-            return 0
+            return np.zeros((n_rows, len(self.QUANTILES)))
+    
+    def _add_quantile_columns(self, predictions: pd.DataFrame, quantiles: np.ndarray) -> None:
+        """Add the ``QUANTILE_COLUMNS`` (clipped at zero) to a predictions frame."""
+        quantiles = np.maximum(0, np.asarray(quantiles, dtype=float))
+        for k, column in enumerate(self.QUANTILE_COLUMNS):
+            predictions[column] = quantiles[:, k]
+    
+    def _predict_global(self, future_dates: List) -> pd.DataFrame:
+        """
+        Predict all dishes with the global model.
+        
+        Every dish is predicted in the same ``model.predict`` call. Because the
+        smallest lag is ``feature_engine.step`` days, that many consecutive days
+        can be predicted together before the predictions are needed as lags,
+        so a horizon of up to a week right after the training data is a single
+        call and longer gaps/horizons take one call per block.
+        """
+        gm = self.global_model
+        dishes = gm['dishes']
+        n_dishes = len(dishes)
+        quantile_model = gm.get('quantile_model') if self.quantiles else None
+        block_quantiles = {}
+        
+        def predict_block(dates, features):
+            X = self._panel_feature_rows(dates, features, n_dishes)
+            for name, codes in gm['static_codes'].items():
+                X[name] = np.repeat(codes, len(dates))
+            if quantile_model is not None:
+                self._store_block_quantiles(block_quantiles, dates, quantile_model.predict(X[gm['features']]), n_dishes)
+            return gm['model'].predict(X[gm['features']]).reshape(n_dishes, len(dates))
+        
+        pred_matrix = self.feature_engine.recursive_forecast(gm['panel'], future_dates, predict_block)
+        
+        forecast = pd.DataFrame({
+            'date': np.tile(np.array(future_dates, dtype=object), n_dishes),
+            'dish_name': np.repeat(dishes, len(future_dates)),
+            'predicted_quantity': np.maximum(0, pred_matrix.ravel().astype(int)),
+            'algorithm': self.algorithm
+        })
+        if quantile_model is not None:
+            self._add_quantile_columns(forecast, self._collect_block_quantiles(block_quantiles, future_dates, n_dishes))
+        return forecast
     
-    def _predict_prophet(self, model, date) -> float:
-        """Get Prophet prediction."""
+    def _predict_recursive(self, future_dates: List) -> pd.DataFrame:
+        """
+        Predict per-dish tree models that use lag features.
+        
+        Predictions are fed back as demand history block by block; within a
+        block each dish model is called once for all its dates.
+        """
+        panel = self.feature_engine.build_panel(self.history)
+        dishes = list(panel.columns)
+        block_quantiles = {}
+        
+        def predict_block(dates, features):
+            X = self._panel_feature_rows(dates, features, len(dishes))
+            values = np.zeros((len(dishes), len(dates)))
+            quantiles = np.zeros((len(dishes) * len(dates), len(self.QUANTILES)))
+            for i, dish_name in enumerate(dishes):
+                rows = X.iloc[i * len(dates):(i + 1) * len(dates)]
+                model_dict = self.models.get(dish_name, {'type': 'average', 'value': 0})
+                values[i] = self._predict_tree_model(model_dict, rows)
+                if self.quantiles:
+                    quantiles[i * len(dates):(i + 1) * len(dates)] = self._predict_tree_quantiles(model_dict, rows)
+            if self.quantiles:
+                self._store_block_quantiles(block_quantiles, dates, quantiles, len(dishes))
+            return values
+        
+        pred_matrix = self.feature_engine.recursive_forecast(panel, future_dates, predict_block)
+        
+        forecast = pd.DataFrame({
+            'date': np.tile(np.array(future_dates, dtype=object), len(dishes)),
+            'dish_name': np.repeat(dishes, len(future_dates)),
+            'predicted_quantity': np.maximum(0, pred_matrix.ravel().astype(int)),
+            'algorithm': self.algorithm
+        })
+        if self.quantiles:
+            self._add_quantile_columns(forecast, self._collect_block_quantiles(block_quantiles, future_dates, len(dishes)))
+        return forecast
+    
+    def _store_block_quantiles(self, store: Dict, dates: pd.DatetimeIndex, quantiles: np.ndarray,
+                               n_dishes: int) -> None:
+        """Keep the (dish-major) quantile rows of one recursive block, by date."""
+        quantiles = np.sort(np.asarray(quantiles, dtype=float).reshape(n_dishes, len(dates), -1), axis=2)
+        for j, date in enumerate(dates):
+            store[pd.Timestamp(date)] = quantiles[:, j, :]
+    
+    def _collect_block_quantiles(self, store: Dict, future_dates: List, n_dishes: int) -> np.ndarray:
+        """Dish-major (rows x quantiles) array for the requested dates."""
+        missing = np.zeros((n_dishes, len(self.QUANTILES)))
+        stacked = np.stack([store.get(pd.Timestamp(d), missing) for d in future_dates], axis=1)
+        return stacked.reshape(-1, len(self.QUANTILES))
+    
+    def _panel_feature_rows(self, dates: pd.DatetimeIndex, features: Dict[str, np.ndarray],
+                            n_dishes: int) -> pd.DataFrame:
+        """Dish-major feature rows (calendar + engine features) for a block of dates."""
+        calendar = self.prepare_features(pd.DataFrame({'date': dates}))[self.CALENDAR_FEATURES]
+        X = pd.concat([calendar] * n_dishes, ignore_index=True)
+        for name, values in features.items():
+            X[name] = values.ravel()
+        return X
+    
+    def _predict_prophet(self, model, future_dates: List) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get Prophet predictions for all horizon dates in one call.
+        
+        The uncertainty interval (``interval_width`` 0.8) gives P10/P90.
+        
+        Returns:
+            Tuple of (mean array, dates x quantiles array)
+        """
+        steps = len(future_dates)
         try:
             if isinstance(model, dict) and model.get('type') == 'average':
-                return model['value']
+                value = np.full(steps, model['value'], dtype=float)
+                return value, np.tile(value[:, None], len(self.QUANTILES))
             
-            future = pd.DataFrame({'ds': [pd.Timestamp(date)]})
+            future = pd.DataFrame({'ds': pd.to_datetime(list(future_dates))})
             forecast = model.predict(future)
-            return forecast['yhat'].iloc[0]
+            mean = forecast['yhat'].to_numpy()
+            quantiles = np.column_stack([forecast['yhat_lower'].to_numpy(), mean, forecast['yhat_upper'].to_numpy()])
+            return mean, quantiles
         except:
-            return 0
+            return np.zeros(steps), np.zeros((steps, len(self.QUANTILES)))
     
     def get_model_info(self) -> Dict:
         """
@@ -367,6 +1148,9 @@ class MLForecaster:
             'dishes': list(self.models.keys()),
             'is_fitted': self.is_fitted
         }
+        if self.global_model is not None:
+            info['num_models'] = 1
+            info['dishes'] = list(self.global_model['dishes'])
         
         # Add algorithm-specific info
         if self.algorithm == 'sarima':
@@ -381,5 +1165,25 @@ class MLForecaster:
         elif self.algorithm == 'prophet':
             info['description'] = 'Prophet - Facebook\'s Forecasting Tool'
             info['best_for'] = 'Daily data with holidays and seasonality'
+        elif self.algorithm == 'croston':
+            info['description'] = 'Croston - Intermittent Demand (Croston / SBA / TSB)'
+            info['best_for'] = 'Long-tail dishes that sell only on some days'
+        elif self.algorithm == 'xgboost_global':
+            info['description'] = 'Global XGBoost - One Model Shared by All Dishes'
+            info['best_for'] = 'Large menus with many similar dishes'
+        elif self.algorithm == 'auto':
+            info['description'] = 'Auto - Best Algorithm per Dish from Backtests'
+            info['best_for'] = 'Menus mixing steady, seasonal and sparse dishes'
+            info['selection'] = {dish: choice['algorithm'] for dish, choice in self.selection.items()}
+        if self.demand_classes:
+            info['demand_classes'] = self.demand_classes
+            info['routed_to_croston'] = [dish for dish, model in self.models.items()
+                                         if isinstance(model, dict) and model.get('type') == 'croston']
         
         return info
+
+
+def _fit_dish_worker(forecaster: MLForecaster, dish_name: str, dish_data: pd.DataFrame):
+    """Fit one dish on a worker copy of the forecaster and return the fitted model."""
+    forecaster._fit_dish(dish_data, dish_name)
+    return forecaster.models[dish_name]
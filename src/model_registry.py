@@ -0,0 +1,262 @@
+"""
+Model Registry Module
+Versioned on-disk storage for fitted per-dish forecasting models
+"""
+
+import os
+import re
+import json
+import pickle
+import hashlib
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Persist fitted models keyed by algorithm, dish, training-data hash and
+    hyperparameter hash.
+
+    Layout on disk::
+
+        <root_dir>/manifest.json
+        <root_dir>/<algorithm>/<dish-slug>-<data_hash>-<params_hash>.pkl
+
+    A model is only returned by ``load`` when both hashes match, so a model
+    trained on older data or with different hyperparameters is treated as
+    stale and never served.
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+    TUNED_PARAMS_FILE = 'tuned_params.json'
+
+    def __init__(self, root_dir: str = 'models', max_versions: int = 3):
+        """
+        Initialize Model Registry.
+
+        Args:
+            root_dir: Directory holding the manifest and model files
+            max_versions: Number of versions kept per (algorithm, dish)
+        """
+        self.root_dir = root_dir
+        self.max_versions = max_versions
+        os.makedirs(self.root_dir, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    # ==================== HASHING ====================
+
+    @staticmethod
+    def hash_data(dish_data: pd.DataFrame, columns: List[str] = None) -> str:
+        """
+        Fingerprint training data (one dish, or the whole order history).
+
+        Args:
+            dish_data: Historical data for one dish
+            columns: Columns included in the fingerprint
+
+        Returns:
+            Hex digest
+        """
+        columns = columns or ['date', 'quantity_sold']
+        values = dish_data[columns].sort_values(columns)
+        row_hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+    @staticmethod
+    def hash_params(params: Dict) -> str:
+        """
+        Fingerprint a hyperparameter dictionary.
+
+        Args:
+            params: Hyperparameters (JSON-serialisable after str() fallback)
+
+        Returns:
+            Hex digest
+        """
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    # ==================== SAVE / LOAD ====================
+
+    def save(self, algorithm: str, dish_name: str, model: Any,
+             data_hash: str, params_hash: str) -> str:
+        """
+        Store a fitted model as a new version.
+
+        Args:
+            algorithm: Algorithm name
+            dish_name: Name of the dish
+            model: Fitted model object (must be picklable)
+            data_hash: Fingerprint of the training data
+            params_hash: Fingerprint of the hyperparameters
+
+        Returns:
+            Path of the written model file
+        """
+        model_dir = os.path.join(self.root_dir, algorithm)
+        os.makedirs(model_dir, exist_ok=True)
+
+        filename = f"{self._slug(dish_name)}-{data_hash[:12]}-{params_hash[:8]}.pkl"
+        path = os.path.join(model_dir, filename)
+        self._atomic_write(path, pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+        versions = [
+            v for v in self.manifest.get(self._key(algorithm, dish_name), [])
+            if v['path'] != os.path.relpath(path, self.root_dir)
+        ]
+        versions.append({
+            'data_hash': data_hash,
+            'params_hash': params_hash,
+            'path': os.path.relpath(path, self.root_dir),
+            'created_at': datetime.now().isoformat()
+        })
+        self.manifest[self._key(algorithm, dish_name)] = versions
+
+        self.evict(algorithm, dish_name, write=False)
+        self._write_manifest()
+        return path
+
+    def load(self, algorithm: str, dish_name: str, data_hash: str, params_hash: str) -> Optional[Any]:
+        """
+        Load the model matching the given fingerprints.
+
+        Returns:
+            The fitted model, or None if no fresh version exists
+        """
+        record = self._find(algorithm, dish_name, data_hash, params_hash)
+        if record is None:
+            return None
+
+        path = os.path.join(self.root_dir, record['path'])
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Could not load model {path}: {e}")
+            return None
+
+    def is_stale(self, algorithm: str, dish_name: str, data_hash: str, params_hash: str) -> bool:
+        """Check whether a model for these fingerprints has to be (re)trained."""
+        return self._find(algorithm, dish_name, data_hash, params_hash) is None
+
+    def list_versions(self, algorithm: str, dish_name: str) -> List[Dict]:
+        """List stored versions for one dish, oldest first."""
+        return list(self.manifest.get(self._key(algorithm, dish_name), []))
+
+    def evict(self, algorithm: str = None, dish_name: str = None,
+              keep: int = None, write: bool = True) -> int:
+        """
+        Delete old versions, keeping the newest ``keep`` per (algorithm, dish).
+
+        Args:
+            algorithm: Restrict eviction to one algorithm (default: all)
+            dish_name: Restrict eviction to one dish (default: all)
+            keep: Versions to keep (default: ``max_versions``)
+            write: Persist the manifest afterwards
+
+        Returns:
+            Number of versions removed
+        """
+        keep = self.max_versions if keep is None else keep
+        removed = 0
+
+        for key, versions in list(self.manifest.items()):
+            key_algorithm, key_dish = key.split('/', 1)
+            if algorithm is not None and key_algorithm != algorithm:
+                continue
+            if dish_name is not None and key_dish != dish_name:
+                continue
+
+            cutoff = max(0, len(versions) - keep)
+            for record in versions[:cutoff]:
+                path = os.path.join(self.root_dir, record['path'])
+                if os.path.exists(path):
+                    os.remove(path)
+                removed += 1
+
+            if cutoff:
+                self.manifest[key] = versions[cutoff:]
+            if not self.manifest[key]:
+                del self.manifest[key]
+
+        if write and removed:
+            self._write_manifest()
+        return removed
+
+    # ==================== TUNED PARAMETERS ====================
+
+    def save_tuned_params(self, algorithm: str, params: Dict[str, Dict]) -> str:
+        """
+        Store tuned hyperparameters so later ``fit`` calls pick them up.
+
+        Args:
+            algorithm: Algorithm name
+            params: Hyperparameters per dish name ('__all__' = every dish)
+
+        Returns:
+            Path of the written file
+        """
+        model_dir = os.path.join(self.root_dir, algorithm)
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, self.TUNED_PARAMS_FILE)
+        payload = json.dumps(params, indent=2, ensure_ascii=False, default=str)
+        self._atomic_write(path, payload.encode('utf-8'))
+        return path
+
+    def load_tuned_params(self, algorithm: str) -> Dict[str, Dict]:
+        """Tuned hyperparameters per dish name, or {} if the algorithm was never tuned."""
+        path = os.path.join(self.root_dir, algorithm, self.TUNED_PARAMS_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable tuned parameters {path}: {e}")
+            return {}
+
+    # ==================== INTERNALS ====================
+
+    @staticmethod
+    def _key(algorithm: str, dish_name: str) -> str:
+        return f"{algorithm}/{dish_name}"
+
+    @staticmethod
+    def _slug(dish_name: str) -> str:
+        """Filesystem-safe dish name, disambiguated with a short hash."""
+        safe = re.sub(r'[^A-Za-z0-9]+', '_', dish_name).strip('_')[:40]
+        return f"{safe}_{hashlib.sha1(dish_name.encode('utf-8')).hexdigest()[:6]}"
+
+    def _find(self, algorithm: str, dish_name: str, data_hash: str, params_hash: str) -> Optional[Dict]:
+        for record in reversed(self.manifest.get(self._key(algorithm, dish_name), [])):
+            if record['data_hash'] == data_hash and record['params_hash'] == params_hash:
+                return record
+        return None
+
+    def _read_manifest(self) -> Dict:
+        path = os.path.join(self.root_dir, self.MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable registry manifest {path}: {e}")
+            return {}
+
+    def _write_manifest(self):
+        path = os.path.join(self.root_dir, self.MANIFEST_FILE)
+        payload = json.dumps(self.manifest, indent=2, ensure_ascii=False)
+        self._atomic_write(path, payload.encode('utf-8'))
+
+    @staticmethod
+    def _atomic_write(path: str, payload: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
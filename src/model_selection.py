@@ -0,0 +1,297 @@
+"""
+Model Selection Module
+Per-dish algorithm selection from memoized backtest scores
+"""
+
+import os
+import json
+import math
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from src.ml_forecaster import MLForecaster
+from src.model_registry import ModelRegistry
+from src.feature_engine import FeatureEngine
+from src.backtesting import Backtester
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Expensive per-dish algorithms considered by 'auto'
+AUTO_CANDIDATES = ['sarima', 'xgboost', 'random_forest', 'croston']
+
+# Cheap statistical baselines, scored for every dish before any model is fit
+BASELINES = ['moving_average', 'weekday_average']
+
+# Backtest origins fall on a fixed grid, so existing folds keep their dates
+# (and their memoized scores) when new orders arrive
+ORIGIN_EPOCH = pd.Timestamp('2000-01-06')
+
+# Quantile levels stored with the baseline models (same as MLForecaster.QUANTILES)
+QUANTILE_LEVELS = tuple(MLForecaster.QUANTILES)
+
+
+class AlgorithmSelector:
+    """
+    Pick the best forecasting algorithm for every dish.
+
+    1. Baselines (trailing moving average, same-weekday average) are
+       backtested for every dish at once with array operations.
+    2. Dishes whose best baseline is already within ``screen_wape`` are
+       served by that baseline and skip the expensive fits.
+    3. The remaining dishes backtest every candidate algorithm; each fold's
+       error sums are memoized by (algorithm, params, dish, origin, hash of
+       the dish's data up to the end of the fold), so re-running selection
+       after new orders only scores folds of dishes whose data changed.
+
+    Each dish gets the algorithm with the lowest MAE over its folds.
+    """
+
+    def __init__(self, candidates: Optional[Sequence[str]] = None, horizon: int = 7,
+                 step: int = 7, n_origins: int = 4, min_train_days: int = 56,
+                 screen_wape: float = 25.0, baseline_window: int = 28,
+                 cache_path: Optional[str] = None, n_jobs: int = 1, backend: str = 'process'):
+        """
+        Initialize Algorithm Selector.
+
+        Args:
+            candidates: Algorithms backtested for unscreened dishes
+                        (default: ``AUTO_CANDIDATES``)
+            horizon: Days forecast from each origin
+            step: Days between consecutive origins
+            n_origins: Backtest origins per dish
+            min_train_days: Days of history required before the first origin
+            screen_wape: WAPE (%) under which a baseline is kept without
+                         backtesting the candidates
+            baseline_window: Days averaged by the baselines
+            cache_path: JSON file persisting the memoized fold scores
+            n_jobs: Number of folds backtested in parallel
+            backend: Parallel backend, 'process' or 'thread'
+        """
+        self.candidates = list(candidates or AUTO_CANDIDATES)
+        self.horizon = horizon
+        self.step = step
+        self.n_origins = n_origins
+        self.min_train_days = min_train_days
+        self.screen_wape = screen_wape
+        self.baseline_window = baseline_window
+        self.cache_path = cache_path
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.fold_scores = self._load_cache()
+        self.fits_run = 0
+        self._used = {}
+
+    # ==================== SELECTION ====================
+
+    def select(self, orders: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        Select an algorithm for every dish in ``orders``.
+
+        Returns:
+            Mapping dish name -> {'algorithm', 'scores' (MAE per algorithm),
+            'screened' (True if the candidates were skipped)}
+        """
+        orders = orders.assign(date=pd.to_datetime(orders['date']))
+        panel = FeatureEngine.build_panel(orders)
+        last_sale = orders.groupby('dish_name')['date'].max()
+
+        selection = {}
+        for dish_name in panel.columns:
+            positions = self._origin_positions(panel[dish_name], last_sale[dish_name])
+            if len(positions) == 0:
+                selection[dish_name] = {'algorithm': 'moving_average', 'scores': {}, 'screened': True}
+                continue
+
+            stats = self._baseline_stats(panel[dish_name].to_numpy(), positions)
+            best = min(stats, key=lambda name: _mae(stats[name]))
+            screened = _wape(stats[best]) <= self.screen_wape
+
+            if not screened:
+                dish_orders = orders[orders['dish_name'] == dish_name]
+                origins = list(panel.index[positions])
+                for algorithm in self.candidates:
+                    stats[algorithm] = self._model_stats(algorithm, dish_name, dish_orders, origins)
+
+            scores = {name: _mae(s) for name, s in stats.items()}
+            selection[dish_name] = {
+                'algorithm': min(scores, key=scores.get),
+                'scores': scores,
+                'screened': screened
+            }
+
+        self._save_cache()
+        chosen = pd.Series({d: s['algorithm'] for d, s in selection.items()}).value_counts()
+        logger.info(f"Selected algorithms: {chosen.to_dict()}")
+        return selection
+
+    def _origin_positions(self, series: pd.Series, last_sale) -> np.ndarray:
+        """Grid origins of one dish with a full horizon of its own actuals, latest ``n_origins``."""
+        dates = series.index
+        launched = np.flatnonzero(series.notna().to_numpy())
+        if len(launched) == 0:
+            return np.array([], dtype=int)
+
+        first = launched[0] + self.min_train_days - 1
+        last = dates.get_loc(pd.Timestamp(last_sale)) - self.horizon
+        positions = np.arange(max(first, 0), last + 1)
+        on_grid = ((dates[positions] - ORIGIN_EPOCH).days % self.step) == 0
+        return positions[on_grid][-self.n_origins:]
+
+    # ==================== BASELINES ====================
+
+    def _baseline_stats(self, values: np.ndarray, positions: np.ndarray) -> Dict[str, Dict]:
+        """Error sums of every baseline over the folds of one dish, in a few array ops."""
+        steps = np.arange(1, self.horizon + 1)
+        targets = positions[:, None] + steps[None, :]
+        actual = values[targets]
+
+        # Trailing mean of the window ending at each origin
+        trailing = positions[:, None] - np.arange(self.baseline_window)[None, :]
+        window = np.where(trailing >= 0, values[np.clip(trailing, 0, None)], np.nan)
+        moving = np.floor(np.nanmean(window, axis=1))[:, None].repeat(self.horizon, axis=1)
+
+        # Mean of the last 4 same-weekday values known at the origin
+        weeks_back = np.ceil(steps / 7).astype(int)[None, :, None] + np.arange(4)[None, None, :]
+        lagged = targets[:, :, None] - 7 * weeks_back
+        same_day = np.where(lagged >= 0, values[np.clip(lagged, 0, None)], np.nan)
+        weekday = np.floor(np.nanmean(same_day, axis=2))
+
+        return {
+            'moving_average': _error_sums(np.nan_to_num(moving), actual),
+            'weekday_average': _error_sums(np.nan_to_num(weekday), actual)
+        }
+
+    # ==================== MEMOIZED BACKTESTS ====================
+
+    def _model_stats(self, algorithm: str, dish_name: str, dish_orders: pd.DataFrame,
+                     origins: List[pd.Timestamp]) -> Dict:
+        """Error sums of one algorithm for one dish, backtesting only uncached folds."""
+        params_hash = MLForecaster(algorithm=algorithm, quantiles=False).params_hash(dish_name)
+        dish_cache = self.fold_scores.setdefault(dish_name, {})
+
+        keys = {}
+        for origin in origins:
+            fold_end = origin + pd.Timedelta(days=self.horizon)
+            data_hash = ModelRegistry.hash_data(dish_orders[dish_orders['date'] <= fold_end])
+            keys[origin] = f"{algorithm}|{params_hash}|{origin:%Y-%m-%d}|{data_hash[:16]}"
+
+        missing = [origin for origin in origins if keys[origin] not in dish_cache]
+        if missing:
+            backtester = Backtester(dish_orders, horizon=self.horizon, step=self.step,
+                                    min_train_days=self.min_train_days,
+                                    n_jobs=self.n_jobs, backend=self.backend)
+            forecasts = backtester.run(algorithm, origins=missing)
+            for origin, fold in forecasts.groupby('origin'):
+                dish_cache[keys[origin]] = _error_sums(fold['predicted_quantity'].to_numpy(),
+                                                       fold['actual'].to_numpy())
+            self.fits_run += len(missing)
+
+        folds = [dish_cache[keys[origin]] for origin in origins if keys[origin] in dish_cache]
+        self._used.setdefault(dish_name, set()).update(keys.values())
+        return {name: sum(fold[name] for fold in folds) for name in ['abs_error', 'sq_error', 'actual', 'n']}
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable fold score cache {self.cache_path}: {e}")
+            return {}
+
+    def _save_cache(self) -> None:
+        """Drop folds no longer used by the re-scored dishes and persist the cache."""
+        for dish_name, used in self._used.items():
+            self.fold_scores[dish_name] = {k: v for k, v in self.fold_scores[dish_name].items() if k in used}
+        self._used = {}
+
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.fold_scores, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+
+# ==================== BASELINE MODELS ====================
+
+def baseline_model(name: str, dish_data: pd.DataFrame, window: int = 28) -> Dict:
+    """
+    Fit a baseline on one dish's orders.
+
+    Both baselines also keep the empirical quantiles of the demand they
+    average (per weekday for the profile) under 'quantiles'.
+
+    Returns:
+        Model dict: {'type': 'average', 'value'} for the moving average (the
+        fallback format every forecaster already understands), or
+        {'type': 'weekday_profile', 'values'} with one mean per weekday
+    """
+    panel = FeatureEngine.build_panel(dish_data)
+    recent = panel.iloc[-window:, 0]
+    if name == 'moving_average':
+        quantiles = recent.quantile(list(QUANTILE_LEVELS)).tolist()
+        return {'type': 'average', 'value': float(recent.mean()), 'quantiles': quantiles}
+
+    recent = panel.iloc[-max(window, 28):, 0]
+    by_weekday = recent.groupby(recent.index.dayofweek)
+    profile = by_weekday.mean().reindex(range(7))
+    quantiles = by_weekday.quantile(list(QUANTILE_LEVELS)).unstack().reindex(range(7))
+    fallback = recent.quantile(list(QUANTILE_LEVELS)).to_numpy()
+    quantiles = quantiles.to_numpy()
+    quantiles = np.where(np.isnan(quantiles), fallback[None, :], quantiles)
+    return {'type': 'weekday_profile', 'values': profile.fillna(recent.mean()).tolist(),
+            'quantiles': quantiles.tolist()}
+
+
+def baseline_forecast(model: Dict, future_dates: Sequence) -> np.ndarray:
+    """Predictions of a baseline model for the given dates."""
+    if model.get('type') == 'weekday_profile':
+        weekdays = pd.DatetimeIndex(pd.to_datetime(list(future_dates))).dayofweek
+        return np.asarray(model['values'], dtype=float)[weekdays]
+    return np.full(len(future_dates), model.get('value', 0), dtype=float)
+
+
+def baseline_quantiles(model: Dict, future_dates: Sequence,
+                       levels: Sequence[float] = QUANTILE_LEVELS) -> np.ndarray:
+    """
+    Quantiles of a baseline model for the given dates.
+
+    Returns:
+        (dates x levels) array; the point forecast is repeated when the model
+        has no stored quantiles or they are for other levels
+    """
+    stored = model.get('quantiles')
+    if stored is None or tuple(levels) != QUANTILE_LEVELS:
+        return np.tile(baseline_forecast(model, future_dates)[:, None], len(levels))
+    if model.get('type') == 'weekday_profile':
+        weekdays = pd.DatetimeIndex(pd.to_datetime(list(future_dates))).dayofweek
+        return np.asarray(stored, dtype=float)[weekdays]
+    return np.tile(np.asarray(stored, dtype=float)[None, :], (len(future_dates), 1))
+
+
+def _error_sums(predicted: np.ndarray, actual: np.ndarray) -> Dict[str, float]:
+    error = np.asarray(predicted, dtype=float) - np.asarray(actual, dtype=float)
+    return {
+        'abs_error': float(np.abs(error).sum()),
+        'sq_error': float((error ** 2).sum()),
+        'actual': float(np.sum(actual)),
+        'n': int(error.size)
+    }
+
+
+def _mae(stats: Dict) -> float:
+    return stats['abs_error'] / stats['n'] if stats['n'] else math.inf
+
+
+def _wape(stats: Dict) -> float:
+    if stats['actual'] > 0:
+        return stats['abs_error'] / stats['actual'] * 100
+    return 0.0 if stats['abs_error'] == 0 else math.inf
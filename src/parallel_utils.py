@@ -0,0 +1,58 @@
+"""
+Parallel Execution Helpers
+Small wrapper around concurrent.futures used by the forecasting modules
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Sequence
+
+VALID_BACKENDS = ['process', 'thread']
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """
+    Translate an ``n_jobs`` setting into a concrete worker count.
+
+    Args:
+        n_jobs: Number of workers (-1 = all cores, -2 = all but one, ...)
+
+    Returns:
+        Worker count, at least 1
+    """
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def parallel_map(func: Callable, tasks: Sequence[tuple], n_jobs: int = 1,
+                 backend: str = 'process') -> List:
+    """
+    Call ``func(*task)`` for every task and return the results in task order.
+
+    Runs serially when only one worker is requested, so the serial and
+    parallel paths share exactly the same code.
+
+    Args:
+        func: Module-level callable (must be picklable for the process backend)
+        tasks: Sequence of argument tuples
+        n_jobs: Number of workers (-1 = all cores)
+        backend: 'process' or 'thread'
+
+    Returns:
+        List of results, one per task
+    """
+    if backend not in VALID_BACKENDS:
+        raise ValueError(f"Backend must be one of {VALID_BACKENDS}")
+
+    tasks = list(tasks)
+    workers = min(resolve_n_jobs(n_jobs), len(tasks))
+    if workers <= 1:
+        return [func(*task) for task in tasks]
+
+    executor_cls = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+    with executor_cls(max_workers=workers) as executor:
+        futures = [executor.submit(func, *task) for task in tasks]
+        return [future.result() for future in futures]
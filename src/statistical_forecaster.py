@@ -0,0 +1,329 @@
+"""
+Statistical Forecaster Module
+Vectorized seasonal exponential smoothing, the fallback when ML is not used
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.feature_engine import FeatureEngine
+
+# Fitted arrays of a forecaster, one entry (row) per series
+STATE = ['month_index', 'weekday_index', 'level', 'trend', 'error_quantiles']
+
+class StatisticalForecaster:
+    """
+    Damped-trend exponential smoothing with per-dish weekday and month indices.
+
+    Every dish is a column of one date x dish matrix, so fitting is a single
+    pass over the lookback window and forecasting is a (horizon x dishes)
+    array expression:
+
+        forecast[h, dish] = (level + trend * (phi + ... + phi^h))
+                            * month_index[dish, month] * weekday_index[dish, weekday]
+
+    - Month indices are estimated from ``season_lookback`` days when a dish
+      has history in every month; otherwise the configured seasonal factors
+      (winter/summer multipliers) are used.
+    - Weekday indices come from the last ``weekday_lookback`` days; dishes
+      with less history use the configured weekend factor.
+    - Level and trend are smoothed on the deseasonalized demand over the last
+      ``lookback_days`` days.
+    - Quantiles add the empirical quantiles of the deseasonalized one-step
+      errors to the level path before reseasonalizing.
+
+    ``predict_origins`` fits and forecasts many origins at once by stacking
+    each origin's history window as extra columns.
+    """
+
+    def __init__(self, seasonal_factors: Optional[Dict] = None, lookback_days: int = 182,
+                 weekday_lookback: int = 56, season_lookback: int = 730,
+                 alpha: float = 0.2, beta: float = 0.05, phi: float = 0.9,
+                 quantiles: Sequence[float] = (0.1, 0.5, 0.9)):
+        """
+        Initialize Statistical Forecaster.
+
+        Args:
+            seasonal_factors: Prior factors from ``InventoryOptimizer._create_seasonal_factors``
+                              (default: no seasonal or weekend adjustment)
+            lookback_days: Days of history the level and trend are smoothed over
+            weekday_lookback: Days of history behind the weekday indices
+            season_lookback: Days of history behind the month indices
+            alpha: Smoothing of the level (0-1)
+            beta: Smoothing of the trend (0-1, 0 = no trend)
+            phi: Trend damping per day (1 = undamped)
+            quantiles: Quantile levels added as p-columns (e.g. p10/p50/p90)
+        """
+        self.seasonal_factors = seasonal_factors
+        self.lookback_days = lookback_days
+        self.weekday_lookback = weekday_lookback
+        self.season_lookback = season_lookback
+        self.alpha = alpha
+        self.beta = beta
+        self.phi = phi
+        self.quantiles = tuple(quantiles)
+
+        self.dishes = []
+        self.level = None
+        self.trend = None
+        self.month_index = None
+        self.weekday_index = None
+        self.error_quantiles = None
+        self.is_fitted = False
+
+    # ==================== PRIORS ====================
+
+    def _prior_month_index(self) -> np.ndarray:
+        """Configured multiplier per month (index 0 = January)."""
+        index = np.ones(12)
+        if self.seasonal_factors:
+            for season in ['winter', 'summer']:
+                months = np.asarray(self.seasonal_factors[f'{season}_months']) - 1
+                index[months] = self.seasonal_factors['factors'][season]
+        return index
+
+    def _prior_weekday_index(self) -> np.ndarray:
+        """Configured multiplier per weekday (index 0 = Monday)."""
+        index = np.ones(7)
+        if self.seasonal_factors:
+            index[5:] = self.seasonal_factors['weekend_factor']
+        return index
+
+    # ==================== FIT ====================
+
+    def fit(self, orders_data: pd.DataFrame, as_of=None) -> 'StatisticalForecaster':
+        """
+        Fit every dish at once.
+
+        Args:
+            orders_data: Historical orders with ['date', 'dish_name', 'quantity_sold']
+            as_of: Ignore orders after this date (default: use all orders)
+
+        Returns:
+            The fitted forecaster
+        """
+        if as_of is not None:
+            orders_data = orders_data[pd.to_datetime(orders_data['date']) <= pd.Timestamp(as_of)]
+        panel = FeatureEngine.build_panel(orders_data)
+        self.dishes = list(panel.columns)
+        values = panel.to_numpy(dtype=float)
+        months = np.broadcast_to(panel.index.month.to_numpy()[:, None] - 1, values.shape)
+        weekdays = np.broadcast_to(panel.index.dayofweek.to_numpy()[:, None], values.shape)
+
+        for name, value in self._fit_state(values, months, weekdays).items():
+            setattr(self, name, value)
+        self.is_fitted = True
+        return self
+
+    def _fit_state(self, values: np.ndarray, months: np.ndarray, weekdays: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Fit indices, level and trend of every column of a (days x series) matrix.
+
+        ``months`` and ``weekdays`` give the month (0-11) and weekday (0-6) of
+        every cell, so columns may cover different dates (see ``predict_origins``).
+        """
+        month_index = self._fit_index(values[-self.season_lookback:], months[-self.season_lookback:],
+                                      self._prior_month_index(), min_days=14)
+        columns = np.arange(values.shape[1])
+        month_factor = month_index[columns, months]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deseasonalized = np.where(month_factor > 0, values / month_factor, np.nan)
+        weekday_index = self._fit_index(deseasonalized[-self.weekday_lookback:], weekdays[-self.weekday_lookback:],
+                                        self._prior_weekday_index(), min_days=2)
+
+        window = slice(-self.lookback_days, None)
+        seasonal = month_factor[window] * weekday_index[columns, weekdays[window]]
+        level, trend, error_quantiles = self._smooth(values[window], seasonal)
+        return {'month_index': month_index, 'weekday_index': weekday_index, 'level': level,
+                'trend': trend, 'error_quantiles': error_quantiles}
+
+    @staticmethod
+    def _fit_index(values: np.ndarray, categories: np.ndarray, prior: np.ndarray, min_days: int) -> np.ndarray:
+        """
+        (series x categories) seasonal index: mean demand per category over the
+        mean of the category means. Series missing a category (fewer than
+        ``min_days`` observations in it) use the prior.
+        """
+        n_categories = len(prior)
+        priors = np.tile(prior, (values.shape[1], 1))
+        if len(values) == 0:
+            return priors
+
+        observed = ~np.isnan(values)
+        filled = np.nan_to_num(values)
+        days = np.stack([(observed & (categories == k)).sum(axis=0) for k in range(n_categories)])
+        totals = np.stack([np.where(categories == k, filled, 0).sum(axis=0) for k in range(n_categories)])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = totals / days
+            index = means / means.mean(axis=0)
+
+        complete = (days >= min_days).all(axis=0) & np.isfinite(index).all(axis=0)
+        return np.where(complete[:, None], np.nan_to_num(index.T), priors)
+
+    def _smooth(self, values: np.ndarray, seasonal: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Damped Holt smoothing of the deseasonalized demand of every column.
+
+        Returns:
+            Tuple of (level, trend, error quantiles) arrays
+        """
+        n_series = values.shape[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            adjusted = np.where(seasonal > 0, values / seasonal, np.nan)
+
+        level = np.zeros(n_series)
+        trend = np.zeros(n_series)
+        started = np.zeros(n_series, dtype=bool)
+        errors = np.full(values.shape, np.nan)
+
+        for t, row in enumerate(adjusted):
+            # Zero-index days (e.g. a weekday the dish never sells) carry no level information
+            valid = ~np.isnan(row)
+            first = valid & ~started
+            update = valid & started
+
+            level[first] = row[first]
+            predicted = level + self.phi * trend
+            errors[t, update] = row[update] - predicted[update]
+            new_level = self.alpha * row + (1 - self.alpha) * predicted
+            trend[update] = (self.beta * (new_level - level) + (1 - self.beta) * self.phi * trend)[update]
+            level[update] = new_level[update]
+            started |= first
+
+        error_quantiles = np.zeros((n_series, len(self.quantiles)))
+        has_errors = ~np.isnan(errors).all(axis=0)
+        if has_errors.any():
+            error_quantiles[has_errors] = np.nanquantile(errors[:, has_errors], self.quantiles, axis=0).T
+        return np.maximum(level, 0), trend, error_quantiles
+
+    # ==================== PREDICT ====================
+
+    @property
+    def output_columns(self) -> List[str]:
+        columns = ['date', 'dish_name', 'predicted_quantity', 'seasonal_factor', 'weekend_factor']
+        return columns + [f'p{int(round(q * 100))}' for q in self.quantiles]
+
+    def predict(self, days_ahead: int = 7, start_date=None) -> pd.DataFrame:
+        """
+        Forecast every dish for the N days after ``start_date``.
+
+        Args:
+            days_ahead: Number of days to forecast
+            start_date: Forecast origin (default: today)
+
+        Returns:
+            DataFrame with ['date', 'dish_name', 'predicted_quantity',
+            'seasonal_factor', 'weekend_factor'] and the quantile columns,
+            ordered by date then dish. ``seasonal_factor`` is the dish's month
+            index and ``weekend_factor`` its weekday index for that date.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+        if days_ahead <= 0 or not self.dishes:
+            return pd.DataFrame(columns=self.output_columns)
+
+        start_date = pd.Timestamp(start_date).date() if start_date is not None else datetime.now().date()
+        dates = pd.date_range(start_date + timedelta(days=1), periods=days_ahead, freq='D')
+        shape = (days_ahead, len(self.dishes))
+        state = {name: getattr(self, name) for name in STATE}
+        outputs = self._forecast_state(state, np.broadcast_to(dates.month.to_numpy()[:, None] - 1, shape),
+                                       np.broadcast_to(dates.dayofweek.to_numpy()[:, None], shape))
+
+        forecast = pd.DataFrame({
+            'date': np.repeat(np.array(dates.date, dtype=object), len(self.dishes)),
+            'dish_name': np.tile(np.array(self.dishes, dtype=object), days_ahead)
+        })
+        return self._add_outputs(forecast, outputs, slice(None))
+
+    def predict_origins(self, orders_data: pd.DataFrame, origins: Sequence, days_ahead: int = 7) -> pd.DataFrame:
+        """
+        Fit and forecast as of many origins in one vectorized run.
+
+        Every (origin, dish) pair becomes a column of one matrix holding the
+        history window that ends at the origin's last order date, so the
+        smoothing pass runs once for all origins. The result for each origin
+        equals ``fit(orders_data, as_of=origin).predict(days_ahead, origin)``.
+
+        Args:
+            orders_data: Full order history
+            origins: Forecast origins (e.g. backtest dates)
+            days_ahead: Number of days forecast after each origin
+
+        Returns:
+            DataFrame with an 'origin' column followed by the ``predict`` columns,
+            for dishes that had sold by each origin
+        """
+        panel = FeatureEngine.build_panel(orders_data)
+        origins = [pd.Timestamp(o) for o in origins]
+        order_dates = np.sort(pd.to_datetime(orders_data['date']).unique())
+        if days_ahead <= 0 or panel.empty or not origins:
+            return pd.DataFrame(columns=['origin'] + self.output_columns)
+
+        # Last order date on or before each origin (a fold's panel ends there)
+        positions = np.searchsorted(order_dates, np.array(origins, dtype='datetime64[ns]'), side='right') - 1
+        keep = positions >= 0
+        origins = [o for o, k in zip(origins, keep) if k]
+        fold_ends = panel.index.get_indexer(pd.DatetimeIndex(order_dates[positions[keep]]))
+
+        length = max(self.lookback_days, self.weekday_lookback, self.season_lookback)
+        rows = fold_ends[None, :] - (length - 1) + np.arange(length)[:, None]          # window x origins
+        values = panel.to_numpy(dtype=float)[np.maximum(rows, 0)]                      # window x origins x dishes
+        values[rows < 0] = np.nan
+
+        n_origins, n_dishes = len(origins), panel.shape[1]
+        shape = (length, n_origins, n_dishes)
+        months = np.broadcast_to((panel.index.month.to_numpy() - 1)[np.maximum(rows, 0)][:, :, None], shape)
+        weekdays = np.broadcast_to(panel.index.dayofweek.to_numpy()[np.maximum(rows, 0)][:, :, None], shape)
+        state = self._fit_state(values.reshape(length, -1), months.reshape(length, -1),
+                                weekdays.reshape(length, -1))
+
+        dates = pd.DatetimeIndex(np.add.outer(np.array(origins, dtype='datetime64[D]'),
+                                              np.arange(1, days_ahead + 1)).T.ravel())
+        horizon_shape = (days_ahead, n_origins, n_dishes)
+        months = np.broadcast_to((dates.month.to_numpy() - 1).reshape(days_ahead, n_origins, 1), horizon_shape)
+        weekdays = np.broadcast_to(dates.dayofweek.to_numpy().reshape(days_ahead, n_origins, 1), horizon_shape)
+        outputs = self._forecast_state(state, months.reshape(days_ahead, -1), weekdays.reshape(days_ahead, -1))
+
+        # Origin-major rows (origin, date, dish), like one ``predict`` call per origin
+        outputs = {name: value.reshape(days_ahead, n_origins, n_dishes, *value.shape[2:]).swapaxes(0, 1)
+                   for name, value in outputs.items()}
+        launched = ~np.isnan(values[-1])                                               # origins x dishes
+        selected = np.broadcast_to(launched[:, None, :], (n_origins, days_ahead, n_dishes))
+
+        day_dates = np.array(dates.date, dtype=object).reshape(days_ahead, n_origins).T
+        forecast = pd.DataFrame({
+            'origin': np.repeat(np.array(origins, dtype='datetime64[ns]'), days_ahead * n_dishes),
+            'date': np.repeat(day_dates.ravel(), n_dishes),
+            'dish_name': np.tile(np.array(panel.columns, dtype=object), n_origins * days_ahead)
+        })[selected.ravel()].reset_index(drop=True)
+        return self._add_outputs(forecast, outputs, selected)
+
+    def _forecast_state(self, state: Dict[str, np.ndarray], months: np.ndarray,
+                        weekdays: np.ndarray) -> Dict[str, np.ndarray]:
+        """(horizon x series) point forecasts, factors and quantiles of a fitted state."""
+        days_ahead, n_series = months.shape
+        columns = np.arange(n_series)
+
+        # Trend multiplier phi + phi^2 + ... + phi^h, with h counted from the origin
+        damping = np.cumsum(self.phi ** np.arange(1, days_ahead + 1))
+        path = np.maximum(state['level'][None, :] + damping[:, None] * state['trend'][None, :], 0)
+
+        month = state['month_index'][columns, months]
+        weekday = state['weekday_index'][columns, weekdays]
+        seasonal = month * weekday
+        quantiles = np.maximum(path[:, :, None] + state['error_quantiles'][None, :, :], 0) * seasonal[:, :, None]
+        return {'point': path * seasonal, 'month': month, 'weekday': weekday,
+                'quantiles': np.sort(quantiles, axis=2)}
+
+    def _add_outputs(self, forecast: pd.DataFrame, outputs: Dict[str, np.ndarray], selected) -> pd.DataFrame:
+        """Fill the value columns of a forecast frame from ``_forecast_state`` outputs."""
+        forecast['predicted_quantity'] = np.maximum(0, outputs['point'][selected]).astype(int).ravel()
+        forecast['seasonal_factor'] = outputs['month'][selected].ravel()
+        forecast['weekend_factor'] = outputs['weekday'][selected].ravel()
+        quantiles = outputs['quantiles'][selected].reshape(-1, len(self.quantiles))
+        for k, column in enumerate(self.output_columns[5:]):
+            forecast[column] = quantiles[:, k]
+        return forecast
+
@@ -0,0 +1,304 @@
+"""
+Hyperparameter Tuning Module
+Successive-halving search over time-series cross-validation folds
+"""
+
+import os
+import json
+import math
+import time
+import itertools
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+from src.ml_forecaster import MLForecaster
+from src.model_registry import ModelRegistry
+from src.backtesting import Backtester, score
+from src.parallel_utils import parallel_map, resolve_n_jobs
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Candidate values per hyperparameter; configs are sampled from the grid
+SEARCH_SPACES = {
+    'sarima': {
+        'order': [(1, 1, 1), (0, 1, 1), (1, 0, 1), (2, 1, 1), (1, 1, 2)],
+        'seasonal_order': [(1, 1, 1, 7), (0, 1, 1, 7), (1, 0, 0, 7), (1, 0, 1, 7)]
+    },
+    'xgboost': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [3, 5, 7],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'subsample': [0.7, 0.9, 1.0],
+        'min_child_weight': [1, 3, 5]
+    },
+    'random_forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [5, 10, None],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 5]
+    },
+    'croston': {
+        'method': ['croston', 'sba', 'tsb'],
+        'alpha': [0.05, 0.1, 0.2, 0.3],
+        'beta': [0.05, 0.1, 0.2, 0.3]
+    },
+    'xgboost_global': {
+        'n_estimators': [150, 300, 600],
+        'max_depth': [4, 6, 8],
+        'learning_rate': [0.03, 0.05, 0.1],
+        'subsample': [0.7, 0.9],
+        'min_child_weight': [1, 5, 10]
+    }
+}
+
+GLOBAL_KEY = '__all__'
+
+
+class HyperparameterTuner:
+    """
+    Tune one forecasting algorithm with successive halving.
+
+    Every candidate config is first scored on a few of the most recent
+    backtest origins; only the best ``1 / eta`` of the candidates survive to
+    the next rung, which uses ``eta`` times as many origins. The default
+    config is always a candidate, so tuning never selects a config that
+    backtests worse than the defaults.
+
+    With ``per_dish=True`` each dish runs its own halving over the same
+    trials: a trial trains the candidate only for the dishes where it is
+    still alive. The global model is always tuned as a whole.
+
+    Progress is saved to ``state_path`` after every batch of trials, so a
+    run stopped by ``time_budget`` resumes where it left off.
+    """
+
+    def __init__(self, orders: pd.DataFrame, algorithm: str, per_dish: bool = True,
+                 n_candidates: int = 12, eta: int = 3, min_origins: int = 2,
+                 max_origins: int = 18, horizon: int = 7, step: int = 7,
+                 metric: str = 'mae', time_budget: Optional[float] = None,
+                 state_path: Optional[str] = None, n_jobs: int = 1,
+                 backend: str = 'process', seed: int = 0):
+        """
+        Initialize Hyperparameter Tuner.
+
+        Args:
+            orders: Order history with ['date', 'dish_name', 'quantity_sold']
+            algorithm: Algorithm with a search space in ``SEARCH_SPACES``
+            per_dish: Select a config per dish instead of one for all dishes
+            n_candidates: Number of configs sampled from the search space
+            eta: Halving rate; the top 1/eta survive each rung
+            min_origins: Backtest origins of the first rung
+            max_origins: Maximum backtest origins of a rung
+            horizon: Forecast horizon of each origin in days
+            step: Days between consecutive origins
+            metric: Metric minimized, one of 'mae', 'rmse', 'mape', 'wape'
+            time_budget: Wall-clock cap in seconds (None = unlimited)
+            state_path: JSON file used to persist and resume progress
+            n_jobs: Number of trials run in parallel (-1 = all cores)
+            backend: Parallel backend, 'process' or 'thread'
+            seed: Random seed for sampling configs
+        """
+        if algorithm not in SEARCH_SPACES:
+            raise ValueError(f"Algorithm must be one of {list(SEARCH_SPACES)}")
+
+        self.orders = orders.assign(date=pd.to_datetime(orders['date']))
+        self.algorithm = algorithm
+        self.per_dish = per_dish and algorithm != 'xgboost_global'
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.min_origins = min_origins
+        self.max_origins = max_origins
+        self.horizon = horizon
+        self.step = step
+        self.metric = metric
+        self.time_budget = time_budget
+        self.state_path = state_path
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.seed = seed
+
+        self.state = self._load_state() or self._initial_state()
+
+    # ==================== SEARCH ====================
+
+    def sample_candidates(self) -> List[Dict]:
+        """Default config followed by distinct configs sampled from the search space."""
+        space = SEARCH_SPACES[self.algorithm]
+        names = sorted(space)
+        grid = list(itertools.product(*[space[name] for name in names]))
+
+        rng = np.random.RandomState(self.seed)
+        picks = rng.choice(len(grid), size=min(self.n_candidates - 1, len(grid)), replace=False)
+
+        defaults = MLForecaster.DEFAULT_PARAMS[self.algorithm]
+        candidates = [{name: defaults[name] for name in names if name in defaults}]
+        for i in picks:
+            config = dict(zip(names, grid[i]))
+            if config != candidates[0]:
+                candidates.append(config)
+        return [_jsonable(c) for c in candidates[:self.n_candidates]]
+
+    def run(self) -> Dict[str, Dict]:
+        """
+        Run (or resume) the search until it completes or the time budget ends.
+
+        Returns:
+            Best config per dish name (or under '__all__' for a global search)
+        """
+        deadline = time.time() + self.time_budget if self.time_budget is not None else None
+        state = self.state
+        batch_size = resolve_n_jobs(self.n_jobs)
+
+        while not state['complete']:
+            rung = state['rung']
+            n_origins = self._rung_origins(rung)
+            pending = [t for t in self._rung_trials(rung) if t['key'] not in state['scores']]
+
+            for start in range(0, len(pending), batch_size):
+                if deadline is not None and time.time() >= deadline:
+                    logger.info(f"Time budget reached at rung {rung}; "
+                                f"{len(pending) - start} trials left")
+                    self._save_state()
+                    return self.best_params()
+
+                batch = pending[start:start + batch_size]
+                tasks = [(self.algorithm, self._trial_orders(t['dishes']),
+                          state['candidates'][t['candidate']], n_origins,
+                          self.horizon, self.step, self.metric)
+                         for t in batch]
+                results = parallel_map(_run_trial, tasks, n_jobs=self.n_jobs, backend=self.backend)
+                for trial, result in zip(batch, results):
+                    state['scores'][trial['key']] = result
+                self._save_state()
+
+            self._promote(rung)
+            survivors = max(len(alive) for alive in state['alive'].values())
+            if survivors <= 1 or n_origins >= self.max_origins:
+                state['complete'] = True
+            else:
+                state['rung'] += 1
+            self._save_state()
+            logger.info(f"Rung {rung} done ({n_origins} origins), up to {survivors} configs left")
+
+        return self.best_params()
+
+    def best_params(self) -> Dict[str, Dict]:
+        """Best config so far per dish (or '__all__'), scored on the latest rung reached."""
+        best = {}
+        for group, alive in self.state['alive'].items():
+            scored = self._group_scores(group, alive)
+            if scored:
+                best[group] = self.state['candidates'][min(scored, key=scored.get)]
+        return best
+
+    def save(self, registry: ModelRegistry) -> Dict[str, Dict]:
+        """
+        Persist the winning configs in the model registry, where
+        ``MLForecaster.fit`` picks them up.
+
+        Returns:
+            The saved configs
+        """
+        best = self.best_params()
+        registry.save_tuned_params(self.algorithm, best)
+        logger.info(f"Saved tuned {self.algorithm} params for {len(best)} groups")
+        return best
+
+    # ==================== INTERNALS ====================
+
+    def _groups(self) -> List[str]:
+        if self.per_dish:
+            return list(self.orders['dish_name'].unique())
+        return [GLOBAL_KEY]
+
+    def _rung_origins(self, rung: int) -> int:
+        return min(self.max_origins, self.min_origins * self.eta ** rung)
+
+    def _rung_trials(self, rung: int) -> List[Dict]:
+        """One trial per candidate alive in any group, covering those groups."""
+        trials = []
+        for candidate in range(len(self.state['candidates'])):
+            groups = [g for g, alive in self.state['alive'].items() if candidate in alive]
+            if groups:
+                dishes = groups if self.per_dish else None
+                trials.append({'key': f"{rung}:{candidate}", 'candidate': candidate, 'dishes': dishes})
+        return trials
+
+    def _trial_orders(self, dishes: Optional[List[str]]) -> pd.DataFrame:
+        if dishes is None:
+            return self.orders
+        return self.orders[self.orders['dish_name'].isin(dishes)]
+
+    def _group_scores(self, group: str, alive: List[int]) -> Dict[int, float]:
+        """Scores of the alive candidates of a group on the latest rung scored."""
+        for rung in range(self.state['rung'], -1, -1):
+            scored = {}
+            for candidate in alive:
+                result = self.state['scores'].get(f"{rung}:{candidate}", {})
+                if group in result:
+                    value = result[group]
+                    scored[candidate] = math.inf if value is None or np.isnan(value) else value
+            if scored:
+                return scored
+        return {}
+
+    def _promote(self, rung: int) -> None:
+        """Keep the best 1/eta alive candidates of every group."""
+        for group, alive in self.state['alive'].items():
+            scored = self._group_scores(group, alive)
+            keep = max(1, math.ceil(len(alive) / self.eta))
+            self.state['alive'][group] = sorted(scored, key=scored.get)[:keep] or alive[:1]
+
+    def _initial_state(self) -> Dict:
+        candidates = self.sample_candidates()
+        return {
+            'algorithm': self.algorithm,
+            'per_dish': self.per_dish,
+            'candidates': candidates,
+            'alive': {group: list(range(len(candidates))) for group in self._groups()},
+            'rung': 0,
+            'scores': {},
+            'complete': False
+        }
+
+    def _load_state(self) -> Optional[Dict]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('algorithm') != self.algorithm or state.get('per_dish') != self.per_dish:
+            logger.warning(f"Ignoring tuning state {self.state_path} from a different search")
+            return None
+        logger.info(f"Resuming tuning at rung {state['rung']} with {len(state['scores'])} trials done")
+        return state
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+
+def _jsonable(config: Dict) -> Dict:
+    """Config with tuples as lists, so it round-trips through the state file unchanged."""
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in config.items()}
+
+
+def _run_trial(algorithm: str, orders: pd.DataFrame, params: Dict, n_origins: int,
+               horizon: int, step: int, metric: str) -> Dict[str, float]:
+    """Backtest one config on the latest ``n_origins`` origins; score per dish and overall."""
+    backtester = Backtester(orders, horizon=horizon, step=step, n_origins=n_origins)
+    forecasts = backtester.run(algorithm, model_params=params)
+
+    result = {GLOBAL_KEY: float(score(forecasts, ['algorithm'])[metric].iloc[0])}
+    per_dish = score(forecasts, ['dish_name'])
+    result.update({dish: float(value) for dish, value in zip(per_dish['dish_name'], per_dish[metric])})
+    return result
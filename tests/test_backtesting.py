@@ -0,0 +1,72 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.backtesting import Backtester, score
+from src.feature_engine import FeatureEngine
+from src.ml_forecaster import MLForecaster
+from tests.test_ml_forecaster import make_orders
+
+
+class TestBacktesting(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = make_orders(days=90)
+
+    def test_origins(self):
+        """Origins are step days apart and leave a full horizon of actuals."""
+        backtester = Backtester(self.orders, horizon=7, step=7, min_train_days=56)
+        origins = backtester.origins()
+
+        self.assertEqual(origins[-1], pd.Timestamp('2024-03-23'))
+        self.assertGreaterEqual(origins[0], pd.Timestamp('2024-02-25'))
+        self.assertTrue(all(np.diff(origins) == pd.Timedelta(days=7)))
+        self.assertEqual(len(Backtester(self.orders, n_origins=2).origins()), 2)
+
+    def test_fold_copy_matches_recomputation(self):
+        """A fold's sliced feature frame equals the frame computed on the fold alone."""
+        engine = FeatureEngine()
+        cutoff = pd.Timestamp('2024-02-20')
+        fold_engine, fold_orders = engine.fold_copy(self.orders, cutoff)
+
+        self.assertEqual(fold_orders['date'].max(), cutoff)
+        pd.testing.assert_frame_equal(fold_engine.training_frame(fold_orders),
+                                      FeatureEngine().training_frame(fold_orders))
+
+    def test_run_and_score(self):
+        """Fold forecasts carry actuals and the origin's training data only."""
+        backtester = Backtester(self.orders, horizon=7, n_origins=2, n_jobs=2, backend='process')
+        forecasts = backtester.run('xgboost')
+
+        self.assertEqual(len(forecasts), 2 * 7 * 3)
+        self.assertEqual(sorted(forecasts['horizon'].unique()), list(range(1, 8)))
+
+        origin = backtester.origins()[0]
+        forecaster = MLForecaster(algorithm='xgboost')
+        forecaster.fit(self.orders[self.orders['date'] <= origin].copy())
+        expected = forecaster.predict(days_ahead=7, start_date=origin)
+        fold = forecasts[forecasts['origin'] == origin]
+        np.testing.assert_array_equal(fold['predicted_quantity'], expected['predicted_quantity'])
+
+        metrics = score(forecasts, ['algorithm', 'horizon'])
+        self.assertEqual(len(metrics), 7)
+        error = (forecasts['predicted_quantity'] - forecasts['actual']).abs()
+        overall = score(forecasts, ['algorithm']).iloc[0]
+        self.assertAlmostEqual(overall['mae'], error.mean())
+        self.assertAlmostEqual(overall['wape'], error.sum() / forecasts['actual'].sum() * 100)
+
+    def test_evaluate_statistical(self):
+        """The statistical forecaster is backtested through the same interface."""
+        report = Backtester(self.orders, n_origins=3).evaluate(['statistical'])
+        self.assertEqual(set(report), {'forecasts', 'per_dish', 'per_horizon', 'overall'})
+        self.assertEqual(len(report['per_dish']), 3)
+        self.assertEqual(report['overall']['n'].iloc[0], 3 * 7 * 3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,136 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bom import BillOfMaterials
+from src.inventory_optimizer import InventoryOptimizer
+
+
+def make_recipes() -> pd.DataFrame:
+    return pd.DataFrame({
+        'dish_name': ['Pho', 'Pho', 'Pho', 'Banh Mi', 'Banh Mi'],
+        'material_name': ['Noodles', 'Beef', 'Beef', 'Bread', 'Herbs'],
+        'quantity_needed': [0.2, 0.1, 0.05, 1.0, np.nan]
+    })
+
+
+class TestBillOfMaterials(unittest.TestCase):
+
+    def test_matrix(self):
+        """Recipe lines become a sparse dish x material matrix; duplicate lines are summed."""
+        bom = BillOfMaterials.from_recipes(make_recipes())
+        self.assertEqual(bom.materials, ['Beef', 'Bread', 'Herbs', 'Noodles'])
+        dense = bom.matrix.toarray()
+        np.testing.assert_allclose(dense[bom.dishes.index('Pho')], [0.15, 0, 0, 0.2])
+        np.testing.assert_allclose(bom.explode(np.array([[2, 1]])).toarray(), [[0.3, 1.0, 0, 0.4]])
+
+    def test_requirements(self):
+        """Exploding a long forecast matches joining it with the recipes."""
+        forecast = pd.DataFrame({
+            'location': ['A', 'A', 'B', 'B', 'B'],
+            'date': pd.to_datetime(['2024-01-02', '2024-01-02', '2024-01-01', '2024-01-01', '2024-01-02']),
+            'dish_name': ['Pho', 'Banh Mi', 'Pho', 'Unknown', 'Pho'],
+            'predicted_quantity': [10, 4, 6, 3, 0]
+        })
+        bom = BillOfMaterials.from_recipes(make_recipes())
+        result = bom.requirements(forecast, ['predicted_quantity'], keys=['location', 'date'])
+
+        merged = forecast.merge(make_recipes(), on='dish_name')
+        merged['predicted_quantity'] = merged['predicted_quantity'] * merged['quantity_needed'].fillna(0)
+        expected = merged.groupby(['location', 'date', 'material_name'])['predicted_quantity'].sum().reset_index()
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_nested_recipes_and_yields(self):
+        """Prep items are flattened into raw materials, with yield losses at every level."""
+        recipes = pd.DataFrame({
+            'dish_name': ['Pho', 'Pho', 'Broth', 'Broth', 'Stock'],
+            'material_name': ['Broth', 'Noodles', 'Stock', 'Onions', 'Bones'],
+            'quantity_needed': [0.5, 0.2, 0.8, 0.1, 2.0],
+            'yield_factor': [1.0, 1.0, 1.0, 0.5, 0.8]
+        })
+        bom = BillOfMaterials.from_recipes(recipes)
+        self.assertEqual(bom.materials, ['Bones', 'Noodles', 'Onions'])
+        self.assertEqual(bom.levels.tolist(), [2, 1, 0])
+        # Pho: 0.5 broth -> 0.4 stock -> 0.4 * 2.0 / 0.8 bones, 0.5 * 0.1 / 0.5 onions
+        np.testing.assert_allclose(bom.matrix.toarray()[0], [1.0, 0.2, 0.1])
+
+        # Flattened lines: one per raw material of every item
+        lines = bom.lines()
+        pho = lines[lines['dish_name'] == 'Pho']
+        self.assertEqual(pho['material_name'].tolist(), ['Bones', 'Noodles', 'Onions'])
+        np.testing.assert_allclose(pho['quantity_needed'], [1.0, 0.2, 0.1])
+        self.assertEqual(len(lines), bom.matrix.nnz)
+
+        # Menu lines leave out the prep items
+        self.assertEqual(bom.prep_items().tolist(), [False, True, True])
+        pd.testing.assert_frame_equal(bom.menu_lines(), pho.reset_index(drop=True))
+
+    def test_incremental_update_and_cycles(self):
+        """Updating one recipe matches a full rebuild; a cycle is rejected."""
+        recipes = pd.DataFrame({
+            'dish_name': ['Pho', 'Pho', 'Broth', 'Banh Mi', 'Banh Mi', 'Pate'],
+            'material_name': ['Broth', 'Noodles', 'Bones', 'Bread', 'Pate', 'Liver'],
+            'quantity_needed': [0.5, 0.2, 1.0, 1.0, 0.05, 0.9]
+        })
+        bom = BillOfMaterials.from_recipes(recipes)
+        new_broth = pd.DataFrame({'material_name': ['Bones', 'Liver'], 'quantity_needed': [2.0, 0.1]})
+        bom.update_recipe('Broth', new_broth)
+
+        rebuilt = BillOfMaterials.from_recipes(pd.concat(
+            [recipes[recipes['dish_name'] != 'Broth'], new_broth.assign(dish_name='Broth')]))
+        order = rebuilt.dish_codes(pd.Series(bom.dishes))
+        np.testing.assert_allclose(bom.matrix.toarray(), rebuilt.matrix.toarray()[order])
+        np.testing.assert_allclose(bom.matrix.toarray()[bom.dishes.index('Pho')], [1.0, 0, 0.05, 0.2])
+
+        # Emptying a prep item's recipe makes it a raw material, as a rebuild would
+        bom = BillOfMaterials.from_recipes(recipes)
+        bom.update_recipe('Broth', pd.DataFrame({'material_name': [], 'quantity_needed': []}))
+        rebuilt = BillOfMaterials.from_recipes(recipes[recipes['dish_name'] != 'Broth'])
+        self.assertEqual(bom.materials, rebuilt.materials)
+        order = rebuilt.dish_codes(pd.Series(bom.dishes))
+        np.testing.assert_allclose(bom.matrix.toarray(), rebuilt.matrix.toarray()[order])
+        self.assertEqual(bom.matrix.toarray()[bom.dishes.index('Pho'), bom.materials.index('Broth')], 0.5)
+
+        # Dropping the only use of a raw material drops its column
+        bom.update_recipe('Pate', pd.DataFrame({'material_name': ['Bread'], 'quantity_needed': [0.1]}))
+        self.assertNotIn('Liver', bom.materials)
+
+        bom = BillOfMaterials.from_recipes(recipes)
+        bom.update_recipe('Broth', new_broth)
+        with self.assertRaisesRegex(ValueError, 'Broth -> Pho -> Broth|Pho -> Broth -> Pho'):
+            bom.update_recipe('Broth', pd.DataFrame({'material_name': ['Pho'], 'quantity_needed': [1.0]}))
+        np.testing.assert_allclose(bom.matrix.toarray()[bom.dishes.index('Pho')], [1.0, 0, 0.05, 0.2])
+
+    def test_optimizer_recompiles(self):
+        """The optimizer's BOM follows changes to its recipes."""
+        optimizer = InventoryOptimizer()
+        optimizer.load_data()
+        forecast = optimizer.forecast_demand(days_ahead=3)
+        before = optimizer.calculate_material_requirements(forecast)
+
+        optimizer.recipes_data = optimizer.recipes_data.assign(
+            quantity_needed=optimizer.recipes_data['quantity_needed'] * 2)
+        after = optimizer.calculate_material_requirements(forecast)
+        np.testing.assert_allclose(after['total_material_needed'], before['total_material_needed'] * 2)
+        np.testing.assert_allclose(after['total_material_needed_p90'], before['total_material_needed_p90'] * 2)
+
+        # A prep item replacing part of a dish recipe
+        dish = forecast['dish_name'].iloc[0]
+        optimizer.update_recipe(dish, pd.DataFrame({'material_name': ['House Sauce'], 'quantity_needed': [2.0]}))
+        optimizer.update_recipe('House Sauce', pd.DataFrame({'material_name': ['Olive Oil', 'Garlic'],
+                                                             'quantity_needed': [0.1, 0.05],
+                                                             'yield_factor': [1.0, 0.5]}))
+        requirements = optimizer.calculate_material_requirements(forecast[forecast['dish_name'] == dish])
+        totals = requirements.groupby('material_name')['total_material_needed'].sum()
+        quantity = forecast.loc[forecast['dish_name'] == dish, 'predicted_quantity'].sum()
+        np.testing.assert_allclose(totals[['Garlic', 'Olive Oil']], [0.2 * quantity, 0.2 * quantity])
+        self.assertEqual(optimizer._bom_fingerprint, BillOfMaterials.fingerprint(optimizer.recipes_data))
+
+
+if __name__ == '__main__':
+    unittest.main()
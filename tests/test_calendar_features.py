@@ -0,0 +1,66 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import calendar_features
+from src.calendar_features import calendar_lookup, get_calendar_table, CALENDAR_COLUMNS
+from src.ml_forecaster import MLForecaster
+
+
+class TestCalendarFeatures(unittest.TestCase):
+
+    def test_lookup_matches_direct_computation(self):
+        """Joined rows equal the calendar attributes computed from the dates."""
+        dates = pd.Series([pd.Timestamp('2025-01-29'), pd.Timestamp('2024-12-31'),
+                           pd.Timestamp('2025-01-29 18:30'), pd.Timestamp('2025-07-15')])
+        calendar = calendar_lookup(dates)
+
+        self.assertEqual(list(calendar.columns), list(CALENDAR_COLUMNS))
+        np.testing.assert_array_equal(calendar['day_of_week'], dates.dt.dayofweek)
+        np.testing.assert_array_equal(calendar['week_of_year'], dates.dt.isocalendar().week)
+        np.testing.assert_allclose(calendar['month_sin'], np.sin(2 * np.pi * dates.dt.month / 12), atol=1e-6)
+        np.testing.assert_array_equal(calendar['is_lunar_new_year'], [1, 0, 1, 0])
+        np.testing.assert_array_equal(calendar['is_school_holiday'], [1, 0, 1, 1])
+        self.assertEqual(calendar['month'].dtype, np.int8)
+
+    def test_table_is_built_once(self):
+        """Lookups inside the covered range reuse the same table."""
+        first = get_calendar_table('2024-01-01', '2024-03-01')
+        self.assertIs(get_calendar_table('2024-02-01', '2024-02-10'), first)
+        self.assertIs(calendar_features._table, first)
+
+        wider = get_calendar_table('2019-01-01', '2024-02-10')
+        self.assertLessEqual(wider.index[0], pd.Timestamp('2019-01-01'))
+        self.assertGreaterEqual(wider.index[-1], first.index[-1])
+
+    def test_holidays_of_every_year(self):
+        """Holiday and event flags follow each year's calendar, lunar dates included."""
+        dates = pd.Series(pd.to_datetime(['2020-01-25', '2022-09-02', '2023-03-08', '2026-02-17',
+                                          '2026-04-26', '2026-02-18', '2025-04-10']))
+        calendar = calendar_lookup(dates)
+        np.testing.assert_array_equal(calendar['is_public_holiday'], [1, 1, 0, 1, 1, 1, 0])
+        np.testing.assert_array_equal(calendar['is_lunar_new_year'], [1, 0, 0, 1, 0, 1, 0])
+        np.testing.assert_array_equal(calendar['is_major_event'], [0, 0, 1, 0, 0, 0, 0])
+        np.testing.assert_array_equal(calendar['is_school_holiday'], [1, 0, 0, 1, 0, 1, 0])
+
+        # Every year of a multi-year history gets its holidays
+        table = get_calendar_table('2020-01-01', '2026-12-31').loc['2020-01-01':'2026-12-31']
+        per_year = table.groupby('year')['is_public_holiday'].sum()
+        self.assertTrue((per_year >= 11).all())
+
+    def test_prepare_features_keeps_columns(self):
+        """The forecaster's feature frame still has every calendar feature."""
+        features = MLForecaster().prepare_features(pd.DataFrame({'date': ['2025-09-02', '2025-09-06']}))
+        for col in MLForecaster.CALENDAR_FEATURES + ['year', 'day', 'is_month_start', 'is_month_end']:
+            self.assertIn(col, features.columns)
+        np.testing.assert_array_equal(features['is_public_holiday'], [1, 0])
+        np.testing.assert_array_equal(features['is_weekend'], [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,105 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dish_scoring import DishScorer, DEFAULT_WEIGHTS
+from src.inventory_optimizer import InventoryOptimizer
+
+
+def make_recipes() -> pd.DataFrame:
+    return pd.DataFrame({
+        'dish_name': ['Soup', 'Soup', 'Salad', 'Curry', 'Curry', 'Stew'],
+        'material_name': ['Fish', 'Onions', 'Greens', 'Chicken', 'Onions', 'Beef'],
+        'quantity_needed': [0.5, 0.1, 0.2, 0.4, 0.2, 0.3]
+    })
+
+
+def make_materials() -> pd.DataFrame:
+    return pd.DataFrame({
+        'current_stock': [3.0, 10.0, 1.0, 20.0],
+        'cost_per_unit': [8.0, 1.0, 4.0, 5.0],
+        'minimum_stock_level': [2, 5, 1, 10]
+    }, index=pd.Index(['Fish', 'Onions', 'Greens', 'Chicken'], name='material_name'))
+
+
+class TestDishScorer(unittest.TestCase):
+
+    def test_scores(self):
+        """Every component is computed per dish from its recipe lines."""
+        days = pd.Series({'Fish': 1, 'Greens': 6})
+        result = DishScorer().score(make_recipes(), make_materials(), days,
+                                    preferred_dishes=['Curry'], preference_multiplier=1.4).set_index('dish_name')
+
+        # Stew needs beef, which is not stocked
+        self.assertEqual(list(result.index), ['Soup', 'Salad', 'Curry'])
+        soup = result.loc['Soup']
+        self.assertEqual(soup['max_servings_possible'], 6)                 # min(3 / 0.5, 10 / 0.1)
+        self.assertAlmostEqual(soup['cost_per_serving'], 4.1)
+        self.assertAlmostEqual(soup['expiry_material_ratio'], round(4.0 / 4.1 * 100, 2))
+        self.assertAlmostEqual(soup['expiry_urgency_score'], 2.0)          # (5 - 1) / 2
+        self.assertAlmostEqual(soup['material_availability_score'], round((1.0 + 10 / 6) / 2, 2))
+        self.assertEqual(soup['expiring_materials_used'], ['Fish'])
+        # Greens expire past the urgency horizon: no bonus but still flagged as expiring
+        self.assertEqual(result.loc['Salad', 'expiry_urgency_score'], 0)
+        self.assertAlmostEqual(result.loc['Curry', 'seasonal_preference_score'], 1.4)
+        self.assertFalse(result.loc['Curry', 'uses_expiring_materials'])
+
+    def test_weights(self):
+        """The recommendation score is the weighted sum of the components."""
+        weights = {'expiry_urgency': 1.0, 'cost_efficiency': 0.0}
+        result = DishScorer(weights).score(make_recipes(), make_materials(), pd.Series({'Fish': 1}))
+        components = {**DEFAULT_WEIGHTS, **weights}
+        expected = sum(result[f'{name}_score'] * weight for name, weight in components.items())
+        np.testing.assert_allclose(result['recommendation_score'], expected, atol=0.02)
+        with self.assertRaises(ValueError):
+            DishScorer({'popularity': 1.0})
+
+    def test_optimizer_recommendations(self):
+        """The optimizer ranks dishes by score, with configurable weights."""
+        optimizer = InventoryOptimizer(as_of='2024-06-30')
+        optimizer.load_data()
+        recommendations = optimizer.recommend_dishes(3)
+        self.assertLessEqual(len(recommendations), 3)
+        self.assertTrue(recommendations['recommendation_score'].is_monotonic_decreasing)
+        self.assertIn('season', recommendations.columns)
+
+        # Only cost efficiency counts: the cheapest dish comes first
+        cheapest = optimizer.recommend_dishes(10, weights={'material_availability': 0, 'expiry_urgency': 0,
+                                                           'seasonal_preference': 0, 'cost_efficiency': 1})
+        self.assertEqual(cheapest['dish_name'].iloc[0],
+                         cheapest.sort_values('cost_per_serving')['dish_name'].iloc[0])
+
+    def test_optimizer_scores_prep_items(self):
+        """Dishes made through prep items are scored on their raw materials; prep items are not recommended."""
+        optimizer = InventoryOptimizer(as_of='2024-06-30')
+        optimizer.load_data()
+        optimizer.recipes_data = pd.DataFrame({
+            'dish_name': ['Pasta Marinara', 'Pasta Marinara', 'Marinara', 'Marinara'],
+            'material_name': ['Pasta', 'Marinara', 'Tomato Sauce', 'Garlic'],
+            'quantity_needed': [0.2, 0.5, 0.4, 0.02],
+            'yield_factor': [1.0, 1.0, 0.8, 1.0]
+        })
+        stock = optimizer.inventory_data.set_index('material_name')
+        result = optimizer.recommend_dishes(10).set_index('dish_name')
+
+        # The prep item is an ingredient, not a menu item
+        self.assertEqual(list(result.index), ['Pasta Marinara'])
+
+        # 0.5 marinara per serving needs 0.25 tomato sauce and 0.01 garlic
+        pasta = result.loc['Pasta Marinara']
+        expected_servings = int(min(stock.loc['Pasta', 'current_stock'] / 0.2,
+                                    stock.loc['Tomato Sauce', 'current_stock'] / 0.25,
+                                    stock.loc['Garlic', 'current_stock'] / 0.01))
+        self.assertEqual(pasta['max_servings_possible'], expected_servings)
+        expected_cost = (0.2 * stock.loc['Pasta', 'cost_per_unit'] + 0.25 * stock.loc['Tomato Sauce', 'cost_per_unit']
+                         + 0.01 * stock.loc['Garlic', 'cost_per_unit'])
+        self.assertAlmostEqual(pasta['cost_per_serving'], round(expected_cost, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.expiry_index import ExpiryIndex, MaterialDishIndex
+from src.inventory_optimizer import InventoryOptimizer
+
+
+class TestExpiryIndex(unittest.TestCase):
+
+    def test_threshold_queries(self):
+        """Rows expiring by a date come back in inventory order; undated rows never expire."""
+        inventory = pd.DataFrame({
+            'material_name': ['Salt', 'Milk', 'Eggs', 'Fish'],
+            'expiry_date': pd.to_datetime(['2024-07-05', '2024-07-02', None, '2024-07-01'])
+        })
+        index = ExpiryIndex(inventory)
+        self.assertEqual(index.expiring('2024-07-01').tolist(), [3])
+        self.assertEqual(index.expiring('2024-07-05').tolist(), [0, 1, 3])
+        self.assertEqual(index.expiring('2024-06-01').tolist(), [])
+        self.assertEqual(index.rows(['Fish', 'Bread', 'Salt']).tolist(), [3, -1, 0])
+
+    def test_material_dish_lookup(self):
+        """Lookups match a left join on the recipes, in input then recipe order."""
+        recipes = pd.DataFrame({
+            'dish_name': ['Soup', 'Curry', 'Soup', 'Salad'],
+            'material_name': ['Onions', 'Onions', 'Fish', 'Greens'],
+            'quantity_needed': [0.1, 0.2, 0.3, 0.4]
+        })
+        left, lines = MaterialDishIndex(recipes).lookup(['Fish', 'Salt', 'Onions'])
+        self.assertEqual(left.tolist(), [0, 1, 2, 2])
+        self.assertEqual(lines.tolist(), [2, -1, 0, 1])
+
+    def test_optimizer_matches_merge(self):
+        """The indexed near-expiry lookup returns what filtering and merging did."""
+        optimizer = InventoryOptimizer(as_of='2024-06-30')
+        optimizer.load_data()
+        optimizer.inventory_data['expiry_date'] = pd.Timestamp('2024-06-30') + pd.to_timedelta(
+            np.arange(len(optimizer.inventory_data)) % 6, unit='D')
+        optimizer.recipes_data = pd.concat([optimizer.recipes_data, pd.DataFrame({
+            'dish_name': ['Garlic Bread'], 'material_name': ['Garlic'], 'quantity_needed': [0.05]})],
+            ignore_index=True)
+
+        for days in [0, 2, 5]:
+            threshold = optimizer.now() + pd.Timedelta(days=days)
+            expected = optimizer.inventory_data[optimizer.inventory_data['expiry_date'] <= threshold].merge(
+                optimizer.recipes_data, on='material_name', how='left')
+            expected['max_dishes_possible'] = (
+                expected['current_stock'] / expected['quantity_needed']).fillna(0).astype(int)
+            expected['days_until_expiry'] = (expected['expiry_date'] - optimizer.now()).dt.days
+            pd.testing.assert_frame_equal(optimizer.find_near_expiry_materials(days),
+                                          expected.sort_values('days_until_expiry'))
+
+        # The index is reused until the expiry column is replaced or edited in place
+        index = optimizer.expiry_index
+        self.assertIs(optimizer.expiry_index, index)
+        optimizer.inventory_data['expiry_date'] = pd.Timestamp('2024-08-01')
+        self.assertTrue(optimizer.find_near_expiry_materials(5).empty)
+        optimizer.inventory_data.loc[0, 'expiry_date'] = pd.Timestamp('2024-07-01')
+        self.assertEqual(set(optimizer.find_near_expiry_materials(5)['material_name']),
+                         {optimizer.inventory_data.loc[0, 'material_name']})
+
+    def test_optimizer_finds_dishes_through_prep_items(self):
+        """Dishes using an expiring material through a prep item are suggested, with flattened quantities."""
+        optimizer = InventoryOptimizer(as_of='2024-06-30')
+        optimizer.load_data()
+        optimizer.recipes_data = pd.DataFrame({
+            'dish_name': ['Pasta Marinara', 'Pasta Marinara', 'Marinara', 'Marinara'],
+            'material_name': ['Pasta', 'Marinara', 'Tomato Sauce', 'Garlic'],
+            'quantity_needed': [0.2, 0.5, 0.4, 0.02]
+        })
+        optimizer.inventory_data['expiry_date'] = pd.Timestamp('2024-08-01')
+        sauce = optimizer.inventory_data['material_name'] == 'Tomato Sauce'
+        optimizer.inventory_data.loc[sauce, 'expiry_date'] = pd.Timestamp('2024-07-01')
+
+        # The prep item itself is not suggested as a dish
+        near_expiry = optimizer.find_near_expiry_materials(3).set_index('dish_name')
+        self.assertEqual(list(near_expiry.index), ['Pasta Marinara'])
+        self.assertAlmostEqual(near_expiry.loc['Pasta Marinara', 'quantity_needed'], 0.2)
+
+        # In-place recipe edits are picked up through the BOM fingerprint
+        optimizer.recipes_data.loc[1, 'quantity_needed'] = 1.0
+        near_expiry = optimizer.find_near_expiry_materials(3).set_index('dish_name')
+        self.assertAlmostEqual(near_expiry.loc['Pasta Marinara', 'quantity_needed'], 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
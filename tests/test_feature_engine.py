@@ -0,0 +1,80 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.feature_engine import FeatureEngine
+from src.ml_forecaster import MLForecaster
+from tests.test_ml_forecaster import make_orders
+
+
+class TestFeatureEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = make_orders(days=90)
+        self.engine = FeatureEngine()
+
+    def test_matches_groupby_shift(self):
+        """Panel features equal a groupby-shift over the long orders frame."""
+        frame = self.engine.training_frame(self.orders)
+
+        expected = self.orders.sort_values(['dish_name', 'date']).copy()
+        grouped = expected.groupby('dish_name')['quantity_sold']
+        expected['lag_7'] = grouped.shift(7)
+        expected['rolling_mean_7'] = grouped.transform(lambda x: x.shift(1).rolling(7, min_periods=1).mean())
+        expected['ewm_7'] = grouped.transform(lambda x: x.shift(1).ewm(span=7, adjust=False).mean())
+        expected = expected.dropna(subset=['lag_7'])
+
+        merged = frame.merge(expected, on=['dish_name', 'date'], suffixes=('', '_expected'))
+        self.assertEqual(len(merged), len(frame))
+        for name in ['lag_7', 'rolling_mean_7', 'ewm_7']:
+            np.testing.assert_allclose(merged[name], merged[f'{name}_expected'])
+
+    def test_training_frame_is_cached(self):
+        """The same orders return the cached matrix."""
+        first = self.engine.training_frame(self.orders)
+        second = self.engine.training_frame(self.orders.copy())
+        self.assertIs(first, second)
+
+        changed = self.orders.copy()
+        changed.loc[0, 'quantity_sold'] += 1
+        self.assertIsNot(self.engine.training_frame(changed), first)
+
+    def test_recursive_forecast_blocks(self):
+        """Predictions feed back as lags, one predict call per step-sized block."""
+        engine = FeatureEngine(lags=(7, 14), rolling_windows=(7,), ewm_spans=())
+        panel = engine.build_panel(self.orders)
+        last_date = panel.index[-1]
+        target_dates = [last_date + pd.Timedelta(days=i) for i in range(1, 15)]
+
+        calls = []
+
+        def predict_block(dates, features):
+            calls.append(len(dates))
+            return np.full((panel.shape[1], len(dates)), 5.0)
+
+        result = engine.recursive_forecast(panel, target_dates, predict_block)
+        self.assertEqual(calls, [7, 7])
+        self.assertEqual(result.shape, (panel.shape[1], 14))
+
+    def test_forecaster_with_lag_features(self):
+        """Per-dish tree models train on lag features and forecast recursively."""
+        forecaster = MLForecaster(algorithm='random_forest', feature_engine=FeatureEngine())
+        forecaster.fit(self.orders.copy())
+
+        model_dict = forecaster.models['Beef Steak']
+        self.assertIn('lag_28', model_dict['features'])
+
+        last_date = forecaster.history['date'].max()
+        future_dates = [(last_date + pd.Timedelta(days=i)).date() for i in range(1, 6)]
+        forecast = forecaster._predict_recursive(future_dates)
+        self.assertEqual(len(forecast), 5 * self.orders['dish_name'].nunique())
+        self.assertTrue((forecast['predicted_quantity'] >= 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
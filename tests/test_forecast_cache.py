@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+import shutil
+import time
+import pandas as pd
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.forecast_cache import ForecastCache
+from src.inventory_optimizer import InventoryOptimizer
+
+
+class TestForecastCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_lru_and_disk(self):
+        """Least recently used entries are evicted; persisted entries survive a new cache."""
+        cache = ForecastCache(max_entries=2, cache_dir=self.cache_dir)
+        frames = {k: pd.DataFrame({'value': [i]}) for i, k in enumerate(['a', 'b', 'c'])}
+        cache.put('a', frames['a'])
+        cache.put('b', frames['b'])
+        cache.get('a')
+        cache.put('c', frames['c'])
+
+        self.assertEqual(list(cache._entries), ['a', 'c'])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+        reopened = ForecastCache(max_entries=2, cache_dir=self.cache_dir)
+        pd.testing.assert_frame_equal(reopened.get('c'), frames['c'])
+        self.assertIsNone(reopened.get('missing'))
+        self.assertEqual((reopened.hits, reopened.misses), (1, 1))
+
+        # Callers get copies, so mutating a result leaves the cache intact
+        result = reopened.get('c')
+        result['value'] = 99
+        self.assertEqual(reopened.get('c')['value'].iloc[0], 2)
+
+    def test_optimizer_cache(self):
+        """Repeat forecasts come from the cache until the orders or the request change."""
+        optimizer = InventoryOptimizer(forecast_cache_dir=self.cache_dir)
+        optimizer.load_data()
+        start = optimizer.orders_data['date'].max()
+
+        first = optimizer.forecast_demand(days_ahead=7, start_date=start)
+        began = time.perf_counter()
+        repeat = optimizer.forecast_demand(days_ahead=7, start_date=start)
+        self.assertLess(time.perf_counter() - began, 0.5)
+        pd.testing.assert_frame_equal(first, repeat)
+        self.assertEqual(optimizer.forecast_cache.hits, 1)
+
+        optimizer.forecast_demand(days_ahead=14, start_date=start)
+        self.assertEqual(optimizer.forecast_cache.misses, 2)
+
+        new_orders = pd.DataFrame({'date': [start + pd.Timedelta(days=1)], 'dish_name': ['Fish Soup'],
+                                   'quantity_sold': [500], 'revenue': [5000.0]})
+        optimizer.append_orders(new_orders)
+        updated = optimizer.forecast_demand(days_ahead=7, start_date=start)
+        self.assertEqual(optimizer.forecast_cache.misses, 3)
+        self.assertFalse(first.equals(updated))
+
+    def test_ml_key_tracks_tuned_params(self):
+        """Saving new tuned hyperparameters changes the key of ML forecasts."""
+        registry_dir = os.path.join(self.cache_dir, 'registry')
+        optimizer = InventoryOptimizer(use_ml=True, ml_algorithm='xgboost', model_registry_dir=registry_dir,
+                                       forecast_cache_dir=self.cache_dir)
+        optimizer.load_data()
+        start = optimizer.orders_data['date'].max()
+        before = optimizer._forecast_key(7, start, False, False)
+        self.assertEqual(optimizer._forecast_key(7, start, False, False), before)
+
+        optimizer.model_registry.save_tuned_params('xgboost', {'__all__': {'max_depth': 3}})
+        tuned = optimizer._forecast_key(7, start, False, False)
+        self.assertNotEqual(tuned, before)
+        optimizer.ml_algorithm = 'random_forest'
+        self.assertNotEqual(optimizer._forecast_key(7, start, False, False), tuned)
+
+
+if __name__ == '__main__':
+    unittest.main()
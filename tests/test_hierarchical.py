@@ -0,0 +1,89 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.hierarchical import Hierarchy, HierarchicalForecaster, reconcile
+from tests.test_ml_forecaster import make_orders
+
+GROUPS = {
+    'Chicken Curry': ('Indian', 'Main'),
+    'Beef Steak': ('Western', 'Main'),
+    'Fish Soup': ('Western', 'Soup'),
+}
+
+
+def make_hierarchy_orders(days: int = 90) -> pd.DataFrame:
+    orders = make_orders(days=days)
+    orders['cuisine'] = orders['dish_name'].map(lambda d: GROUPS[d][0])
+    orders['category'] = orders['dish_name'].map(lambda d: GROUPS[d][1])
+    return orders
+
+
+class TestHierarchy(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = make_hierarchy_orders()
+        self.hierarchy = Hierarchy.from_orders(self.orders, ['cuisine', 'category'])
+
+    def test_summing_matrix(self):
+        """Total, cuisines and categories are sums of their dishes."""
+        self.assertEqual(self.hierarchy.keys()[:5],
+                         ['total:Total', 'cuisine:Indian', 'cuisine:Western', 'category:Main', 'category:Soup'])
+        S = self.hierarchy.summing_matrix.toarray()
+        np.testing.assert_array_equal(S, [[1, 1, 1], [1, 0, 0], [0, 1, 1], [1, 1, 0], [0, 0, 1],
+                                          [1, 0, 0], [0, 1, 0], [0, 0, 1]])
+
+        with self.assertRaises(ValueError):
+            Hierarchy.from_orders(make_orders(days=10), ['cuisine'])
+
+    def test_reconcile(self):
+        """MinT leaves coherent forecasts alone and makes incoherent ones add up."""
+        dishes = np.array([[10.0, 12.0], [20.0, 18.0], [5.0, 6.0]])
+        coherent = self.hierarchy.aggregation @ dishes
+        weights = np.arange(1, 9, dtype=float)
+
+        np.testing.assert_allclose(reconcile(coherent, dishes, self.hierarchy, 'mint', weights=weights), dishes)
+
+        aggregates = coherent.copy()
+        aggregates[0] += 14
+        reconciled = reconcile(aggregates, dishes, self.hierarchy, 'mint', weights=weights)
+        self.assertTrue(np.all(reconciled.sum(axis=0) > dishes.sum(axis=0)))
+        self.assertTrue(np.all(reconciled.sum(axis=0) < aggregates[0]))
+
+        np.testing.assert_array_equal(reconcile(aggregates, dishes, self.hierarchy, 'bottom_up'), dishes)
+        top_down = reconcile(aggregates, dishes, self.hierarchy, 'top_down',
+                             proportions=np.array([0.2, 0.5, 0.3]))
+        np.testing.assert_allclose(top_down.sum(axis=0), aggregates[0])
+
+
+class TestHierarchicalForecaster(unittest.TestCase):
+
+    def test_coherent_forecasts(self):
+        """Every level of the reconciled forecast adds up, for every method."""
+        orders = make_hierarchy_orders()
+        last_date = orders['date'].max()
+        params = {'n_estimators': 20}
+
+        for method in ['bottom_up', 'top_down', 'mint']:
+            forecaster = HierarchicalForecaster(algorithm='xgboost', method=method, model_params=params)
+            forecaster.fit(orders.copy())
+            forecast = forecaster.predict(days_ahead=5, start_date=last_date)
+
+            self.assertEqual(len(forecast), 5 * 8)
+            totals = forecast.groupby('level')['predicted_quantity'].sum()
+            for level in ['cuisine', 'category', 'dish']:
+                self.assertAlmostEqual(totals[level], totals['total'], places=6)
+            self.assertTrue((forecast['p10'] <= forecast['p90']).all())
+
+        dishes = forecaster.predict_dishes(days_ahead=5, start_date=last_date)
+        self.assertEqual(list(dishes.columns[:4]), ['date', 'dish_name', 'predicted_quantity', 'algorithm'])
+        self.assertEqual(set(dishes['dish_name']), set(GROUPS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.intermittent import classify_demand, fit_intermittent
+from src.ml_forecaster import MLForecaster
+from tests.test_ml_forecaster import make_orders
+
+
+def sparse_orders(days: int = 120, every: int = 4, size: int = 12) -> pd.DataFrame:
+    """A dish selling a fixed quantity every ``every`` days."""
+    dates = pd.date_range('2024-01-01', periods=days, freq='D')[::every]
+    return pd.DataFrame({'date': dates, 'dish_name': 'Truffle Pasta', 'quantity_sold': size})
+
+
+class TestIntermittentModels(unittest.TestCase):
+
+    def test_classify_demand(self):
+        """Dishes selling every day are smooth; dishes with long gaps are intermittent."""
+        panel = pd.DataFrame({'daily': [10, 12, 9, 11, 10, 10, 12, 11],
+                              'sparse': [0, 0, 8, 0, 0, 0, 9, 0],
+                              'lumpy': [0, 1, 0, 0, 40, 0, 0, 2]}, dtype=float)
+        classes = classify_demand(panel)['demand_class']
+        self.assertEqual(classes.to_dict(), {'daily': 'smooth', 'sparse': 'intermittent', 'lumpy': 'lumpy'})
+
+    def test_croston_variants(self):
+        """Croston = size / interval, SBA corrects its bias, TSB decays after demand stops."""
+        panel = pd.DataFrame({'a': [0, 10, 0, 10, 0, 10, 0, 10]}, dtype=float)
+
+        croston = fit_intermittent(panel, method='croston', alpha=0.1)['a']
+        self.assertAlmostEqual(croston['value'], 5.0)
+        sba = fit_intermittent(panel, method='sba', alpha=0.1)['a']
+        self.assertAlmostEqual(sba['value'], 5.0 * 0.95)
+
+        quiet = pd.concat([panel, pd.DataFrame({'a': np.zeros(10)})], ignore_index=True)
+        tsb = fit_intermittent(panel, method='tsb', beta=0.2)['a']
+        tsb_quiet = fit_intermittent(quiet, method='tsb', beta=0.2)['a']
+        self.assertLess(tsb_quiet['value'], tsb['value'])
+        self.assertAlmostEqual(fit_intermittent(quiet, method='croston')['a']['value'], 5.0)
+
+        # Half the days sell: P10 is a zero day, P90 a full-size day
+        self.assertEqual(croston['quantiles'][0], 0)
+        self.assertAlmostEqual(croston['quantiles'][2], 10.0)
+
+    def test_forecaster_routing(self):
+        """Sparse dishes are routed to Croston, the rest keep the configured algorithm."""
+        orders = pd.concat([make_orders(days=120, dishes=('Chicken Curry',)), sparse_orders()],
+                           ignore_index=True)
+        forecaster = MLForecaster(algorithm='xgboost', model_params={'n_estimators': 20},
+                                  route_intermittent=True)
+        forecaster.fit(orders.copy())
+
+        self.assertEqual(forecaster.models['Truffle Pasta']['type'], 'croston')
+        self.assertIn('model', forecaster.models['Chicken Curry'])
+        info = forecaster.get_model_info()
+        self.assertEqual(info['routed_to_croston'], ['Truffle Pasta'])
+
+        forecast = forecaster.predict(days_ahead=7, start_date=orders['date'].max())
+        pasta = forecast[forecast['dish_name'] == 'Truffle Pasta']
+        self.assertTrue((pasta['predicted_quantity'] == 2).all())
+        self.assertTrue((pasta['p90'] >= pasta['p10']).all())
+
+        # New orders refit the Croston dish in place
+        new_orders = sparse_orders(days=8, every=1, size=12).assign(
+            date=lambda df: df['date'] + pd.Timedelta(days=120))
+        forecaster.update(new_orders)
+        self.assertGreater(forecaster.models['Truffle Pasta']['value'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
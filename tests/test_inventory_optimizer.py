@@ -7,6 +7,7 @@ import os
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from inventory_optimizer import InventoryOptimizer
 
@@ -84,6 +85,40 @@ class TestInventoryOptimizer(unittest.TestCase):
             self.assertTrue(all(restocking['restock_quantity'] > 0))
             self.assertTrue(all(restocking['restock_cost'] >= 0))
     
+    def test_quantile_forecast_flow(self):
+        """Bootstrap quantiles flow into material requirements and safety stock."""
+        forecast = self.optimizer.forecast_demand(days_ahead=7)
+        self.assertTrue((forecast['p10'] <= forecast['p50']).all())
+        self.assertTrue((forecast['p50'] <= forecast['p90']).all())
+        self.assertGreater((forecast['p90'] - forecast['p10']).sum(), 0)
+
+        requirements = self.optimizer.calculate_material_requirements(forecast)
+        recipes = self.optimizer.recipes_data
+        merged = forecast.merge(recipes, on='dish_name')
+        expected = (merged['p90'] * merged['quantity_needed']).groupby(merged['material_name']).sum()
+        actual = requirements.groupby('material_name')['total_material_needed_p90'].sum()
+        pd.testing.assert_series_equal(actual.sort_index(), expected.sort_index(), check_names=False)
+
+        self.optimizer.inventory_data['current_stock'] = 0
+        # No service level: the point requirement only, as before safety stock existed
+        restocking = self.optimizer.calculate_restocking_needs(requirements).set_index('material_name')
+        self.assertTrue((restocking['safety_stock'] == 0).all())
+
+        # P90 cover: daily P10-P90 spreads combine as independent days
+        restocking = self.optimizer.calculate_restocking_needs(requirements, service_level='p90')
+        restocking = restocking.set_index('material_name')
+        z = 1.2815515655446004
+        sigma = (requirements['total_material_needed_p90'] - requirements['total_material_needed_p10']) / (2 * z)
+        safety = z * np.sqrt((sigma ** 2).groupby(requirements['material_name']).sum())
+        totals = requirements.groupby('material_name')['total_material_needed'].sum()
+        np.testing.assert_allclose(restocking['safety_stock'], safety.reindex(restocking.index))
+        np.testing.assert_allclose(restocking['shortage'], (totals + safety).reindex(restocking.index))
+        summed_gaps = (requirements['total_material_needed_p90'] - requirements['total_material_needed']).groupby(
+            requirements['material_name']).sum()
+        self.assertLess(restocking['safety_stock'].sum(), summed_gaps.reindex(restocking.index).sum())
+        with self.assertRaises(ValueError):
+            self.optimizer.calculate_restocking_needs(requirements, service_level='high')
+
     def test_near_expiry_materials(self):
         """Test near expiry materials identification."""
         near_expiry = self.optimizer.find_near_expiry_materials(days_threshold=30)  # Use longer threshold for testing
@@ -114,6 +149,32 @@ class TestInventoryOptimizer(unittest.TestCase):
         self.assertGreaterEqual(summary['materials_to_restock'], 0)
         self.assertGreaterEqual(summary['materials_near_expiry'], 0)
     
+    def test_as_of_clock(self):
+        """The as-of clock sets the forecast origin, the history used and the expiry reference."""
+        as_of = pd.Timestamp('2024-06-30')
+        optimizer = InventoryOptimizer(as_of=as_of)
+        optimizer.load_data()
+        optimizer.inventory_data['expiry_date'] = as_of + pd.to_timedelta(
+            np.arange(len(optimizer.inventory_data)), unit='D')
+
+        forecast = optimizer.forecast_demand(days_ahead=3)
+        self.assertEqual(pd.to_datetime(forecast['date']).min(), as_of + timedelta(days=1))
+        # Later orders are ignored: same forecast as a history truncated at the clock
+        truncated = InventoryOptimizer(as_of=as_of)
+        truncated.load_data()
+        truncated.orders_data = optimizer.orders_data[optimizer.orders_data['date'] <= as_of]
+        pd.testing.assert_frame_equal(forecast, truncated.forecast_demand(days_ahead=3))
+
+        near_expiry = optimizer.find_near_expiry_materials(days_threshold=2)
+        self.assertEqual(sorted(near_expiry['days_until_expiry'].unique()), [0, 1, 2])
+        self.assertEqual(optimizer.generate_optimization_report()['summary']['as_of'], '2024-06-30 00:00:00')
+
+        # Many origins in one run match the single-origin forecasts
+        origins = [as_of - timedelta(days=7), as_of]
+        batch = optimizer.forecast_origins(origins, days_ahead=3)
+        single = batch[batch['origin'] == as_of].drop(columns='origin').reset_index(drop=True)
+        pd.testing.assert_frame_equal(single, forecast)
+
     def test_seasonal_factors(self):
         """Test seasonal factors functionality."""
         self.assertIsNotNone(self.optimizer.seasonal_factors)
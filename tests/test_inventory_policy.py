@@ -0,0 +1,112 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.inventory_policy import InventoryPolicyOptimizer
+from src.inventory_optimizer import InventoryOptimizer
+
+
+def make_requirements(spread: dict, days: int = 28) -> pd.DataFrame:
+    """Flat daily requirement of 10 per material, with a p10/p90 spread per material."""
+    dates = pd.date_range('2024-07-01', periods=days, freq='D')
+    materials = list(spread)
+    frame = pd.DataFrame({
+        'date': np.repeat(dates, len(materials)),
+        'material_name': materials * days,
+        'total_material_needed': 10.0
+    })
+    half = frame['material_name'].map(spread)
+    frame['total_material_needed_p10'] = 10.0 - half
+    frame['total_material_needed_p90'] = 10.0 + half
+    return frame
+
+
+def make_inventory(materials: list, **columns) -> pd.DataFrame:
+    inventory = pd.DataFrame({'material_name': materials, 'current_stock': 30.0,
+                              'cost_per_unit': 2.0, 'supplier_lead_time': 2})
+    return inventory.assign(**columns)
+
+
+class TestInventoryPolicyOptimizer(unittest.TestCase):
+
+    def test_uncertainty_raises_reorder_point(self):
+        """More volatile demand needs a higher reorder point for the same service."""
+        requirements = make_requirements({'Steady': 0.5, 'Volatile': 6.0})
+        inventory = make_inventory(['Steady', 'Volatile'])
+        policies = InventoryPolicyOptimizer(n_scenarios=300, target_fill_rate=0.95).optimize(
+            requirements, inventory).set_index('material_name')
+
+        self.assertGreater(policies.loc['Volatile', 'reorder_point'], policies.loc['Steady', 'reorder_point'])
+        self.assertTrue((policies['fill_rate'] >= 0.95).all())
+        self.assertTrue((policies['order_up_to'] >= policies['reorder_point']).all())
+        self.assertTrue(set(policies['policy']) <= {'base_stock', 's_S'})
+        np.testing.assert_allclose(policies['expected_cost'],
+                                   policies[['holding_cost', 'stockout_cost', 'waste_cost', 'ordering_cost']].sum(axis=1))
+
+    def test_perishables_order_less_ahead(self):
+        """A short shelf life trades order size for less waste."""
+        requirements = make_requirements({'Fresh': 3.0, 'Dry': 3.0})
+        inventory = make_inventory(['Fresh', 'Dry'], shelf_life_days=[2, 365], cost_per_unit=20.0)
+        policies = InventoryPolicyOptimizer(n_scenarios=300, order_cost=50.0).optimize(
+            requirements, inventory).set_index('material_name')
+
+        self.assertLess(policies.loc['Fresh', 'order_up_to'], policies.loc['Dry', 'order_up_to'])
+        self.assertEqual(policies.loc['Dry', 'expected_waste'], 0)
+
+    def test_expiring_stock_is_wasted(self):
+        """Current stock past its expiry date is written off without any demand."""
+        requirements = make_requirements({'Milk': 0.0}).assign(total_material_needed=0.0)
+        requirements[['total_material_needed_p10', 'total_material_needed_p90']] = 0.0
+        inventory = make_inventory(['Milk'], expiry_date=pd.Timestamp('2024-07-03'))
+        # Count costs from the first day, so the opening stock is in the window
+        optimizer = InventoryPolicyOptimizer(n_scenarios=50, warmup_days=0)
+        policies = optimizer.optimize(requirements, inventory)
+        self.assertAlmostEqual(policies['expected_waste'].iloc[0], 30.0, places=4)
+        self.assertEqual(policies['fill_rate'].iloc[0], 1.0)
+
+        # Only the lot past its expiry is lost
+        lots = pd.DataFrame({'material_name': ['Milk', 'Milk'], 'quantity': [10.0, 20.0],
+                             'expiry_date': pd.to_datetime(['2024-07-03', '2024-08-31'])})
+        policies = optimizer.optimize(requirements, inventory, lots=lots)
+        self.assertAlmostEqual(policies['expected_waste'].iloc[0], 10.0, places=4)
+
+    def test_policy_independent_of_horizon(self):
+        """Forecasts of any length with the same daily demand give the same policy."""
+        inventory = make_inventory(['Flour', 'Milk'], current_stock=200.0, supplier_lead_time=[2, 4],
+                                   shelf_life_days=[365, 5])
+        optimizer = InventoryPolicyOptimizer(n_scenarios=200, target_fill_rate=0.95)
+        policies = [optimizer.optimize(make_requirements({'Flour': 3.0, 'Milk': 3.0}, days=days), inventory)
+                    for days in [7, 14, 28]]
+        for other in policies[1:]:
+            pd.testing.assert_frame_equal(policies[0], other)
+        # Costs are counted in steady state, after the opening stock ran down
+        self.assertTrue((policies[0]['order_up_to'] > 0).all())
+        self.assertTrue((policies[0]['expected_orders'] > 0).all())
+
+        # The opening stock only matters during the warm-up
+        low_stock = optimizer.optimize(make_requirements({'Flour': 3.0, 'Milk': 3.0}),
+                                       inventory.assign(current_stock=0.0))
+        pd.testing.assert_frame_equal(low_stock[['reorder_point', 'order_up_to']],
+                                      policies[0][['reorder_point', 'order_up_to']])
+
+    def test_optimizer_restocks_with_policies(self):
+        """Materials with a policy are restocked up to S once at or below s."""
+        optimizer = InventoryOptimizer(as_of='2024-06-30')
+        optimizer.load_data()
+        requirements = optimizer.calculate_material_requirements(optimizer.forecast_demand(days_ahead=14))
+        policies = optimizer.optimize_inventory_policy(requirements, n_scenarios=200)
+        self.assertEqual(set(policies['material_name']), set(requirements['material_name']))
+
+        material = policies['material_name'].iloc[0]
+        optimizer.inventory_data.loc[optimizer.inventory_data['material_name'] == material, 'current_stock'] = 0
+        restock = optimizer.calculate_restocking_needs(requirements, policies=policies).set_index('material_name')
+        self.assertAlmostEqual(restock.loc[material, 'restock_quantity'], policies['order_up_to'].iloc[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
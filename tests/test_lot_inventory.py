@@ -0,0 +1,82 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.lot_inventory import LotInventory
+from src.inventory_optimizer import InventoryOptimizer
+
+
+def make_lots() -> pd.DataFrame:
+    return pd.DataFrame({
+        'material_name': ['Milk', 'Milk', 'Milk', 'Flour', 'Milk'],
+        'quantity': [5.0, 3.0, 4.0, 10.0, 2.0],
+        'expiry_date': pd.to_datetime(['2024-07-05', '2024-07-02', '2024-07-10', None, '2024-07-03']),
+        'location': ['A', 'A', 'A', 'A', 'B']
+    })
+
+
+class TestLotInventory(unittest.TestCase):
+
+    def test_stock_and_expiry_queries(self):
+        """Lots add up per material; expiry queries return lots in expiry order."""
+        lots = LotInventory.from_frame(make_lots())
+        stock = lots.stock().set_index('material_name')
+        self.assertEqual(stock.loc['Milk', 'current_stock'], 14.0)
+        self.assertEqual(stock.loc['Milk', 'expiry_date'], pd.Timestamp('2024-07-02'))
+        self.assertTrue(pd.isna(stock.loc['Flour', 'expiry_date']))
+
+        by_location = lots.stock(as_of='2024-07-02', by_location=True).set_index(['material_name', 'location'])
+        self.assertEqual(by_location.loc[('Milk', 'A'), 'current_stock'], 9.0)
+        self.assertEqual(by_location.loc[('Milk', 'A'), 'lot_count'], 2)
+
+        expiring = lots.expiring('2024-07-05')
+        self.assertEqual(list(expiring['lot_id']), [1, 4, 0])
+        self.assertEqual(list(lots.expiring('2024-07-05', after='2024-07-02', location='A')['lot_id']), [0])
+
+    def test_fefo_consumption(self):
+        """Requests take the earliest unexpired lots of their material and location first."""
+        lots = LotInventory.from_frame(make_lots())
+        demand = pd.DataFrame({'material_name': ['Milk', 'Milk', 'Milk', 'Flour'],
+                               'location': ['A', 'A', 'B', 'A'], 'quantity': [4.0, 3.0, 5.0, 1.0]})
+        taken = lots.consume(demand, as_of='2024-07-02')
+
+        milk_a = taken[(taken['material_name'] == 'Milk') & (taken['location'] == 'A')]
+        self.assertEqual(list(milk_a['lot_id']), [0, 2])        # the lot expiring on 07-02 is skipped
+        np.testing.assert_allclose(milk_a['quantity'], [5.0, 2.0])
+        self.assertEqual(taken.loc[taken['location'] == 'B', 'quantity'].sum(), 2.0)   # short of stock
+        self.assertEqual(lots.stock().set_index('material_name').loc['Flour', 'current_stock'], 9.0)
+
+        written_off = lots.write_off_expired('2024-07-05')
+        self.assertEqual(list(written_off['lot_id']), [1])
+        lots.compact()
+        self.assertEqual(len(lots), 2)
+        self.assertEqual(lots.receive('Milk', 6.0, '2024-07-20', location='B'), 5)
+        self.assertEqual(lots.expiring('2024-07-31')['quantity'].sum(), 8.0)
+
+    def test_optimizer_with_lots(self):
+        """Near-expiry detection and restocking use the lots, not one expiry per material."""
+        optimizer = InventoryOptimizer(as_of='2024-07-01')
+        optimizer.load_data()
+        optimizer.set_lots(pd.DataFrame({
+            'material_name': ['Onions', 'Onions', 'Herbs'],
+            'quantity': [2.0, 40.0, 5.0],
+            'expiry_date': pd.to_datetime(['2024-07-02', '2024-07-20', '2024-07-15'])
+        }))
+        inventory = optimizer.inventory_data.set_index('material_name')
+        self.assertEqual(inventory.loc['Onions', 'current_stock'], 42.0)
+        self.assertEqual(inventory.loc['Salt', 'current_stock'], 0.0)
+
+        near_expiry = optimizer.find_near_expiry_materials(3)
+        self.assertEqual(set(near_expiry['material_name']), {'Onions'})
+        self.assertTrue((near_expiry['expiring_quantity'] == 2.0).all())
+        # 2 kg of onions at 0.1 per dish
+        self.assertTrue((near_expiry['max_dishes_possible'] == 20).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ml_forecaster import MLForecaster
+
+
+def make_orders(days: int = 120, dishes=('Chicken Curry', 'Beef Steak', 'Fish Soup'), seed: int = 0) -> pd.DataFrame:
+    """Small synthetic order history with a weekly pattern."""
+    rng = np.random.RandomState(seed)
+    dates = pd.date_range(start='2024-01-01', periods=days, freq='D')
+    rows = []
+    for i, dish in enumerate(dishes):
+        base = 10 + 5 * i
+        weekly = np.where(dates.dayofweek >= 5, 1.3, 1.0)
+        quantities = rng.poisson(base * weekly)
+        for date, qty in zip(dates, quantities):
+            rows.append({'date': date, 'dish_name': dish, 'quantity_sold': int(qty)})
+    return pd.DataFrame(rows)
+
+
+class TestMLForecaster(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = make_orders()
+
+    def test_invalid_algorithm(self):
+        """Unknown algorithms and backends are rejected."""
+        with self.assertRaises(ValueError):
+            MLForecaster(algorithm='lstm')
+        with self.assertRaises(ValueError):
+            MLForecaster(algorithm='xgboost', backend='cluster')
+
+    def test_parallel_fit_matches_serial(self):
+        """Parallel training produces the same predictions as the serial path."""
+        serial = MLForecaster(algorithm='xgboost')
+        serial.fit(self.orders.copy())
+
+        parallel = MLForecaster(algorithm='xgboost', n_jobs=2, backend='process')
+        parallel.fit(self.orders.copy())
+
+        self.assertEqual(list(serial.models.keys()), list(parallel.models.keys()))
+        pd.testing.assert_frame_equal(serial.predict(days_ahead=7), parallel.predict(days_ahead=7))
+
+    def test_batched_tree_prediction_matches_single_rows(self):
+        """One batched predict call gives the same values as row-by-row prediction."""
+        forecaster = MLForecaster(algorithm='xgboost')
+        forecaster.fit(self.orders.copy())
+        forecast = forecaster.predict(days_ahead=14)
+
+        self.assertEqual(len(forecast), 14 * len(forecaster.models))
+        for dish_name, model_dict in forecaster.models.items():
+            dish_forecast = forecast[forecast['dish_name'] == dish_name]
+            for _, row in dish_forecast.iterrows():
+                features = forecaster.prepare_features(pd.DataFrame({'date': [row['date']]}))
+                expected = model_dict['model'].predict(features[model_dict['features']])[0]
+                self.assertEqual(row['predicted_quantity'], max(0, int(expected)))
+
+    def test_sarima_forecast_path(self):
+        """SARIMA maps each forecast step to its own date and returns intervals."""
+        orders = make_orders(days=90, dishes=('Chicken Curry',))
+        forecaster = MLForecaster(algorithm='sarima')
+        forecaster.fit(orders)
+
+        model = forecaster.models['Chicken Curry']
+        last_date = model.fittedvalues.index[-1]
+        future_dates = [(last_date + pd.Timedelta(days=i)).date() for i in range(1, 8)]
+        mean, lower, upper = forecaster._predict_sarima(model, future_dates)
+
+        np.testing.assert_allclose(mean, model.forecast(steps=7).to_numpy())
+        self.assertTrue(np.all(lower <= mean) and np.all(mean <= upper))
+        self.assertGreater(len(np.unique(np.round(mean, 6))), 1)
+
+        # A later origin skips the gap; an origin inside the training series gets in-sample values
+        later, _, _ = forecaster._predict_sarima(model, future_dates[3:])
+        np.testing.assert_allclose(later, mean[3:])
+        past_dates = [(last_date - pd.Timedelta(days=i)).date() for i in range(2, -3, -1)]
+        past, _, _ = forecaster._predict_sarima(model, past_dates)
+        np.testing.assert_allclose(past[:3], model.fittedvalues.to_numpy()[-3:])
+        np.testing.assert_allclose(past[3:], mean[:2])
+
+        forecast = forecaster.predict(days_ahead=7)
+        for col in ['lower_bound', 'upper_bound']:
+            self.assertIn(col, forecast.columns)
+
+    def test_incremental_update(self):
+        """update() extends existing models instead of refitting them."""
+        orders = make_orders(days=97)
+        history = orders[orders['date'] < '2024-04-01']
+        new_orders = orders[(orders['date'] >= '2024-04-01') & (orders['dish_name'] == 'Fish Soup')]
+
+        sarima = MLForecaster(algorithm='sarima')
+        sarima.fit(history[history['dish_name'] == 'Fish Soup'].copy())
+        before = sarima.models['Fish Soup']
+        sarima.update(new_orders)
+        after = sarima.models['Fish Soup']
+        self.assertEqual(after.nobs, before.nobs + len(new_orders))
+        np.testing.assert_allclose(after.params, before.params)
+
+        booster = MLForecaster(algorithm='xgboost')
+        booster.fit(history.copy())
+        untouched = booster.models['Beef Steak']['model']
+        updated = booster.update(new_orders, boost_rounds=10)
+        self.assertEqual(updated, ['Fish Soup'])
+        self.assertEqual(booster.models['Fish Soup']['model'].get_booster().num_boosted_rounds(), 110)
+        self.assertIs(booster.models['Beef Steak']['model'], untouched)
+        self.assertEqual(len(booster.history), len(history) + len(new_orders))
+
+    def test_global_xgboost(self):
+        """One shared model forecasts every dish, one batched call per 7-day block."""
+        forecaster = MLForecaster(algorithm='xgboost_global')
+        forecaster.fit(self.orders.copy())
+
+        info = forecaster.get_model_info()
+        self.assertEqual(info['num_models'], 1)
+        self.assertEqual(info['dishes'], list(self.orders['dish_name'].unique()))
+        self.assertIn('lag_7', forecaster.global_model['features'])
+
+        model = forecaster.global_model['model']
+        calls = []
+        original_predict = model.predict
+        model.predict = lambda X: calls.append(len(X)) or original_predict(X)
+
+        last_date = forecaster.global_model['panel'].index[-1]
+        future_dates = [(last_date + pd.Timedelta(days=i)).date() for i in range(1, 8)]
+        forecast = forecaster._predict_global(future_dates)
+
+        self.assertEqual(calls, [7 * len(info['dishes'])])
+        self.assertEqual(list(forecast.columns),
+                         ['date', 'dish_name', 'predicted_quantity', 'algorithm', 'p10', 'p50', 'p90'])
+        self.assertTrue((forecast['predicted_quantity'] >= 0).all())
+
+    def test_quantile_forecasts(self):
+        """Every algorithm returns ordered P10/P50/P90 columns, computed in batch."""
+        orders = make_orders(days=90)
+        for algorithm in ['xgboost', 'random_forest', 'sarima']:
+            forecaster = MLForecaster(algorithm=algorithm)
+            forecaster.fit(orders[orders['dish_name'] == 'Fish Soup'].copy())
+            forecast = forecaster.predict(days_ahead=7, start_date=orders['date'].max())
+            
+            self.assertTrue((forecast['p10'] <= forecast['p50']).all(), algorithm)
+            self.assertTrue((forecast['p50'] <= forecast['p90']).all(), algorithm)
+            self.assertGreater((forecast['p90'] - forecast['p10']).mean(), 0, algorithm)
+        
+        # The RF spread is the quantile of the individual trees' predictions
+        forest = MLForecaster(algorithm='random_forest')
+        forest.fit(orders.copy())
+        features = forest.prepare_features(pd.DataFrame({'date': pd.date_range('2024-04-01', periods=3)}))
+        rf = forest.models['Beef Steak']
+        per_tree = np.stack([tree.predict(features[rf['features']].to_numpy(dtype=np.float32))
+                             for tree in rf['model'].estimators_])
+        np.testing.assert_allclose(forest._predict_tree_quantiles(rf, features),
+                                   np.quantile(per_tree, [0.1, 0.5, 0.9], axis=0).T)
+        
+        plain = MLForecaster(algorithm='xgboost', quantiles=False)
+        plain.fit(orders.copy())
+        self.assertNotIn('quantile_model', plain.models['Beef Steak'])
+        self.assertNotIn('p90', plain.predict(days_ahead=3).columns)
+    
+    def test_thread_backend(self):
+        """The thread backend fits every dish."""
+        forecaster = MLForecaster(algorithm='random_forest', n_jobs=2, backend='thread')
+        forecaster.fit(self.orders.copy())
+        self.assertTrue(forecaster.is_fitted)
+        self.assertEqual(len(forecaster.models), self.orders['dish_name'].nunique())
+        # Parallel workers train single-threaded forests instead of one per core each
+        self.assertEqual(forecaster.models['Fish Soup']['model'].n_jobs, 1)
+        self.assertEqual(forecaster.model_params['n_jobs'], -1)
+        tuned = MLForecaster(algorithm='xgboost', n_jobs=2, dish_params={'Fish Soup': {'n_jobs': 8}})
+        self.assertEqual(tuned._worker_template().params_for('Fish Soup')['n_jobs'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ml_forecaster import MLForecaster
+from src.model_registry import ModelRegistry
+from tests.test_ml_forecaster import make_orders
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.orders = make_orders(days=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def test_cold_start_loads_saved_models(self):
+        """A second forecaster loads models instead of retraining."""
+        registry = ModelRegistry(self.root_dir)
+        first = MLForecaster(algorithm='xgboost')
+        first.fit(self.orders.copy(), registry=registry)
+
+        second = MLForecaster(algorithm='xgboost')
+        second._fit_dish = lambda *args: self.fail("model should come from the registry")
+        second.fit(self.orders.copy(), registry=ModelRegistry(self.root_dir))
+
+        self.assertEqual(list(first.models.keys()), list(second.models.keys()))
+        self.assertTrue(first.predict(7).equals(second.predict(7)))
+
+    def test_staleness_and_params(self):
+        """Changed data or hyperparameters invalidate only the affected models."""
+        registry = ModelRegistry(self.root_dir)
+        forecaster = MLForecaster(algorithm='xgboost')
+        forecaster.fit(self.orders.copy(), registry=registry)
+
+        dish_data = self.orders[self.orders['dish_name'] == 'Beef Steak']
+        data_hash = registry.hash_data(dish_data)
+        self.assertFalse(registry.is_stale('xgboost', 'Beef Steak', data_hash, forecaster.params_hash()))
+
+        changed = dish_data.copy()
+        changed.iloc[0, changed.columns.get_loc('quantity_sold')] += 1
+        self.assertTrue(registry.is_stale('xgboost', 'Beef Steak', registry.hash_data(changed),
+                                          forecaster.params_hash()))
+
+        tuned = MLForecaster(algorithm='xgboost', model_params={'max_depth': 3})
+        self.assertNotEqual(tuned.params_hash(), forecaster.params_hash())
+
+    def test_global_model_tracks_dish_attributes(self):
+        """Re-categorising a dish retrains the global model instead of loading stale codes."""
+        orders = self.orders.assign(category='Main', cuisine='Vietnamese')
+        MLForecaster(algorithm='xgboost_global').fit(orders.copy(), registry=ModelRegistry(self.root_dir))
+
+        cached = MLForecaster(algorithm='xgboost_global')
+        cached.fit(orders.copy(), registry=ModelRegistry(self.root_dir))
+        self.assertEqual(len(ModelRegistry(self.root_dir).list_versions('xgboost_global', '__all__')), 1)
+
+        orders.loc[orders['dish_name'] == 'Fish Soup', 'category'] = 'Soup'
+        retrained = MLForecaster(algorithm='xgboost_global')
+        retrained.fit(orders.copy(), registry=ModelRegistry(self.root_dir))
+        self.assertEqual(len(ModelRegistry(self.root_dir).list_versions('xgboost_global', '__all__')), 2)
+        codes = retrained.global_model['static_codes']['category_code']
+        self.assertEqual(len(set(codes)), 2)
+
+    def test_eviction_keeps_newest_versions(self):
+        """Only max_versions versions are kept per dish."""
+        registry = ModelRegistry(self.root_dir, max_versions=2)
+        for version in range(4):
+            registry.save('sarima', 'Fish Soup', {'version': version}, f"data{version}", 'params')
+
+        versions = registry.list_versions('sarima', 'Fish Soup')
+        self.assertEqual([v['data_hash'] for v in versions], ['data2', 'data3'])
+        self.assertEqual(len(os.listdir(os.path.join(self.root_dir, 'sarima'))), 2)
+        self.assertIsNone(registry.load('sarima', 'Fish Soup', 'data0', 'params'))
+        self.assertEqual(registry.load('sarima', 'Fish Soup', 'data3', 'params'), {'version': 3})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
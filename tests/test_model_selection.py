@@ -0,0 +1,76 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model_selection import AlgorithmSelector, baseline_forecast
+from src.ml_forecaster import MLForecaster
+from tests.test_ml_forecaster import make_orders
+
+
+class TestAlgorithmSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = make_orders(days=100, dishes=('Chicken Curry', 'Beef Steak'))
+        # A dish with a fixed weekday pattern is screened by the weekday baseline
+        dates = pd.date_range('2024-01-01', periods=100, freq='D')
+        steady = pd.DataFrame({'date': dates, 'dish_name': 'Pho',
+                               'quantity_sold': np.where(dates.dayofweek >= 5, 30, 10)})
+        self.orders = pd.concat([self.orders, steady], ignore_index=True)
+
+    def make_selector(self):
+        return AlgorithmSelector(candidates=['xgboost'], n_origins=2, screen_wape=5.0)
+
+    def test_screening_and_memoization(self):
+        """Baselines screen easy dishes; fold scores are reused until a dish's data changes."""
+        selector = self.make_selector()
+        selection = selector.select(self.orders)
+
+        self.assertTrue(selection['Pho']['screened'])
+        self.assertEqual(selection['Pho']['algorithm'], 'weekday_average')
+        self.assertEqual(selection['Pho']['scores']['weekday_average'], 0)
+        self.assertNotIn('xgboost', selection['Pho']['scores'])
+        self.assertIn('xgboost', selection['Beef Steak']['scores'])
+        self.assertEqual(selector.fits_run, 2 * 2)
+
+        selector.select(self.orders)
+        self.assertEqual(selector.fits_run, 2 * 2)
+
+        # Correcting one day inside the last fold re-scores only that fold of that dish
+        changed = self.orders.copy()
+        row = changed.index[(changed['dish_name'] == 'Beef Steak') & (changed['date'] == '2024-04-01')]
+        changed.loc[row, 'quantity_sold'] += 5
+        selector.select(changed)
+        self.assertEqual(selector.fits_run, 2 * 2 + 1)
+
+    def test_auto_forecaster(self):
+        """'auto' predicts every dish with its selected algorithm in the usual schema."""
+        forecaster = MLForecaster(algorithm='auto', selector=self.make_selector())
+        forecaster.fit(self.orders.copy())
+
+        last_date = self.orders['date'].max()
+        forecast = forecaster.predict(days_ahead=7, start_date=last_date)
+        self.assertEqual(list(forecast.columns[:4]), ['date', 'dish_name', 'predicted_quantity', 'algorithm'])
+        self.assertEqual(len(forecast), 7 * 3)
+        self.assertEqual(list(forecast['dish_name'].unique()), list(self.orders['dish_name'].unique()))
+
+        pho = forecast[forecast['dish_name'] == 'Pho']
+        self.assertTrue((pho['algorithm'] == 'weekday_average').all())
+        expected = np.where(pd.to_datetime(pho['date']).dt.dayofweek >= 5, 30, 10)
+        np.testing.assert_array_equal(pho['predicted_quantity'], expected)
+
+        info = forecaster.get_model_info()
+        self.assertEqual(set(info['selection']), set(self.orders['dish_name']))
+
+    def test_baseline_forecast(self):
+        """Average baselines use the shared fallback format."""
+        values = baseline_forecast({'type': 'average', 'value': 4.5}, ['2024-05-01', '2024-05-02'])
+        np.testing.assert_array_equal(values, [4.5, 4.5])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
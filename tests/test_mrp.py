@@ -0,0 +1,82 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.mrp import MaterialRequirementsPlanner
+from src.inventory_optimizer import InventoryOptimizer
+
+
+class TestMaterialRequirementsPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.days = pd.date_range('2024-07-01', periods=6, freq='D')
+        self.requirements = pd.DataFrame({
+            'date': np.repeat(self.days.date, 2),
+            'material_name': ['Rice', 'Fish'] * 6,
+            'total_material_needed': [4.0, 1.0] * 6
+        })
+        self.inventory = pd.DataFrame({
+            'material_name': ['Rice', 'Fish'],
+            'current_stock': [10.0, 3.0],
+            'reorder_level': [2.0, np.nan],
+            'minimum_stock_level': [0.0, 1.0],
+            'supplier_lead_time': [np.nan, 4],
+            'cost_per_unit': [1.5, 10.0]
+        })
+
+    def test_time_phased_netting(self):
+        """Stock is projected day by day and kept at the safety floor with dated orders."""
+        plan = MaterialRequirementsPlanner(default_lead_time=2).plan(self.requirements, self.inventory)
+        projection = plan['projection'].set_index(['material_name', 'date'])
+
+        # Rice: 10 on hand, 4/day, floor 2 -> short from day 3 by 4 per day
+        rice = projection.loc['Rice']
+        np.testing.assert_allclose(rice['planned_receipts'], [0, 0, 4, 4, 4, 4])
+        np.testing.assert_allclose(rice['projected_on_hand'], [6, 2, 2, 2, 2, 2])
+
+        orders = plan['purchase_orders']
+        rice_orders = orders[orders['material_name'] == 'Rice']
+        self.assertEqual(list(rice_orders['due_date']), list(self.days[2:]))
+        self.assertTrue((rice_orders['due_date'] - rice_orders['order_date'] == pd.Timedelta(days=2)).all())
+        self.assertFalse(rice_orders['late'].any())
+        np.testing.assert_allclose(rice_orders['cost'], 4 * 1.5)
+
+        # Fish: floor 1 (minimum stock), lead time 4 -> the day-3 order is already late
+        fish_orders = orders[orders['material_name'] == 'Fish']
+        self.assertEqual(fish_orders['due_date'].iloc[0], self.days[2])
+        self.assertTrue(fish_orders['late'].iloc[0])
+        self.assertEqual(fish_orders['order_date'].iloc[0], self.days[0] - pd.Timedelta(days=1))
+        self.assertTrue(orders['order_date'].is_monotonic_increasing)
+
+    def test_scheduled_receipts(self):
+        """Open orders are netted before planning new ones."""
+        receipts = pd.DataFrame({'material_name': ['Rice'], 'date': [self.days[2]], 'quantity': [8.0]})
+        plan = MaterialRequirementsPlanner().plan(self.requirements, self.inventory,
+                                                  scheduled_receipts=receipts)
+        rice = plan['projection'][plan['projection']['material_name'] == 'Rice']
+        np.testing.assert_allclose(rice['planned_receipts'], [0, 0, 0, 0, 4, 4])
+        self.assertGreaterEqual(plan['projection']['projected_on_hand'].min(), 1.0)
+
+    def test_optimizer_plan(self):
+        """The optimizer plans from its as-of date over the forecast horizon."""
+        optimizer = InventoryOptimizer(as_of='2024-06-30')
+        optimizer.load_data()
+        optimizer.inventory_data['current_stock'] = 0
+        plan = optimizer.plan_purchases(days_ahead=7, service_level='p90')
+
+        projection = plan['projection']
+        self.assertEqual(projection['date'].min(), pd.Timestamp('2024-07-01'))
+        self.assertEqual(projection['date'].nunique(), 7)
+        orders = plan['purchase_orders']
+        self.assertFalse(orders.empty)
+        self.assertTrue((orders['order_date'] >= pd.Timestamp('2024-06-30')).all())
+        self.assertIn('purchase_orders', optimizer.generate_optimization_report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bom import BillOfMaterials
+from src.production_planner import ProductionPlanner
+from src.inventory_optimizer import InventoryOptimizer
+
+
+def make_bom() -> BillOfMaterials:
+    return BillOfMaterials(pd.DataFrame({
+        'dish_name': ['Soup', 'Soup', 'Stew', 'Salad'],
+        'material_name': ['Fish', 'Onions', 'Fish', 'Greens'],
+        'quantity_needed': [0.5, 0.1, 1.0, 0.25]
+    }))
+
+
+def make_demand(days: int = 2) -> pd.DataFrame:
+    dates = pd.date_range('2024-07-01', periods=days, freq='D')
+    return pd.DataFrame({
+        'date': np.repeat(dates, 3),
+        'dish_name': ['Soup', 'Stew', 'Salad'] * days,
+        'predicted_quantity': [10.0, 10.0, 8.0] * days
+    })
+
+
+class TestProductionPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.costs = pd.Series({'Fish': 4.0, 'Onions': 1.0, 'Greens': 2.0})
+
+    def test_shared_stock_goes_to_best_margin(self):
+        """Scarce fish goes to the dish earning most per unit of fish, within demand."""
+        stock = pd.DataFrame({'material_name': ['Fish', 'Onions', 'Greens'],
+                              'current_stock': [6.0, 100.0, 100.0], 'expiry_date': pd.NaT})
+        prices = pd.Series({'Soup': 5.0, 'Stew': 8.0, 'Salad': 3.0})   # margins 2.9 / 4.0 / 2.5
+        result = ProductionPlanner().plan(make_bom(), make_demand(1), stock, prices, self.costs)
+        plan = result['plan'].set_index('dish_name')['planned_servings']
+
+        # Soup earns 5.8 per unit of fish, stew 4.0: all fish into 10 soups (5 fish), the rest into stew
+        np.testing.assert_allclose(plan[['Soup', 'Stew', 'Salad']], [10.0, 1.0, 8.0], atol=1e-6)
+        materials = result['materials'].set_index('material_name')
+        self.assertAlmostEqual(materials.loc['Fish', 'used'], 6.0)
+        self.assertAlmostEqual(result['objective'], 10 * 2.9 + 4.0 + 8 * 2.5)
+
+    def test_expiring_stock_is_used_first(self):
+        """Stock expiring in the horizon is used before it expires, even at zero margin."""
+        stock = pd.DataFrame({'material_name': ['Greens', 'Greens'], 'quantity': [1.0, 10.0],
+                              'expiry_date': pd.to_datetime(['2024-07-02', '2024-07-31'])})
+        prices = pd.Series({'Salad': 0.5})                           # exactly the ingredient cost
+        result = ProductionPlanner().plan(make_bom(), make_demand(2), stock, prices, self.costs)
+        plan = result['plan'].set_index(['date', 'dish_name'])['planned_servings']
+
+        # The lot expiring on 07-02 is only usable on 07-01: 4 salads use it up
+        self.assertAlmostEqual(plan[(pd.Timestamp('2024-07-01'), 'Salad')], 4.0)
+        self.assertAlmostEqual(result['waste_cost'], 0.0)
+        # No fish or onions: soups and stews cannot be made
+        self.assertEqual(plan.drop('Salad', level='dish_name').sum(), 0)
+
+    def test_whole_servings(self):
+        """Integer plans never exceed the stock or the demand."""
+        stock = pd.DataFrame({'material_name': ['Fish', 'Onions', 'Greens'],
+                              'current_stock': [7.3, 100.0, 1.9], 'expiry_date': pd.NaT})
+        prices = pd.Series({'Soup': 9.0, 'Stew': 9.0, 'Salad': 9.0})
+        for exact in [False, True]:
+            result = ProductionPlanner(integer=True, exact=exact).plan(make_bom(), make_demand(1), stock,
+                                                                       prices, self.costs)
+            servings = result['plan']['planned_servings']
+            np.testing.assert_allclose(servings, np.round(servings))
+            self.assertTrue((servings <= result['plan']['demand']).all())
+            materials = result['materials'].set_index('material_name')
+            self.assertTrue((materials['used'] <= materials['stock'] + 1e-9).all())
+            self.assertEqual(result['plan'].set_index('dish_name').loc['Salad', 'planned_servings'], 7)
+
+    def test_optimizer_plan(self):
+        """The optimizer plans its forecast horizon from its own stock, recipes and prices."""
+        optimizer = InventoryOptimizer(as_of='2024-06-30')
+        optimizer.load_data()
+        forecast = optimizer.forecast_demand(days_ahead=3)
+        result = optimizer.plan_production(demand_forecast=forecast, integer=True)
+
+        plan = result['plan']
+        self.assertEqual(set(plan['date']), set(pd.to_datetime(forecast['date'])))
+        self.assertTrue((plan['planned_servings'] <= plan['demand']).all())
+        materials = result['materials']
+        self.assertTrue((materials['used'] <= materials['stock'] + 1e-6).all())
+        self.assertGreater(len(optimizer.dish_prices()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.statistical_forecaster import StatisticalForecaster
+from src.inventory_optimizer import InventoryOptimizer
+from tests.test_ml_forecaster import make_orders
+
+
+class TestStatisticalForecaster(unittest.TestCase):
+
+    def test_weekday_profile_and_level(self):
+        """A dish selling only on Fridays is forecast on Fridays at its usual size."""
+        dates = pd.date_range('2024-01-01', periods=140, freq='D')
+        orders = pd.DataFrame({'date': dates, 'dish_name': 'Fish Friday',
+                               'quantity_sold': np.where(dates.dayofweek == 4, 70, 0)})
+        forecaster = StatisticalForecaster().fit(orders)
+        forecast = forecaster.predict(days_ahead=14, start_date=dates[-1])
+
+        fridays = pd.to_datetime(forecast['date']).dt.dayofweek == 4
+        np.testing.assert_allclose(forecast.loc[fridays, 'predicted_quantity'], 70, atol=1)
+        self.assertTrue((forecast.loc[~fridays, 'predicted_quantity'] == 0).all())
+        self.assertTrue((forecast.loc[~fridays, 'p90'] == 0).all())
+
+    def test_trend_and_priors(self):
+        """Growing demand is extrapolated; short histories use the configured factors."""
+        dates = pd.date_range('2024-01-01', periods=120, freq='D')
+        orders = pd.DataFrame({'date': dates, 'dish_name': 'Pho', 'quantity_sold': 20 + 0.5 * np.arange(120)})
+        factors = InventoryOptimizer()._create_seasonal_factors()
+        forecast = StatisticalForecaster(seasonal_factors=factors, phi=1.0).fit(orders).predict(
+            days_ahead=7, start_date=dates[-1])
+
+        self.assertGreater(forecast['predicted_quantity'].iloc[-1], forecast['predicted_quantity'].iloc[0])
+        self.assertGreater(forecast['predicted_quantity'].iloc[0], 70)
+        # Less than a year of history: April-May use the spring factor
+        self.assertTrue((forecast['seasonal_factor'] == factors['factors']['spring']).all())
+
+    def test_output_schema(self):
+        """Rows are date-major with the seasonal columns and ordered quantiles."""
+        orders = make_orders(days=60)
+        forecast = StatisticalForecaster().fit(orders).predict(days_ahead=3, start_date='2024-02-29')
+
+        self.assertEqual(list(forecast.columns), ['date', 'dish_name', 'predicted_quantity', 'seasonal_factor',
+                                                  'weekend_factor', 'p10', 'p50', 'p90'])
+        self.assertEqual(list(forecast['dish_name'][:3]), ['Chicken Curry', 'Beef Steak', 'Fish Soup'])
+        self.assertEqual(forecast['date'].nunique(), 3)
+        self.assertTrue((forecast['p10'] <= forecast['p50']).all())
+        self.assertTrue((forecast['p50'] <= forecast['p90']).all())
+        self.assertTrue(StatisticalForecaster().fit(orders).predict(days_ahead=0).empty)
+
+
+    def test_predict_origins(self):
+        """One batched run equals a fit and predict per origin, dishes appearing once launched."""
+        orders = make_orders(days=120)
+        orders = orders[(orders['dish_name'] != 'Fish Soup') | (orders['date'] >= '2024-03-01')]
+        orders = orders[orders['date'].dt.dayofweek != 6]
+        origins = pd.to_datetime(['2024-02-10', '2024-03-17', '2024-04-20'])
+        forecaster = StatisticalForecaster(lookback_days=60, weekday_lookback=28, season_lookback=90)
+
+        batch = forecaster.predict_origins(orders, origins, days_ahead=5)
+        for origin in origins:
+            single = forecaster.fit(orders, as_of=origin).predict(days_ahead=5, start_date=origin)
+            fold = batch[batch['origin'] == origin].drop(columns='origin').reset_index(drop=True)
+            pd.testing.assert_frame_equal(fold, single)
+        self.assertNotIn('Fish Soup', set(batch.loc[batch['origin'] == origins[0], 'dish_name']))
+
+
+if __name__ == '__main__':
+    unittest.main()
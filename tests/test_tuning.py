@@ -0,0 +1,74 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tuning import HyperparameterTuner
+from src.model_registry import ModelRegistry
+from src.ml_forecaster import MLForecaster
+from tests.test_ml_forecaster import make_orders
+
+
+class TestHyperparameterTuner(unittest.TestCase):
+
+    def setUp(self):
+        self.orders = make_orders(days=84, dishes=('Chicken Curry', 'Beef Steak'))
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp_dir.name, 'tuning_state.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_tuner(self, **kwargs):
+        return HyperparameterTuner(self.orders, 'random_forest', n_candidates=4, eta=2,
+                                   min_origins=1, max_origins=2, state_path=self.state_path, **kwargs)
+
+    def test_successive_halving(self):
+        """Each dish keeps half of its configs per rung; the default config is a candidate."""
+        tuner = self.make_tuner()
+        self.assertEqual(tuner.state['candidates'][0]['max_depth'], 10)
+
+        best = tuner.run()
+        self.assertTrue(tuner.state['complete'])
+        self.assertEqual(set(best), {'Chicken Curry', 'Beef Steak'})
+        self.assertEqual(tuner.state['rung'], 1)
+        for alive in tuner.state['alive'].values():
+            self.assertEqual(len(alive), 1)
+        # Rung 1 only re-runs candidates that survived for some dish
+        rung_1 = [key for key in tuner.state['scores'] if key.startswith('1:')]
+        self.assertLessEqual(len(rung_1), 2 * 2)
+
+    def test_time_budget_and_resume(self):
+        """A stopped search resumes from its state file without repeating trials."""
+        stopped = self.make_tuner(time_budget=0)
+        stopped.run()
+        self.assertTrue(os.path.exists(self.state_path))
+        self.assertFalse(stopped.state['complete'])
+
+        resumed = self.make_tuner()
+        best = resumed.run()
+        n_trials = len(resumed.state['scores'])
+
+        again = self.make_tuner()
+        self.assertEqual(again.run(), best)
+        self.assertEqual(len(again.state['scores']), n_trials)
+
+    def test_fit_picks_up_saved_params(self):
+        """Configs saved in the registry override the defaults per dish."""
+        registry = ModelRegistry(os.path.join(self.tmp_dir.name, 'models'))
+        registry.save_tuned_params('xgboost', {'Beef Steak': {'max_depth': 2}})
+
+        forecaster = MLForecaster(algorithm='xgboost')
+        forecaster.fit(self.orders.copy(), registry=registry)
+        self.assertEqual(forecaster.models['Beef Steak']['model'].get_params()['max_depth'], 2)
+        self.assertEqual(forecaster.models['Chicken Curry']['model'].get_params()['max_depth'], 5)
+        self.assertNotEqual(forecaster.params_hash('Beef Steak'), forecaster.params_hash('Chicken Curry'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)